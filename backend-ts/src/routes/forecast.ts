@@ -198,6 +198,25 @@ router.post('/predict', authenticate, requireAdmin, async (req: AuthenticatedReq
     }
 });
 
+// Multi-store forecasts in one ML service round trip (per-item results/errors)
+router.post('/predict/batch', authenticate, requireAdmin, async (req: AuthenticatedRequest, res: Response) => {
+    try {
+        const { items } = req.body;
+        if (!Array.isArray(items) || items.length === 0) {
+            return res.status(400).json({ status: 'error', error: 'items must be a non-empty array' });
+        }
+        const results = await mlClient.predictBatch(items.map((item: any) => ({
+            store_id: String(item.store_id),
+            periods: item.periods || 30,
+            events: item.events || [],
+        })));
+        res.json({ status: 'success', results });
+    } catch (error: any) {
+        console.error('[Forecast] Batch predict failed:', error);
+        res.status(500).json({ status: 'error', error: error.message });
+    }
+});
+
 router.get('/model/:store_id/status', authenticate, requireAdmin, async (req: AuthenticatedRequest, res: Response) => {
     try {
         const status = await mlClient.getModelStatus(req.params.store_id);
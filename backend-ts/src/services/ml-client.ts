@@ -1,6 +1,6 @@
 import axios from 'axios';
 import { config } from '../config';
-import { ForecastRequest, ForecastResponse } from '../types';
+import { BatchForecastResult, ForecastRequest, ForecastResponse } from '../types';
 
 const ML_SERVICE_URL = config.mlService.url;
 
@@ -50,6 +50,31 @@ class MLClient {
         }
     }
 
+    /**
+     * Forecasts for several stores in one round trip. Results are in request
+     * order; a failed item has status 'error' (and status_code) without
+     * failing the others.
+     */
+    async predictBatch(requests: ForecastRequest[]): Promise<BatchForecastResult[]> {
+        try {
+            console.log(`[ML] Batch predicting ${requests.length} items...`);
+
+            const response = await this.client.post('/ml/predict/batch', {
+                items: requests.map((request) => ({
+                    store_id: request.store_id,
+                    periods: request.periods,
+                    events: request.events || [],
+                })),
+            });
+
+            console.log(`[ML] Batch prediction completed: ${response.data.metadata?.failed || 0} failed`);
+            return response.data.results;
+        } catch (error) {
+            console.error('[ML] Batch prediction failed:', error);
+            throw new Error(`ML batch prediction failed: ${error}`);
+        }
+    }
+
     async getModelStatus(storeId: string): Promise<any> {
         try {
             const response = await this.client.get(`/ml/model/${storeId}/status`);
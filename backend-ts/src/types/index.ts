@@ -66,3 +66,18 @@ export interface ForecastResponse {
     metadata?: any;
     error?: string;
 }
+
+export interface BatchForecastResult extends ForecastResponse {
+    store_id: string;
+    status_code?: number;
+}
+
+export interface BatchForecastResponse {
+    status: 'success';
+    results: BatchForecastResult[];
+    metadata: {
+        items: number;
+        stores: number;
+        failed: number;
+    };
+}
@@ -0,0 +1,261 @@
+"""
+Rolling-Origin Backtesting
+
+Out-of-sample accuracy for a model configuration: the model is refitted
+on expanding windows that end `step` days apart and each refit forecasts
+the next `horizon` days. Errors are aggregated per forecast horizon
+(day 1..horizon after the cutoff).
+
+Folds are independent, so they run in a shared process pool. Each fold
+is warm-started from the full-data model's params (same layout), which
+only changes the optimizer's starting point, not the fitted optimum.
+
+Each fold's test window is built the way the predictor builds a future
+frame at the cutoff: calendar and event columns are known in advance and
+kept, while regressors derived from the target or from transactions get
+the values serving would fill in, computed from the training part only
+(see fold_frames).
+"""
+
+import json
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+from sqlalchemy import text
+
+from config import (
+    BACKTEST_HORIZON, BACKTEST_STEP, BACKTEST_FOLDS, BACKTEST_WORKERS,
+    INTERVAL_WIDTH
+)
+from predictor import predictor, residual_interval
+from warm_start import fit_prophet
+from fallback_engines import FallbackEngine, create_engine
+
+logger = logging.getLogger(__name__)
+
+# (training part, y_original of the training part) -> model-space values of
+# the history-derived regressor columns for the fold's test window
+HistoryFeatures = Callable[[pd.DataFrame, np.ndarray], Dict[str, float]]
+
+# Shared pools, one per worker count (spawning workers imports Prophet, so
+# pay that once per process). A pool is never shut down while callers may
+# still hold it.
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pools[workers] = pool
+        return pool
+
+
+def build_model(spec: Dict[str, Any]) -> Union[Prophet, FallbackEngine]:
+    """
+    Create an unfitted model from a picklable spec.
+    
+    Args:
+        spec: {"prophet_params": {...}, "regressors": [[name, prior_scale or None], ...]}
+            or {"engine": <fallback engine name>}
+    """
+    if spec.get("engine", "prophet") != "prophet":
+        return create_engine(spec["engine"])
+    
+    model = Prophet(**spec["prophet_params"])
+    for name, prior_scale in spec["regressors"]:
+        if prior_scale is None:
+            model.add_regressor(name)
+        else:
+            model.add_regressor(name, prior_scale=prior_scale, mode='additive')
+    return model
+
+
+def fold_cutoffs(n_rows: int, horizon: int, step: int, folds: int, min_train: int) -> List[int]:
+    """
+    Row indices where each fold's test window starts (oldest first).
+    
+    The last fold ends at the last row; folds that would leave fewer than
+    min_train training rows are dropped.
+    """
+    cutoffs = [n_rows - horizon - i * step for i in range(folds)]
+    return sorted(c for c in cutoffs if c >= min_train)
+
+
+def fold_frames(
+    train_df: pd.DataFrame,
+    y_original: np.ndarray,
+    cutoffs: List[int],
+    horizon: int,
+    history_features: Optional[HistoryFeatures] = None
+) -> List[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    (training part, test window) of each fold.
+    
+    Args:
+        history_features: Values of the regressors that are not known in
+            advance (lag/rolling features, transaction averages), as the
+            predictor fills them for a forecast, from the training part.
+            Without it every test-window column is used as observed, which
+            is only valid for calendar/event regressors.
+    """
+    frames = []
+    for cutoff in cutoffs:
+        train_part = train_df.iloc[:cutoff]
+        test_part = train_df.iloc[cutoff:cutoff + horizon]
+        if history_features is not None:
+            values = history_features(train_part, y_original[:cutoff])
+            test_part = test_part.assign(**{col: value for col, value in values.items() if col in test_part.columns})
+        frames.append((train_part, test_part))
+    return frames
+
+
+def run_fold(
+    spec: Dict[str, Any],
+    train_part: pd.DataFrame,
+    test_part: pd.DataFrame,
+    init_model: Optional[Prophet],
+    interval_width: float
+) -> Tuple[np.ndarray, float, float]:
+    """Fit one fold; returns (yhat, lower offset, upper offset) in model space"""
+    model = build_model(spec)
+    if isinstance(model, FallbackEngine):
+        model.fit(train_part['ds'], train_part['y'].to_numpy())
+    else:
+        fit_prophet(model, train_part, previous=init_model)
+    fitted = predictor.predict_point(model, train_part)
+    offsets = residual_interval(train_part['y'].values, fitted, interval_width)
+    return predictor.predict_point(model, test_part), offsets["lower"], offsets["upper"]
+
+
+def _error_metrics(actual: np.ndarray, predicted: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> Dict[str, Any]:
+    abs_error = np.abs(actual - predicted)
+    mask = actual > 0
+    total = np.abs(actual).sum()
+    return {
+        "mape": round(float(np.mean(abs_error[mask] / actual[mask]) * 100), 2) if mask.any() else None,
+        "wape": round(float(abs_error.sum() / total * 100), 2) if total > 0 else None,
+        "coverage": round(float(np.mean((actual >= lower) & (actual <= upper))), 3),
+        "n": int(len(actual)),
+    }
+
+
+def run_backtest(
+    spec: Dict[str, Any],
+    train_df: pd.DataFrame,
+    y_original: np.ndarray,
+    log_transform: bool,
+    init_model: Optional[Prophet] = None,
+    horizon: int = BACKTEST_HORIZON,
+    step: int = BACKTEST_STEP,
+    folds: int = BACKTEST_FOLDS,
+    workers: int = BACKTEST_WORKERS,
+    min_train: int = 30,
+    interval_width: float = INTERVAL_WIDTH,
+    history_features: Optional[HistoryFeatures] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Rolling-origin backtest of a model configuration.
+    
+    Args:
+        spec: Model spec for build_model
+        train_df: Prophet training frame (ds, y in model space, regressors)
+        y_original: Target on the original scale, aligned with train_df
+        log_transform: Whether train_df['y'] is log1p(y_original)
+        init_model: Full-data model used to warm-start the folds
+        workers: Process pool size (<= 1 runs folds in this process)
+        history_features: Test-window values of history-derived regressors
+            (see fold_frames)
+    
+    Returns:
+        Overall and per-horizon MAPE / WAPE / interval coverage,
+        or None if there is not enough data for a single fold
+    """
+    cutoffs = fold_cutoffs(len(train_df), horizon, step, folds, min_train)
+    if not cutoffs:
+        logger.warning(f"Not enough data for backtest ({len(train_df)} rows, horizon={horizon})")
+        return None
+    
+    start = time.perf_counter()
+    tasks = [
+        (spec, train_part, test_part, init_model, interval_width)
+        for train_part, test_part in fold_frames(train_df, y_original, cutoffs, horizon, history_features)
+    ]
+    
+    workers = min(workers, len(tasks))
+    if workers > 1:
+        pool = get_pool(workers)
+        results = list(pool.map(run_fold, *zip(*tasks)))
+    else:
+        results = [run_fold(*task) for task in tasks]
+    
+    inverse = (lambda v: np.maximum(np.expm1(np.clip(v, -10, 20)), 0)) if log_transform else (lambda v: np.maximum(v, 0))
+    
+    # (fold, horizon step) matrices
+    actual = np.vstack([y_original[c:c + horizon] for c in cutoffs])
+    predicted = np.vstack([inverse(yhat) for yhat, _, _ in results])
+    lower = np.vstack([inverse(yhat + lo) for yhat, lo, _ in results])
+    upper = np.vstack([inverse(yhat + hi) for yhat, _, hi in results])
+    
+    per_horizon = [
+        {"h": h + 1, **_error_metrics(actual[:, h], predicted[:, h], lower[:, h], upper[:, h])}
+        for h in range(horizon)
+    ]
+    overall = _error_metrics(actual.ravel(), predicted.ravel(), lower.ravel(), upper.ravel())
+    seconds = time.perf_counter() - start
+    
+    logger.info(
+        f"Backtest: {len(cutoffs)} folds x {horizon}d, MAPE={overall['mape']}%, "
+        f"WAPE={overall['wape']}%, coverage={overall['coverage']} in {seconds:.1f}s ({workers} workers)"
+    )
+    
+    return {
+        "horizon": horizon,
+        "step": step,
+        "folds": len(cutoffs),
+        "cutoffs": [pd.Timestamp(train_df['ds'].iloc[c]).date().isoformat() for c in cutoffs],
+        "interval_width": interval_width,
+        **{key: overall[key] for key in ("mape", "wape", "coverage")},
+        "per_horizon": per_horizon,
+        "seconds": round(seconds, 2),
+        "workers": workers,
+    }
+
+
+def store_model_metrics(engine, model_type: str, target_id: str, metadata: Dict[str, Any], parameters: Dict[str, Any]):
+    """Insert a training run (with backtest results) into ml_model_metrics"""
+    query = text("""
+        INSERT INTO ml_model_metrics (
+            model_type, target_id, version, accuracy, mape, y_mean, y_std,
+            data_points, training_time_seconds, quality_report, parameters, backtest
+        ) VALUES (
+            :model_type, :target_id, :version, :accuracy, :mape, :y_mean, :y_std,
+            :data_points, :training_time_seconds,
+            CAST(:quality_report AS JSONB), CAST(:parameters AS JSONB), CAST(:backtest AS JSONB)
+        )
+    """)
+    backtest = metadata.get("backtest")
+    with engine.begin() as conn:
+        conn.execute(query, {
+            "model_type": model_type,
+            "target_id": str(target_id),
+            "version": metadata.get("model_version") or metadata.get("trained_at"),
+            "accuracy": metadata.get("accuracy"),
+            "mape": backtest["mape"] if backtest else metadata.get("validation_mape", metadata.get("mape")),
+            "y_mean": metadata.get("y_mean"),
+            "y_std": metadata.get("y_std"),
+            "data_points": metadata.get("data_points"),
+            "training_time_seconds": metadata.get("training_time_seconds"),
+            "quality_report": json.dumps(metadata.get("quality_report"), default=str),
+            "parameters": json.dumps(parameters, default=str),
+            "backtest": json.dumps(backtest, default=str),
+        })
@@ -0,0 +1,63 @@
+"""
+Benchmark: store model artifact size and load time
+
+Usage (from ml-service/):
+    python bench_artifact.py /app/models/store_1.json [--runs 200]
+
+Converts a full Prophet JSON artifact to the compact format (plain and
+compressed .npz, written to a temp dir) and reports file size and the
+median/p95 load time of each: model_from_json for the JSON,
+load_model_bundle for the .npz files.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from prophet.serialize import model_from_json
+
+from fast_engine import FastForecastEngine
+from model_artifact import load_model_bundle, save_model_bundle
+
+
+def _time_loads(load, runs: int) -> np.ndarray:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        load()
+        timings.append((time.perf_counter() - start) * 1e3)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("json_path")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    def load_json():
+        with open(args.json_path, "r") as f:
+            return model_from_json(f.read())
+
+    engine = FastForecastEngine.from_prophet(load_json())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifacts = [("json", args.json_path, load_json)]
+        for name, compress in (("npz", False), ("npz (zip)", True)):
+            path = os.path.join(tmp_dir, f"{'compressed' if compress else 'plain'}.npz")
+            save_model_bundle(path, engine, compress=compress)
+            artifacts.append((name, path, lambda path=path: load_model_bundle(path)))
+
+        print(f"{'format':>10} | {'bytes':>8} | {'p50 ms':>8} | {'p95 ms':>8}")
+        for name, path, load in artifacts:
+            timings = _time_loads(load, args.runs)
+            print(
+                f"{name:>10} | {os.path.getsize(path):>8} | "
+                f"{np.percentile(timings, 50):>8.3f} | {np.percentile(timings, 95):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: pandas preprocessing chain vs fused feature pipeline
+
+Usage (from ml-service/):
+    python bench_feature_pipeline.py [--repeat 50]
+
+Reports mean wall time and peak traced allocations (tracemalloc) for
+365 and 3650 days of synthetic daily_sales_summary rows. The pandas
+column includes the re-scaling of the train/validation slices that
+_calculate_accuracy_detailed used to do.
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from config import APPLY_SMOOTHING, REGRESSOR_PRIOR_SCALES, USE_LOG_TRANSFORM, VALIDATION_DAYS
+from feature_pipeline import build_training_features
+from model_trainer import ModelTrainer
+
+
+class _NoEngine:
+    def connect(self):
+        pass
+
+
+def synthetic_summary(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range(end='2025-12-31', periods=rows)
+    return pd.DataFrame({
+        'ds': ds,
+        'y': rng.gamma(5, 200, rows),
+        'transactions_count': rng.poisson(40, rows).astype(float),
+        'items_sold': rng.poisson(90, rows).astype(float),
+        'avg_ticket': rng.normal(25, 3, rows),
+        'is_weekend': (ds.dayofweek >= 5).astype(float),
+        'promo_intensity': rng.uniform(0, 1, rows),
+        'holiday_intensity': rng.uniform(0, 1, rows) * (rng.random(rows) < 0.05),
+        'event_intensity': rng.uniform(0, 1, rows) * (rng.random(rows) < 0.1),
+        'closure_intensity': 0.0,
+    })
+
+
+def pandas_chain(trainer: ModelTrainer, df: pd.DataFrame) -> pd.DataFrame:
+    """The preprocessing train_model ran before the fused pipeline"""
+    df = df.sort_values("ds").copy()
+    df = trainer.handle_outliers(df)
+    df = trainer.add_calendar_features(df)
+    df = trainer.add_lag_features(df)
+    if APPLY_SMOOTHING:
+        df = trainer.apply_smoothing(df)
+    df['y_original'] = df['y'].copy()
+    df['y_log'] = np.log1p(df['y']) if USE_LOG_TRANSFORM else df['y']
+    _, scaler_params = trainer.fit_scaler(df)
+    regressors = [reg for reg in REGRESSOR_PRIOR_SCALES if reg in df.columns]
+    df_scaled = trainer.apply_scaler(df, scaler_params)
+    train_df = df_scaled[["ds", "y_log"] + regressors].copy().rename(columns={'y_log': 'y'})
+
+    # Accuracy step: split, copy and scale both slices again
+    train_slice = df.iloc[:-VALIDATION_DAYS].copy()
+    val_slice = df.iloc[-VALIDATION_DAYS:].copy()
+    trainer.apply_scaler(train_slice[["ds"] + regressors], scaler_params)
+    trainer.apply_scaler(val_slice[["ds"] + regressors], scaler_params)
+    return train_df
+
+
+def measure(fn, repeat: int):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    trainer = ModelTrainer(engine=_NoEngine(), model_dir=tempfile.mkdtemp(prefix="bench_feature_pipeline_"))
+
+    print(f"{'rows':>6} | {'pandas ms':>10} | {'fused ms':>9} | {'speedup':>7} | {'pandas peak KiB':>15} | {'fused peak KiB':>14}")
+    for rows in (365, 3650):
+        df = synthetic_summary(rows)
+        old_time, old_peak = measure(lambda: pandas_chain(trainer, df), args.repeat)
+        new_time, new_peak = measure(lambda: build_training_features(df), args.repeat)
+        print(
+            f"{rows:>6} | {old_time * 1e3:>10.2f} | {new_time * 1e3:>9.2f} | {old_time / new_time:>6.1f}x | "
+            f"{old_peak / 1024:>15.0f} | {new_peak / 1024:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
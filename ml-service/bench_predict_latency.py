@@ -0,0 +1,113 @@
+"""
+Benchmark: /ml/predict latency while a training job is running
+
+Usage (from ml-service/, against a running server):
+    python bench_predict_latency.py --store-id 1 [--url http://localhost:8001]
+                                    [--clients 4] [--idle-seconds 20]
+
+Phase 1 ("idle") sends /ml/predict requests from --clients threads for
+--idle-seconds. Phase 2 ("training") queues a forced /ml/train for the
+same store and keeps sending requests until the job finishes. Compare
+the p50/p95/p99 of both phases with TRAIN_ISOLATED=false (fits in the
+API process) and TRAIN_ISOLATED=true (supervised child processes).
+
+Each request uses a different horizon so the forecast cache does not
+answer them. Run the server with SKIP_UNCHANGED_RETRAIN=false so the
+forced retrain actually fits.
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import List, Tuple
+
+import numpy as np
+
+
+def _post(url: str, body: dict) -> dict:
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=120) as response:
+        return json.loads(response.read())
+
+
+def _get(url: str) -> dict:
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def hammer(base_url: str, store_id: str, clients: int, stop: threading.Event) -> Tuple[List[float], List[int], List[threading.Thread]]:
+    """
+    Send predict requests from `clients` threads until `stop` is set.
+
+    Returns:
+        (latencies in ms and HTTP error codes, filled while running; client threads)
+    """
+    latencies, errors = [], []
+    lock = threading.Lock()
+    horizons = itertools.cycle(range(7, 365))
+
+    def client():
+        while not stop.is_set():
+            with lock:
+                periods = next(horizons)
+            start = time.perf_counter()
+            try:
+                _post(f"{base_url}/ml/predict", {"store_id": store_id, "periods": periods, "interval_mode": "analytic"})
+            except urllib.error.HTTPError as e:
+                errors.append(e.code)
+                continue
+            elapsed = (time.perf_counter() - start) * 1e3
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    return latencies, errors, threads
+
+
+def report(phase: str, latencies: List[float], errors: List[int]):
+    values = np.array(latencies)
+    print(
+        f"{phase:>9} | {len(values):>6} | {len(errors):>6} | {np.percentile(values, 50):>8.1f} | "
+        f"{np.percentile(values, 95):>8.1f} | {np.percentile(values, 99):>8.1f} | {values.max():>8.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--store-id", required=True)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--idle-seconds", type=float, default=20)
+    args = parser.parse_args()
+
+    print(f"{'phase':>9} | {'n':>6} | {'errors':>6} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'max ms':>8}")
+
+    stop = threading.Event()
+    latencies, errors, threads = hammer(args.url, args.store_id, args.clients, stop)
+    time.sleep(args.idle_seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    report("idle", latencies, errors)
+
+    job = _post(f"{args.url}/ml/train", {"store_id": args.store_id, "force_retrain": True})
+    stop = threading.Event()
+    latencies, errors, threads = hammer(args.url, args.store_id, args.clients, stop)
+    while _get(f"{args.url}/ml/jobs/{job['job_id']}")["state"] in ("queued", "running"):
+        time.sleep(0.5)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    report("training", latencies, errors)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: forecast response serialization
+
+Usage (from ml-service/):
+    python bench_serialization.py [--categories 25] [--periods 365] [--runs 50]
+    python bench_serialization.py --live [--periods 365]
+
+Times building and encoding a /ml/predict/categories response for every
+category at a 365-day horizon:
+
+- legacy: to_dict(orient='records') + per-row isoformat, then FastAPI's
+  jsonable_encoder and Starlette's JSONResponse (the former path)
+- records: forecast_columns + records_from_columns, ForecastJSONResponse
+- columnar: forecast_columns, ForecastJSONResponse
+
+and the store-side conversion (Predictor._to_records) against the former
+iterrows loop. Forecasts are synthetic unless --live is given, which
+predicts all trained category models from DATABASE_URL / MODEL_DIR.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from predictor import forecast_columns, predictor
+from serialization import ForecastJSONResponse, format_forecast, orjson
+
+
+def _synthetic_forecasts(categories: int, periods: int) -> dict:
+    rng = np.random.default_rng(0)
+    ds = pd.date_range(start="2026-01-01", periods=periods, freq="D")
+    forecasts = {}
+    for i in range(categories):
+        yhat = rng.uniform(1e3, 5e4, periods)
+        forecasts[f"Category {i}"] = pd.DataFrame({
+            "ds": ds, "yhat": yhat, "yhat_lower": yhat * 0.8, "yhat_upper": yhat * 1.2
+        })
+    return forecasts
+
+
+def _live_forecasts(periods: int) -> dict:
+    import logging
+    from main import get_category_trainer
+
+    logging.disable(logging.WARNING)
+    return get_category_trainer().predict_all_categories(periods)
+
+
+def _legacy_categories(forecasts: dict) -> bytes:
+    result = {}
+    for category, forecast in forecasts.items():
+        predictions = forecast.to_dict(orient='records')
+        for pred in predictions:
+            pred['ds'] = pred['ds'].isoformat() if hasattr(pred['ds'], 'isoformat') else str(pred['ds'])
+        result[category] = predictions
+    content = {"status": "success", "categories": list(result.keys()), "predictions": result}
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def _new_categories(forecasts: dict, forecast_format: str) -> bytes:
+    result = {
+        category: format_forecast(forecast_columns(forecast, ds_unit='s'), forecast_format)
+        for category, forecast in forecasts.items()
+    }
+    return ForecastJSONResponse({"status": "success", "categories": list(result.keys()), "predictions": result}).body
+
+
+def _legacy_store_records(forecast: pd.DataFrame) -> list:
+    predictions = []
+    for _, row in forecast.iterrows():
+        predictions.append({
+            'ds': row['ds'].strftime('%Y-%m-%d'),
+            'yhat': float(row['yhat']),
+            'yhat_lower': float(row['yhat_lower']),
+            'yhat_upper': float(row['yhat_upper'])
+        })
+    return predictions
+
+
+def _time(fn, runs: int) -> np.ndarray:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e3)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, default=25)
+    parser.add_argument("--periods", type=int, default=365)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    forecasts = _live_forecasts(args.periods) if args.live else _synthetic_forecasts(args.categories, args.periods)
+    store_forecast = next(iter(forecasts.values()))
+    assert _legacy_store_records(store_forecast) == predictor._to_records(store_forecast)
+
+    cases = [
+        ("legacy", lambda: _legacy_categories(forecasts)),
+        ("records", lambda: _new_categories(forecasts, "records")),
+        ("columnar", lambda: _new_categories(forecasts, "columnar")),
+        ("store iterrows", lambda: _legacy_store_records(store_forecast)),
+        ("store records", lambda: predictor._to_records(store_forecast)),
+    ]
+
+    print(f"{len(forecasts)} categories x {args.periods} days, encoder: {'orjson' if orjson else 'json'}")
+    print(f"{'case':>15} | {'bytes':>8} | {'p50 ms':>8} | {'p95 ms':>8}")
+    for name, fn in cases:
+        output = fn()
+        size = len(output) if isinstance(output, bytes) else "-"
+        timings = _time(fn, args.runs)
+        print(
+            f"{name:>15} | {size:>8} | "
+            f"{np.percentile(timings, 50):>8.3f} | {np.percentile(timings, 95):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
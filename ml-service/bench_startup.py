@@ -0,0 +1,93 @@
+"""
+Benchmark: ml-service startup
+
+Usage (from ml-service/, DATABASE_URL set):
+    python bench_startup.py [--store-id 1] [--port 8099] [--runs 3]
+
+For each run, starts `uvicorn main:app` and reports:
+- import: seconds to import main (as reported by /ready)
+- health: seconds from process start until /health answers
+- ready: seconds until /ready returns 200 (warm-up finished)
+- first/second predict: latency of the first two /ml/predict calls
+  for --store-id after /ready (different horizons, so no cache hit)
+
+Run it with STARTUP_WARMUP_ENABLED=false to measure first-request latency
+without the background warm-up.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Optional, Tuple
+
+
+def _request(url: str, body: Optional[dict] = None) -> Tuple[int, dict]:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def _wait_for(url: str, start: float, timeout: float = 120) -> float:
+    """Seconds since `start` until `url` returns 200"""
+    while time.perf_counter() - start < timeout:
+        try:
+            if _request(url)[0] == 200:
+                return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def run_once(port: int, store_id: Optional[str]) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        result = {"health": _wait_for(f"{base_url}/health", start)}
+        result["ready"] = _wait_for(f"{base_url}/ready", start)
+        result["import"] = _request(f"{base_url}/ready")[1].get("import_seconds")
+
+        if store_id:
+            for name, periods in (("first_predict", 30), ("second_predict", 31)):
+                t = time.perf_counter()
+                status, _ = _request(f"{base_url}/ml/predict", {"store_id": store_id, "periods": periods})
+                result[name] = time.perf_counter() - t if status == 200 else None
+        return result
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store-id")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    columns = ("import", "health", "ready", "first_predict", "second_predict")
+    print(" | ".join(f"{name:>14}" for name in ("run",) + columns))
+    for run in range(1, args.runs + 1):
+        result = run_once(args.port, args.store_id)
+        cells = [
+            f"{result[name] * 1e3:>11.0f} ms" if result.get(name) is not None else f"{'-':>14}"
+            for name in columns
+        ]
+        print(" | ".join([f"{run:>14}"] + cells))
+
+
+if __name__ == "__main__":
+    main()
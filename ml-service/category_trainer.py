@@ -11,27 +11,97 @@ Each category gets its own model with appropriate parameters.
 import os
 import json
 import pickle
+import time
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any, Union
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from prophet import Prophet
+from prophet.serialize import model_to_json, model_from_json
 from sqlalchemy import text
 
 from config import (
     TRAINING_WINDOW_DAYS, 
     PROPHET_PARAMS_SHORT, PROPHET_PARAMS_MEDIUM,
     OUTLIER_HANDLING, OUTLIER_CLIP_PERCENTILE,
-    USE_LOG_TRANSFORM
+    USE_LOG_TRANSFORM,
+    CATEGORY_TRAIN_WORKERS, CATEGORY_TRAIN_TIMEOUT_SECONDS,
+    WARM_START_ENABLED, SKIP_UNCHANGED_RETRAIN,
+    BACKTEST_ENABLED, BACKTEST_WORKERS, CATEGORY_ENGINE, MODEL_DIR,
+    MODEL_ARTIFACT_FORMAT, MODEL_DEBUG_JSON
+)
+from timezone_utils import get_current_date_wib, get_current_time_wib
+from model_cache import ModelCache, model_cache
+from model_registry import ModelRegistry, file_version
+from predictor import predictor, residual_interval
+from warm_start import fit_deadline, fit_prophet
+from data_fingerprint import compute_fingerprint, fingerprint_matches
+from backtest import run_backtest, store_model_metrics
+from tuning import tune_profile, save_profile, load_profile
+from fallback_engines import create_engine, select_engine, series_profile, trim_leading_zeros
+from fast_engine import FastForecastEngine, UnsupportedModelError
+from model_artifact import (
+    CompactModel, atomic_write, atomic_write_json, load_model_bundle, save_model_bundle
 )
-from timezone_utils import get_current_date_wib
 
 logger = logging.getLogger(__name__)
 
 
+# Per-process trainer used by pool workers (created once by _init_worker)
+_worker_trainer: Optional["CategoryTrainer"] = None
+
+
+def _init_worker(database_url: str, model_dir: str, registry_path: str):
+    """Process pool initializer: one engine + trainer per worker process"""
+    global _worker_trainer
+    from sqlalchemy import create_engine
+    _worker_trainer = CategoryTrainer(
+        create_engine(database_url), model_dir=model_dir, registry=ModelRegistry(registry_path)
+    )
+    _worker_trainer.backtest_workers = 1
+
+
+def _train_category_in_worker(
+    category: str,
+    end_date: Optional[date],
+    force_retrain: bool,
+    timeout: float,
+    df: Optional[pd.DataFrame] = None
+) -> Tuple[Dict[str, Any], float]:
+    """
+    Train one category inside a pool worker, returning (result, seconds)
+    
+    The timeout is the Stan fits' budget (warm_start.fit_deadline): a fit
+    that exceeds it has its CmdStan process terminated, so the worker's
+    CPU is free for the next category.
+    """
+    start = time.perf_counter()
+    try:
+        with fit_deadline(timeout):
+            result = _worker_trainer.train_category_model(category, end_date, force_retrain, df)
+    except TimeoutError:
+        logger.error(f"Training category '{category}' timed out after {timeout}s")
+        result = {"status": "error", "error": f"Timed out after {timeout}s"}
+    except Exception as e:
+        logger.error(f"Error training category '{category}': {e}")
+        result = {"status": "error", "error": str(e)}
+    return result, round(time.perf_counter() - start, 3)
+
+
+def category_history_features(train_part: pd.DataFrame, y_history: np.ndarray) -> Dict[str, float]:
+    """
+    Backtest fold values of the lag features, as predict_category fills them:
+    the mean of the (model-space) target over the fold's training part
+    """
+    y_mean = float(train_part['y'].mean())
+    return {'lag_7': y_mean, 'rolling_mean_7': y_mean}
+
+
 class CategoryTrainer:
     """
     Trains separate Prophet models for each product category.
@@ -40,10 +110,24 @@ class CategoryTrainer:
     which can then be distributed to individual products.
     """
     
-    def __init__(self, engine, model_dir: str = "/app/models/categories"):
+    def __init__(
+        self,
+        engine,
+        model_dir: str = os.path.join(MODEL_DIR, "categories"),
+        cache: Optional[ModelCache] = None,
+        registry: Optional[ModelRegistry] = None
+    ):
         self.engine = engine
         self.model_dir = Path(model_dir)
         self.model_dir.mkdir(parents=True, exist_ok=True)
+        # Shared with ModelTrainer (keys: ("category", name) vs ("store", id))
+        self.cache = cache if cache is not None else model_cache
+        # Model registry, normally ModelTrainer's (main.py passes it in)
+        self.registry = registry if registry is not None else ModelRegistry(str(self.model_dir / "registry.db"))
+        if self.registry.is_empty("category"):
+            self._backfill_registry()
+        # Fold parallelism for backtests (1 inside pool workers, which are already parallel)
+        self.backtest_workers = BACKTEST_WORKERS
     
     def get_categories(self) -> List[str]:
         """Fetch distinct categories from products table."""
@@ -87,16 +171,17 @@ class CategoryTrainer:
             JOIN transactions t ON ti.transaction_id = t.id
             JOIN products p ON ti.product_id = p.id
             WHERE p.category = :category
-              AND DATE(t.date) BETWEEN :start_date AND :end_date
+              AND t.date >= :start_date AND t.date < :end_date_exclusive
             GROUP BY DATE(t.date)
             ORDER BY ds
         """)
         
         with self.engine.connect() as conn:
+            # Range predicate on t.date (not DATE(t.date)) so idx_transactions_date is usable
             result = conn.execute(query, {
                 "category": category,
                 "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat()
+                "end_date_exclusive": (end_date + timedelta(days=1)).isoformat()
             })
             rows = result.fetchall()
         
@@ -121,6 +206,60 @@ class CategoryTrainer:
         
         return df
     
+    def fetch_all_category_data(
+        self,
+        categories: List[str],
+        end_date: Optional[date] = None
+    ) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Fetch daily revenue for all categories in one query.
+        
+        Reads the category_sales_summary materialized view and pivots/reindexes
+        every category at once. Returns None if the view cannot be read
+        (callers then fall back to fetch_category_data per category).
+        """
+        if end_date is None:
+            end_date = get_current_date_wib()
+        
+        start_date = end_date - timedelta(days=TRAINING_WINDOW_DAYS)
+        
+        query = text("""
+            SELECT ds, category, revenue
+            FROM category_sales_summary
+            WHERE ds >= :start_date AND ds <= :end_date
+        """)
+        
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(query, {
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat()
+                }).fetchall()
+        except Exception as e:
+            logger.warning(f"Bulk category fetch failed, falling back to per-category queries: {e}")
+            return None
+        
+        long_df = pd.DataFrame(rows, columns=['ds', 'category', 'revenue'])
+        long_df['ds'] = pd.to_datetime(long_df['ds'])
+        long_df['revenue'] = long_df['revenue'].astype(float)
+        
+        # One pivot + reindex for all categories (missing days -> 0)
+        date_range = pd.date_range(start=start_date, end=end_date, freq='D')
+        wide = long_df.pivot_table(
+            index='ds', columns='category', values='revenue', aggfunc='sum'
+        ).reindex(date_range, fill_value=0).fillna(0)
+        
+        data = {}
+        for category in categories:
+            if category not in wide.columns:
+                logger.warning(f"No data found for category '{category}'")
+                data[category] = pd.DataFrame()
+                continue
+            data[category] = pd.DataFrame({'ds': date_range, 'y': wide[category].to_numpy()})
+        
+        logger.info(f"Fetched {len(long_df)} category-days for {len(categories)} categories in one query")
+        return data
+    
     def add_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add calendar and lag features to dataframe."""
         df = df.copy()
@@ -156,11 +295,16 @@ class CategoryTrainer:
         self, 
         category: str,
         end_date: Optional[date] = None,
-        force_retrain: bool = False
+        force_retrain: bool = False,
+        df: Optional[pd.DataFrame] = None
     ) -> Dict[str, Any]:
         """
         Train Prophet model for a single category.
         
+        Args:
+            df: Preloaded daily series (from fetch_all_category_data);
+                fetched per category when omitted
+        
         Returns metadata including accuracy metrics.
         """
         logger.info(f"Training model for category: {category}")
@@ -173,49 +317,68 @@ class CategoryTrainer:
                 return {"status": "skipped", "reason": "model_recent", **metadata}
         
         # Fetch data
-        df = self.fetch_category_data(category, end_date)
+        if df is None:
+            df = self.fetch_category_data(category, end_date)
         
         if len(df) < 14:
             logger.warning(f"Insufficient data for category '{category}': {len(df)} days")
             return {"status": "error", "reason": "insufficient_data", "days": len(df)}
         
-        # Prepare data
-        df = self.add_features(df)
-        df = self.handle_outliers(df)
+        tuned_profile = self.load_tuned_profile(category)
+        fingerprint = compute_fingerprint(
+            df, ['y'], settings={
+                "log_transform": USE_LOG_TRANSFORM,
+                "outlier_handling": OUTLIER_HANDLING,
+                "tuned_profile": (tuned_profile or {}).get("tuned_at"),
+                "engine": CATEGORY_ENGINE,
+            }
+        )
+        if SKIP_UNCHANGED_RETRAIN and self._model_exists(category):
+            metadata = self._load_metadata(category)
+            if fingerprint_matches(metadata, fingerprint):
+                logger.info(f"Category '{category}' data unchanged, skipping")
+                return {"status": "skipped", "reason": "data_unchanged", **metadata}
         
-        # Log transform if configured
-        use_log = USE_LOG_TRANSFORM and df['y'].min() > 0
-        if use_log:
-            df['y_original'] = df['y'].copy()
-            df['y'] = np.log1p(df['y'])
+        # Short or intermittent series get a lightweight NumPy engine instead of Prophet
+        engine_name, engine_reason = select_engine(df)
+        logger.info(f"Category '{category}': engine={engine_name} ({engine_reason})")
+        if engine_name != "prophet":
+            return self._train_fallback_model(category, df, engine_name, engine_reason, fingerprint)
         
-        # Select parameters based on data length
-        params = PROPHET_PARAMS_SHORT if len(df) < 60 else PROPHET_PARAMS_MEDIUM
+        # Prepare data
+        df, train_df, regressors, use_log = self._prepare_training_frame(df)
+        
+        # Select parameters based on data length (a tuned profile overrides them)
+        params = dict(self._base_params(len(df)))
+        if tuned_profile:
+            params.update(tuned_profile["prophet_params"])
+            logger.info(f"Category '{category}': using tuned profile from {tuned_profile.get('tuned_at')}")
         
         # Train Prophet model
         model = Prophet(**params)
         
         # Add regressors
-        regressors = ['is_weekend', 'is_month_start', 'is_month_end']
-        if 'lag_7' in df.columns:
-            regressors.extend(['lag_7', 'rolling_mean_7'])
-        
-        for reg in regressors:
-            if reg in df.columns:
-                model.add_regressor(reg)
+        for reg in train_df.columns[2:]:
+            model.add_regressor(reg)
         
-        train_df = df[['ds', 'y'] + [r for r in regressors if r in df.columns]]
-        model.fit(train_df)
+        previous_model, previous_meta = None, {}
+        if WARM_START_ENABLED and self._model_exists(category):
+            try:
+                previous_model, previous_meta = self._load_model(category)
+            except Exception as e:
+                logger.warning(f"Could not load previous model for '{category}': {e}")
+        fit_stats = fit_prophet(model, train_df, previous_model, previous_meta.get("fit_stats"))
         
-        # Calculate accuracy
-        forecast = model.predict(train_df)
+        # Calculate accuracy (point forecast only, no uncertainty sampling)
+        fitted = predictor.predict_point(model, train_df)
+        interval_residuals = residual_interval(train_df['y'].values, fitted)
         
         if use_log:
-            actual = np.expm1(df['y_original'].values if 'y_original' in df.columns else df['y'].values)
-            predicted = np.expm1(forecast['yhat'].values)
+            actual = df['y_original'].values
+            predicted = np.expm1(fitted)
         else:
             actual = df['y'].values
-            predicted = forecast['yhat'].values
+            predicted = fitted
         
         # Ensure both are numpy arrays
         actual = np.array(actual, dtype=float)
@@ -240,33 +403,223 @@ class CategoryTrainer:
             "y_std": float(df['y'].std()),
             "log_transform": bool(use_log),
             "regressors": regressors,
-            "trained_at": get_current_date_wib().isoformat()
+            "interval_residuals": interval_residuals,
+            "fit_stats": fit_stats,
+            "data_fingerprint": fingerprint,
+            "engine": "prophet",
+            "engine_reason": engine_reason,
+            **series_profile(df['y_original'].values if use_log else df['y'].values),
+            "tuned_profile": (
+                {key: tuned_profile.get(key) for key in ("score", "baseline_score", "tuned_at")}
+                if tuned_profile else None
+            ),
+            "trained_at": get_current_date_wib().isoformat(),
+            "accuracy_source": "in_sample"
             # Note: params removed as they contain non-JSON serializable values
         }
         
+        # Out-of-sample accuracy from a rolling-origin backtest
+        if BACKTEST_ENABLED:
+            spec = {"prophet_params": params, "regressors": [[reg, None] for reg in train_df.columns[2:]]}
+            try:
+                backtest = run_backtest(
+                    spec, train_df, np.asarray(actual, dtype=float), use_log,
+                    init_model=model, workers=self.backtest_workers, min_train=28,
+                    history_features=category_history_features
+                )
+            except Exception as e:
+                logger.error(f"Backtest failed for category '{category}': {e}", exc_info=True)
+                backtest = None
+            if backtest and backtest["mape"] is not None:
+                metadata["backtest"] = backtest
+                metadata["in_sample_mape"] = metadata["mape"]
+                metadata["mape"] = backtest["mape"]
+                metadata["accuracy"] = float(round(max(0, 100 - backtest["mape"]), 2))
+                metadata["accuracy_source"] = "backtest"
+        
         # Save model
         self._save_model(category, model, metadata)
         
-        logger.info(f"Category '{category}' trained: accuracy={accuracy:.1f}%, MAPE={mape:.1f}%")
+        try:
+            store_model_metrics(self.engine, "category", category, metadata, params)
+        except Exception as e:
+            logger.warning(f"Failed to record model metrics for category '{category}': {e}")
+        
+        logger.info(f"Category '{category}' trained: accuracy={metadata['accuracy']:.1f}% ({metadata['accuracy_source']}), MAPE={metadata['mape']:.1f}%")
+        
+        return {"status": "success", **metadata}
+    
+    def _train_fallback_model(
+        self,
+        category: str,
+        df: pd.DataFrame,
+        engine_name: str,
+        engine_reason: str,
+        fingerprint: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Fit a fallback engine (see fallback_engines.py) on the series from its
+        first sale onwards. Engines work on the original scale, without regressors.
+        """
+        start = time.perf_counter()
+        profile = series_profile(df['y'].values)
+        history = self.handle_outliers(trim_leading_zeros(df)[['ds', 'y']].copy())
+        y = history['y'].to_numpy(dtype=float)
+        
+        model = create_engine(engine_name).fit(history['ds'], y)
+        fitted = predictor.predict_point(model, history)
+        
+        mask = y > 0
+        mape = float(np.mean(np.abs((y[mask] - fitted[mask]) / y[mask])) * 100) if mask.any() else 0.0
+        
+        metadata = {
+            "category": category,
+            "data_points": int(len(history)),
+            "accuracy": float(round(max(0, 100 - mape), 2)),
+            "mape": float(round(mape, 2)),
+            "y_mean": float(y.mean()),
+            "y_std": float(y.std(ddof=1)) if len(y) > 1 else 0.0,
+            "log_transform": False,
+            "regressors": [],
+            "interval_residuals": residual_interval(y, fitted),
+            "fit_stats": {"mode": "fallback", "fit_seconds": round(time.perf_counter() - start, 4)},
+            "data_fingerprint": fingerprint,
+            "engine": engine_name,
+            "engine_reason": engine_reason,
+            "engine_params": model.params(),
+            **profile,
+            "trained_at": get_current_date_wib().isoformat(),
+            "accuracy_source": "in_sample"
+        }
+        
+        if BACKTEST_ENABLED:
+            try:
+                backtest = run_backtest({"engine": engine_name}, history, y, False, workers=1, min_train=14)
+            except Exception as e:
+                logger.error(f"Backtest failed for category '{category}': {e}", exc_info=True)
+                backtest = None
+            if backtest and backtest["mape"] is not None:
+                metadata["backtest"] = backtest
+                metadata["in_sample_mape"] = metadata["mape"]
+                metadata["mape"] = backtest["mape"]
+                metadata["accuracy"] = float(round(max(0, 100 - backtest["mape"]), 2))
+                metadata["accuracy_source"] = "backtest"
+        
+        self._save_model(category, model, metadata)
+        
+        try:
+            store_model_metrics(self.engine, "category", category, metadata, {"engine": engine_name, **model.params()})
+        except Exception as e:
+            logger.warning(f"Failed to record model metrics for category '{category}': {e}")
+        
+        logger.info(f"Category '{category}' trained with {engine_name}: accuracy={metadata['accuracy']:.1f}% ({metadata['accuracy_source']}), MAPE={metadata['mape']:.1f}%")
         
         return {"status": "success", **metadata}
     
+    def _prepare_training_frame(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, List[str], bool]:
+        """
+        Features, outlier clipping and log transform.
+        
+        Returns:
+            (df, train_df, regressors, use_log) - train_df holds ds, y (model
+            space) and the regressors present in the data
+        """
+        df = self.add_features(df)
+        df = self.handle_outliers(df)
+        
+        # Log transform if configured
+        use_log = USE_LOG_TRANSFORM and df['y'].min() > 0
+        if USE_LOG_TRANSFORM and not use_log:
+            logger.info("Series has zero days, training without log transform")
+        if use_log:
+            df['y_original'] = df['y'].copy()
+            df['y'] = np.log1p(df['y'])
+        
+        regressors = ['is_weekend', 'is_month_start', 'is_month_end']
+        if 'lag_7' in df.columns:
+            regressors.extend(['lag_7', 'rolling_mean_7'])
+        
+        train_df = df[['ds', 'y'] + [r for r in regressors if r in df.columns]]
+        return df, train_df, regressors, use_log
+    
+    def _base_params(self, data_length: int) -> Dict[str, Any]:
+        return PROPHET_PARAMS_SHORT if data_length < 60 else PROPHET_PARAMS_MEDIUM
+    
+    def tune_category(
+        self,
+        category: str,
+        end_date: Optional[date] = None,
+        **search_options
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Search Prophet hyperparameters for a category and save the winning
+        profile; the next train_category_model run picks it up.
+        
+        Args:
+            search_options: Passed to tuning.tune_profile (max_trials, budget_seconds, ...)
+        """
+        df = self.fetch_category_data(category, end_date)
+        if len(df) < 14:
+            logger.warning(f"Insufficient data to tune category '{category}': {len(df)} days")
+            return None
+        
+        df, train_df, _, use_log = self._prepare_training_frame(df)
+        actual = df['y_original'].values if use_log else df['y'].values
+        
+        profile = tune_profile(
+            dict(self._base_params(len(df))),
+            [[reg, None] for reg in train_df.columns[2:]],
+            train_df, np.asarray(actual, dtype=float), use_log,
+            min_train=28, history_features=category_history_features, **search_options
+        )
+        if profile:
+            save_profile(str(self._tuned_profile_path(category)), profile)
+            logger.info(f"Saved tuned profile for category '{category}': {profile['prophet_params']}")
+        return profile
+    
+    def load_tuned_profile(self, category: str) -> Optional[Dict[str, Any]]:
+        return load_profile(str(self._tuned_profile_path(category)))
+    
+    def _tuned_profile_path(self, category: str) -> Path:
+        safe_name = category.replace(' ', '_').replace('/', '_')
+        return self.model_dir / f"{safe_name}_tuned.json"
+    
     def train_all_categories(
         self,
         end_date: Optional[date] = None,
-        force_retrain: bool = False
+        force_retrain: bool = False,
+        workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None
     ) -> Dict[str, Any]:
-        """Train models for all categories."""
+        """
+        Train models for all categories.
+        
+        With workers > 1 each category is fitted in a separate process
+        (failures and timeouts stay isolated per category).
+        
+        Args:
+            on_progress: Optional callback (categories_done, total) invoked
+                after each category finishes
+        """
         categories = self.get_categories()
-        results = {}
+        self.registry.set_targets("category", categories)
+        workers = CATEGORY_TRAIN_WORKERS if workers is None else workers
+        timeout = CATEGORY_TRAIN_TIMEOUT_SECONDS if timeout is None else timeout
         
-        for category in categories:
-            try:
-                result = self.train_category_model(category, end_date, force_retrain)
-                results[category] = result
-            except Exception as e:
-                logger.error(f"Error training category '{category}': {e}")
-                results[category] = {"status": "error", "error": str(e)}
+        start = time.perf_counter()
+        category_data = self.fetch_all_category_data(categories, end_date) or {}
+        if workers > 1 and len(categories) > 1:
+            mode = "process"
+            results, timings = self._train_parallel(
+                categories, end_date, force_retrain, workers, timeout, category_data, on_progress
+            )
+        else:
+            mode = "sequential"
+            results, timings = self._train_sequential(
+                categories, end_date, force_retrain, category_data, on_progress
+            )
+        wall_clock = time.perf_counter() - start
         
         # Summary
         success_count = sum(1 for r in results.values() if r.get("status") == "success")
@@ -276,24 +629,109 @@ class CategoryTrainer:
             if r.get("status") == "success"
         ]) if success_count > 0 else 0
         
+        logger.info(f"Trained {success_count}/{len(categories)} categories in {wall_clock:.1f}s ({mode})")
+        
         return {
             "status": "success",
             "categories_trained": success_count,
             "total_categories": len(categories),
             "average_accuracy": round(avg_accuracy, 2),
-            "details": results
+            "details": results,
+            "mode": mode,
+            "wall_clock_seconds": round(wall_clock, 3),
+            "timings": timings
         }
     
+    def _train_sequential(
+        self,
+        categories: List[str],
+        end_date: Optional[date],
+        force_retrain: bool,
+        category_data: Dict[str, pd.DataFrame],
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Train categories one at a time in this process."""
+        results = {}
+        timings = {}
+        
+        for category in categories:
+            start = time.perf_counter()
+            try:
+                result = self.train_category_model(
+                    category, end_date, force_retrain, category_data.get(category)
+                )
+                results[category] = result
+            except Exception as e:
+                logger.error(f"Error training category '{category}': {e}")
+                results[category] = {"status": "error", "error": str(e)}
+            timings[category] = round(time.perf_counter() - start, 3)
+            if on_progress is not None:
+                on_progress(len(results), len(categories))
+        
+        return results, timings
+    
+    def _train_parallel(
+        self,
+        categories: List[str],
+        end_date: Optional[date],
+        force_retrain: bool,
+        workers: int,
+        timeout: float,
+        category_data: Dict[str, pd.DataFrame],
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Train categories in a process pool (spawned, safe to use from threads)."""
+        database_url = self.engine.url.render_as_string(hide_password=False)
+        results = {}
+        timings = {}
+        
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(categories)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(database_url, str(self.model_dir), self.registry.db_path)
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _train_category_in_worker, category, end_date, force_retrain,
+                    timeout, category_data.get(category)
+                ): category
+                for category in categories
+            }
+            for future in as_completed(futures):
+                category = futures[future]
+                try:
+                    results[category], timings[category] = future.result()
+                    if ("category", category) in self.cache.keys("category"):
+                        # Published by the worker; swap it into this process's cache
+                        self.refresh_cached_model(category)
+                except Exception as e:
+                    # Worker process died (e.g. killed by the OOM killer)
+                    logger.error(f"Worker failed for category '{category}': {e}")
+                    results[category] = {"status": "error", "error": str(e)}
+                    timings[category] = None
+                if on_progress is not None:
+                    on_progress(len(results), len(categories))
+        
+        # Keep the same ordering as get_categories()
+        return (
+            {category: results[category] for category in categories},
+            {category: timings[category] for category in categories}
+        )
+    
     def predict_category(
         self,
         category: str,
         periods: int = 30,
-        events: Optional[List[Dict]] = None
+        events: Optional[List[Dict]] = None,
+        interval_mode: Optional[str] = None
     ) -> pd.DataFrame:
         """
         Generate predictions for a category.
         
-        Returns DataFrame with ds, yhat, yhat_lower, yhat_upper.
+        Returns DataFrame with ds, yhat, yhat_lower, yhat_upper; the interval
+        mode actually used is in attrs["interval_mode"] (see
+        Predictor.effective_interval_mode).
         """
         model, metadata = self._load_model(category)
         
@@ -317,18 +755,12 @@ class CategoryTrainer:
             future_df['lag_7'] = y_mean
             future_df['rolling_mean_7'] = y_mean
         
-        # Apply events if provided
-        if events:
-            for event in events:
-                event_date = pd.to_datetime(event.get('date'))
-                mask = future_df['ds'].dt.date == event_date.date()
-                if mask.any():
-                    impact = event.get('impact', 0.3)
-                    # Adjust predictions based on event type
-                    # (We'll handle this in the aggregation step)
+        # Event regressor columns, shared with the store predictor; category
+        # models are trained without them, so only models that have them use them
+        predictor._apply_events_to_dataframe(future_df, events or [])
         
         # Predict
-        forecast = model.predict(future_df)
+        forecast = predictor.forecast_with_intervals(model, future_df, metadata, interval_mode)
         
         # Inverse log transform if used
         if metadata.get('log_transform', False):
@@ -336,12 +768,21 @@ class CategoryTrainer:
             forecast['yhat_lower'] = np.expm1(forecast['yhat_lower'])
             forecast['yhat_upper'] = np.expm1(forecast['yhat_upper'])
         
-        return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+        # No category sales on days the store is closed
+        if 'closure_intensity' not in metadata.get('regressors', []):
+            open_days = 1.0 - future_df['closure_intensity'].to_numpy()
+            for column in ('yhat', 'yhat_lower', 'yhat_upper'):
+                forecast[column] = forecast[column] * open_days
+        
+        forecast = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+        forecast.attrs["interval_mode"] = predictor.effective_interval_mode(model, interval_mode)
+        return forecast
     
     def predict_all_categories(
         self,
         periods: int = 30,
-        events: Optional[List[Dict]] = None
+        events: Optional[List[Dict]] = None,
+        interval_mode: Optional[str] = None
     ) -> Dict[str, pd.DataFrame]:
         """Generate predictions for all categories."""
         categories = self.get_categories()
@@ -349,7 +790,7 @@ class CategoryTrainer:
         
         for category in categories:
             try:
-                forecast = self.predict_category(category, periods, events)
+                forecast = self.predict_category(category, periods, events, interval_mode)
                 if not forecast.empty:
                     predictions[category] = forecast
             except Exception as e:
@@ -357,43 +798,175 @@ class CategoryTrainer:
         
         return predictions
     
-    def _save_model(self, category: str, model: Prophet, metadata: Dict):
-        """Save model and metadata to disk."""
-        safe_name = category.replace(' ', '_').replace('/', '_')
-        model_path = self.model_dir / f"{safe_name}_model.pkl"
-        meta_path = self.model_dir / f"{safe_name}_metadata.json"
+    def _save_model(self, category: str, model: Any, metadata: Dict):
+        """
+        Publish model and metadata as one bundle ({name}_model.npz, see
+        model_artifact.py) with an atomic rename, then swap it into the cache.
+        
+        The bundle holds fallback engines and (with MODEL_ARTIFACT_FORMAT=
+        compact) Prophet models in compact form; Prophet models the NumPy
+        engine cannot evaluate are bundled as full JSON. {name}_metadata.json
+        is a copy of the metadata for tooling ({name}_model.json a full JSON
+        dump with MODEL_DEBUG_JSON). Pre-bundle artifacts are removed.
+        """
+        compact_path, json_path, pickle_path = self._artifact_paths(category)
+        meta_path = self._metadata_path(category)
+        metadata.setdefault("model_version", get_current_time_wib().strftime("%Y%m%d_%H%M%S"))
+        
+        bundled = model
+        if isinstance(model, Prophet) and MODEL_ARTIFACT_FORMAT == "compact":
+            try:
+                bundled = FastForecastEngine.from_prophet(model)
+            except UnsupportedModelError as e:
+                logger.warning(f"Compact artifact unavailable for category '{category}', bundling full JSON: {e}")
+        
+        save_model_bundle(str(compact_path), bundled, metadata)
+        atomic_write_json(str(meta_path), metadata, indent=2, default=str)
         
-        with open(model_path, 'wb') as f:
-            pickle.dump(model, f)
+        write_json = isinstance(model, Prophet) and MODEL_DEBUG_JSON
+        if write_json:
+            body = model_to_json(model).encode("utf-8")
+            atomic_write(str(json_path), lambda f: f.write(body))
         
-        with open(meta_path, 'w') as f:
-            json.dump(metadata, f, indent=2, default=str)
+        for path in [pickle_path] + ([] if write_json else [json_path]):
+            if path.exists():
+                path.unlink()
         
+        self.registry.publish(
+            "category", category, metadata["model_version"], str(compact_path), str(meta_path), metadata
+        )
+        self.refresh_cached_model(category)
         logger.info(f"Saved model for category '{category}'")
     
-    def _load_model(self, category: str) -> Tuple[Optional[Prophet], Dict]:
-        """Load model and metadata from disk."""
-        safe_name = category.replace(' ', '_').replace('/', '_')
-        model_path = self.model_dir / f"{safe_name}_model.pkl"
-        meta_path = self.model_dir / f"{safe_name}_metadata.json"
+    def _load_model(self, category: str) -> Tuple[Optional[Union[Prophet, CompactModel]], Dict]:
+        """
+        Load model and metadata (served from the shared in-memory cache when fresh).
         
-        if not model_path.exists():
-            return None, {}
+        Returns the model of the bundle (a compact model, or a Prophet model
+        for full-JSON bundles), or the Prophet model of a pre-bundle JSON
+        artifact. Pickles from earlier versions are never loaded here;
+        convert them offline with migrate_category_pickles.py.
+        """
+        # Warm path: lock-free cache lookup, no filesystem access until the
+        # entry is due for revalidation
+        cache_key = ("category", category)
+        cached = self.cache.get(cache_key, lambda: self._artifact_signature(category))
+        if cached is not None:
+            return cached
         
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
+        model_path = self._current_model_path(category)
+        if model_path.suffix == ".pkl":
+            logger.error(f"Category '{category}' only has a legacy pickle model, run migrate_category_pickles.py or retrain it")
+            return None, {}
+        loaded = self._read_model(category)
+        if loaded is None:
+            return None, {}
+        model, metadata, signature = loaded
         
-        metadata = {}
-        if meta_path.exists():
-            with open(meta_path, 'r') as f:
-                metadata = json.load(f)
+        if self._artifact_signature(category) == signature:
+            self.cache.put(cache_key, model, metadata, signature, sum(size or 0 for size in signature[2::2]))
         
         return model, metadata
     
+    def refresh_cached_model(self, category: str):
+        """Swap the published version of a category model into the cache"""
+        cache_key = ("category", category)
+        loaded = self._read_model(category)
+        if loaded is None:
+            self.cache.invalidate(cache_key)
+            return
+        model, metadata, signature = loaded
+        self.cache.put(cache_key, model, metadata, signature, sum(size or 0 for size in signature[2::2]))
+    
+    def refresh_cached_models(self):
+        """refresh_cached_model() for every cached category (after models were published by another process)"""
+        for _, category in self.cache.keys("category"):
+            self.refresh_cached_model(category)
+    
+    def _read_model(self, category: str) -> Optional[Tuple[Union[Prophet, CompactModel], Dict, Tuple]]:
+        """(model, metadata, signature) of a bundle or JSON artifact on disk, None if there is none"""
+        model_path = self._current_model_path(category)
+        if not model_path.exists() or model_path.suffix == ".pkl":
+            return None
+        signature = self._artifact_signature(category)
+        
+        metadata = None
+        if model_path.suffix == ".npz":
+            model, metadata, _ = load_model_bundle(str(model_path))
+        else:
+            with open(model_path, 'r') as f:
+                model = model_from_json(f.read())
+        if metadata is None:
+            # Saved before metadata was bundled with the model
+            metadata = self._load_metadata(category)
+        
+        return model, metadata, signature
+    
+    def migrate_legacy_pickles(self) -> List[str]:
+        """
+        Re-save the models pickled by earlier versions ({name}_model.pkl) in
+        the current format. Unpickling runs arbitrary code, so this is an
+        explicit offline step (migrate_category_pickles.py) for trusted
+        model directories; serving never loads pickles.
+        
+        Returns:
+            Converted categories
+        """
+        converted = []
+        for pickle_path in sorted(self.model_dir.glob("*_model.pkl")):
+            safe_name = pickle_path.name[:-len("_model.pkl")]
+            metadata = {}
+            meta_path = self.model_dir / f"{safe_name}_metadata.json"
+            if meta_path.exists():
+                with open(meta_path, 'r') as f:
+                    metadata = json.load(f)
+            category = metadata.get("category", safe_name)
+            if self._current_model_path(category) != pickle_path:
+                logger.info(f"Category '{category}' already has a current artifact, skipping {pickle_path.name}")
+                continue
+            
+            with open(pickle_path, 'rb') as f:
+                model = pickle.load(f)
+            self._save_model(category, model, metadata)
+            logger.info(f"Converted legacy pickle model for category '{category}'")
+            converted.append(category)
+        return converted
+    
+    def _artifact_paths(self, category: str) -> Tuple[Path, Path, Path]:
+        """(compact .npz, full .json, legacy .pkl) model paths of a category"""
+        safe_name = category.replace(' ', '_').replace('/', '_')
+        return tuple(self.model_dir / f"{safe_name}_model{suffix}" for suffix in (".npz", ".json", ".pkl"))
+    
+    def _current_model_path(self, category: str) -> Path:
+        """First existing artifact in format preference order (the .npz path if none exists)"""
+        paths = self._artifact_paths(category)
+        return next((path for path in paths if path.exists()), paths[0])
+    
+    def _metadata_path(self, category: str) -> Path:
+        safe_name = category.replace(' ', '_').replace('/', '_')
+        return self.model_dir / f"{safe_name}_metadata.json"
+    
+    def _artifact_signature(self, category: str) -> Tuple:
+        """
+        (path, mtime, size) of the served artifact, used for cache
+        invalidation; a pre-bundle artifact adds its metadata file
+        """
+        def _stat(path: Path) -> Tuple[Optional[int], Optional[int]]:
+            try:
+                st = path.stat()
+                return st.st_mtime_ns, st.st_size
+            except OSError:
+                return None, None
+        
+        model_path = self._current_model_path(category)
+        signature = (str(model_path), *_stat(model_path))
+        if model_path.suffix != ".npz":
+            signature += _stat(self._metadata_path(category))
+        return signature
+    
     def _load_metadata(self, category: str) -> Dict:
         """Load only metadata for a category."""
-        safe_name = category.replace(' ', '_').replace('/', '_')
-        meta_path = self.model_dir / f"{safe_name}_metadata.json"
+        meta_path = self._metadata_path(category)
         
         if meta_path.exists():
             with open(meta_path, 'r') as f:
@@ -401,10 +974,12 @@ class CategoryTrainer:
         return {}
     
     def _model_exists(self, category: str) -> bool:
-        """Check if model exists for category."""
-        safe_name = category.replace(' ', '_').replace('/', '_')
-        model_path = self.model_dir / f"{safe_name}_model.pkl"
-        return model_path.exists()
+        """
+        Check if a servable model exists for category (a legacy pickle is
+        never loaded, so it counts as no model and the category is retrained)
+        """
+        model_path = self._current_model_path(category)
+        return model_path.exists() and model_path.suffix != ".pkl"
     
     def _model_age_days(self, metadata: Dict) -> int:
         """Get model age in days."""
@@ -415,20 +990,54 @@ class CategoryTrainer:
         return (get_current_date_wib() - trained_date).days
     
     def get_all_model_status(self) -> Dict[str, Any]:
-        """Get status of all category models."""
-        categories = self.get_categories()
+        """
+        Get status of all category models (from the model registry).
+        
+        Categories without a model are the ones recorded by the last
+        train_all_categories run; the database is only queried if none were.
+        """
+        entries = {entry["target_id"]: entry for entry in self.registry.list_current("category")}
+        categories = self.registry.targets("category")
+        if not categories:
+            categories = self.get_categories()
+            self.registry.set_targets("category", categories)
         status = {}
         
-        for category in categories:
-            if self._model_exists(category):
-                metadata = self._load_metadata(category)
+        for category in sorted(set(categories) | set(entries)):
+            entry = entries.get(category)
+            if entry is not None:
+                summary = entry["summary"]
                 status[category] = {
                     "exists": True,
-                    "accuracy": metadata.get("accuracy"),
-                    "trained_at": metadata.get("trained_at"),
-                    "age_days": self._model_age_days(metadata)
+                    "accuracy": summary.get("accuracy"),
+                    "engine": summary.get("engine", "prophet"),
+                    "trained_at": summary.get("trained_at"),
+                    "age_days": self._model_age_days(summary),
+                    "model_version": entry["version"],
+                    "size_bytes": entry["size_bytes"]
                 }
             else:
                 status[category] = {"exists": False}
         
         return status
+    
+    def _backfill_registry(self):
+        """Index models saved before the registry existed (runs once, on an empty registry)"""
+        indexed = 0
+        for meta_path in sorted(self.model_dir.glob("*_metadata.json")):
+            try:
+                with open(meta_path, 'r') as f:
+                    metadata = json.load(f)
+                category = metadata["category"]
+            except Exception as e:
+                logger.warning(f"Not indexing {meta_path.name}: {e}")
+                continue
+            if not self._model_exists(category):
+                continue
+            model_path = self._current_model_path(category)
+            version = metadata.get("model_version") or file_version(str(model_path))
+            self.registry.publish("category", category, version, str(model_path), str(meta_path), metadata)
+            indexed += 1
+        
+        if indexed:
+            logger.info(f"Indexed {indexed} existing category model(s) in the model registry")
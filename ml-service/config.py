@@ -34,9 +34,134 @@ MIN_ACCURACY_THRESHOLD = 82.0
 RETRAIN_ON_ACCURACY_DROP = True
 
 # Model Configuration
+MODEL_DIR = os.getenv("MODEL_DIR", "/app/models")
 MAX_MODEL_AGE_DAYS = 7
 KEEP_MODEL_HISTORY = 5
 
+# Store/category model format inside the .npz bundle (see model_artifact.py)
+# - "compact": fitted parameters only, NumPy-packed; served by the NumPy
+#   engine, "sampled" intervals fall back to "analytic"
+# - "json": full Prophet model_to_json (training history included); fallback
+#   engines are always saved compact
+MODEL_ARTIFACT_FORMAT = os.getenv("MODEL_ARTIFACT_FORMAT", "compact")
+MODEL_ARTIFACT_COMPRESS = os.getenv("MODEL_ARTIFACT_COMPRESS", "false").lower() == "true"
+# Also write the full JSON next to a compact artifact (debugging only, never served)
+MODEL_DEBUG_JSON = os.getenv("MODEL_DEBUG_JSON", "false").lower() == "true"
+
+# In-memory model cache (deserialized Prophet models + metadata)
+MODEL_CACHE_ENABLED = os.getenv("MODEL_CACHE_ENABLED", "true").lower() == "true"
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", "32"))
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Re-stat a cached model's artifact files at most this often (saves by this
+# process swap the cached model immediately; this only bounds how long a model written
+# by another process can be served stale). 0 = check on every lookup.
+MODEL_CACHE_REVALIDATE_SECONDS = float(os.getenv("MODEL_CACHE_REVALIDATE_SECONDS", "5"))
+
+# Serving engine: evaluate yhat with precomputed NumPy parameters instead of
+# Prophet.predict (falls back to Prophet for unsupported model layouts)
+FAST_ENGINE_ENABLED = os.getenv("FAST_ENGINE_ENABLED", "true").lower() == "true"
+
+# Prediction intervals
+# - "none": yhat only (yhat_lower = yhat_upper = yhat), no sampling
+# - "analytic": residual quantiles computed at train time (stored in metadata)
+# - "sampled": Prophet Monte Carlo simulation with INTERVAL_SAMPLES trend paths
+INTERVAL_MODE = os.getenv("INTERVAL_MODE", "analytic")
+INTERVAL_SAMPLES = int(os.getenv("INTERVAL_SAMPLES", "200"))
+INTERVAL_WIDTH = 0.8  # Same as Prophet's default interval_width
+
+# Forecast result cache (in front of predictor.predict_with_events)
+FORECAST_CACHE_ENABLED = os.getenv("FORECAST_CACHE_ENABLED", "true").lower() == "true"
+FORECAST_CACHE_TTL_SECONDS = int(os.getenv("FORECAST_CACHE_TTL_SECONDS", "900"))
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", "512"))
+
+# /ml/predict/batch: maximum number of items per request
+PREDICT_BATCH_MAX_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", "100"))
+
+# Materialized forecasts: after each training run, precompute a default horizon
+# (with known calendar_events) into sales_forecasts; event-less /ml/predict
+# requests are served straight from that table
+FORECAST_MATERIALIZE_ENABLED = os.getenv("FORECAST_MATERIALIZE_ENABLED", "true").lower() == "true"
+FORECAST_MATERIALIZE_DAYS = int(os.getenv("FORECAST_MATERIALIZE_DAYS", "90"))
+
+# Category training: process pool size (<= 1 = sequential) and per-category
+# timeout (budget of a category's Stan fits, their CmdStan process is terminated)
+CATEGORY_TRAIN_WORKERS = int(os.getenv("CATEGORY_TRAIN_WORKERS", str(min(4, os.cpu_count() or 1))))
+CATEGORY_TRAIN_TIMEOUT_SECONDS = int(os.getenv("CATEGORY_TRAIN_TIMEOUT_SECONDS", "600"))
+
+# Startup: main.py imports no Prophet/pandas so /health is live immediately;
+# a background warm-up loads the trainer, predictor and Stan backend and
+# /ready turns 200 when it is done (disabled = load on first request)
+STARTUP_WARMUP_ENABLED = os.getenv("STARTUP_WARMUP_ENABLED", "true").lower() == "true"
+
+# Prewarm (last warm-up step): load up to PREWARM_MAX_MODELS store/category
+# models into the model cache, most recently requested first (request times
+# persisted in model_dir), and run one small prediction per model
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+PREWARM_MAX_MODELS = int(os.getenv("PREWARM_MAX_MODELS", str(MODEL_CACHE_MAX_ENTRIES)))
+PREWARM_PERIODS = 7
+
+# Training job queue (SQLite file under model_dir)
+TRAIN_JOB_WORKERS = int(os.getenv("TRAIN_JOB_WORKERS", "1"))
+TRAIN_JOB_MAX_ATTEMPTS = int(os.getenv("TRAIN_JOB_MAX_ATTEMPTS", "3"))
+TRAIN_JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("TRAIN_JOB_RETRY_BACKOFF_SECONDS", "30"))
+TRAIN_JOB_POLL_SECONDS = 1.0
+
+# Training isolation: each job runs in a spawned child process (own process
+# group) with a wall-clock timeout, an address-space cap (RLIMIT_AS, applied
+# per process, 0 = no cap), a nice level, and at most TRAIN_MAX_CONCURRENT_FITS
+# children at a time
+TRAIN_ISOLATED = os.getenv("TRAIN_ISOLATED", "true").lower() == "true"
+TRAIN_JOB_TIMEOUT_SECONDS = int(os.getenv("TRAIN_JOB_TIMEOUT_SECONDS", "1800"))
+TRAIN_MEMORY_LIMIT_MB = int(os.getenv("TRAIN_MEMORY_LIMIT_MB", "4096"))
+TRAIN_NICE = int(os.getenv("TRAIN_NICE", "10"))
+TRAIN_MAX_CONCURRENT_FITS = int(os.getenv("TRAIN_MAX_CONCURRENT_FITS", "1"))
+
+# Warm-start refits: initialise Stan's optimizer from the previous model's
+# fitted params when the regressor set and changepoint layout still match
+WARM_START_ENABLED = os.getenv("WARM_START_ENABLED", "true").lower() == "true"
+
+# Skip retraining (even forced) when the training frame's fingerprint matches
+# the one stored with the current model
+SKIP_UNCHANGED_RETRAIN = os.getenv("SKIP_UNCHANGED_RETRAIN", "true").lower() == "true"
+
+# Local Parquet cache of daily_sales_summary: each training run only fetches
+# rows after the cached range plus a re-fetch window for late corrections
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() == "true"
+SUMMARY_CACHE_REFETCH_DAYS = int(os.getenv("SUMMARY_CACHE_REFETCH_DAYS", "3"))
+
+# Rolling-origin backtest: refit on expanding windows ending `step` days apart,
+# forecast `horizon` days after each cutoff; folds run in a process pool
+BACKTEST_ENABLED = os.getenv("BACKTEST_ENABLED", "true").lower() == "true"
+BACKTEST_HORIZON = int(os.getenv("BACKTEST_HORIZON", "14"))
+BACKTEST_STEP = int(os.getenv("BACKTEST_STEP", "7"))
+BACKTEST_FOLDS = int(os.getenv("BACKTEST_FOLDS", "4"))
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Hyperparameter tuning (offline, via /ml/tune): trials are backtests of
+# candidate profiles run in parallel under a wall-clock budget; the search
+# stops after TUNING_PATIENCE trials without improvement and a trial is
+# pruned once its running MAPE exceeds TUNING_PRUNE_RATIO x the best score
+TUNING_MAX_TRIALS = int(os.getenv("TUNING_MAX_TRIALS", "24"))
+TUNING_BUDGET_SECONDS = int(os.getenv("TUNING_BUDGET_SECONDS", "300"))
+TUNING_PATIENCE = int(os.getenv("TUNING_PATIENCE", "8"))
+TUNING_PRUNE_RATIO = float(os.getenv("TUNING_PRUNE_RATIO", "1.5"))
+TUNING_WORKERS = int(os.getenv("TUNING_WORKERS", str(min(4, os.cpu_count() or 1))))
+TUNING_SEARCH_SPACE = {
+    "changepoint_prior_scale": [0.005, 0.01, 0.02, 0.05, 0.1, 0.2],
+    "seasonality_prior_scale": [0.1, 1.0, 5.0, 10.0],
+    "seasonality_mode": ["additive", "multiplicative"],
+    "weekly_seasonality": [3, 5, 10],
+    "yearly_seasonality": [5, 8, 12],   # only searched when the base profile enables it
+}
+
+# Category forecasting engine: "auto" picks a lightweight NumPy engine
+# (fallback_engines.py) for short or intermittent series and Prophet otherwise;
+# any engine name forces that engine for every category
+CATEGORY_ENGINE = os.getenv("CATEGORY_ENGINE", "auto")  # auto | prophet | seasonal_naive | ets | ridge | croston_tsb
+FALLBACK_MIN_PROPHET_DAYS = int(os.getenv("FALLBACK_MIN_PROPHET_DAYS", "90"))   # history needed for Prophet
+FALLBACK_SHORT_SERIES_DAYS = int(os.getenv("FALLBACK_SHORT_SERIES_DAYS", "28"))  # below: seasonal-naive
+FALLBACK_INTERMITTENT_ZERO_RATIO = float(os.getenv("FALLBACK_INTERMITTENT_ZERO_RATIO", "0.5"))  # above: Croston/TSB
+
 # Event Calendar Configuration
 EVENT_CALENDAR_ENABLED = True
 EVENT_IMPACT_RANGE = (0.0, 2.0)
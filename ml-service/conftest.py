@@ -0,0 +1,35 @@
+"""
+Test environment: main.py needs DATABASE_URL at import and creates
+MODEL_DIR, so point both at throwaway locations before any module reads
+config. Tests that train or load models pass their own tmp_path.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+os.environ["MODEL_DIR"] = tempfile.mkdtemp(prefix="ml_service_tests_")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+@pytest.fixture
+def sqlite_trainer(tmp_path):
+    """ModelTrainer on an in-memory SQLite database with the forecast tables"""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import StaticPool
+    from model_trainer import ModelTrainer
+
+    # One shared connection, also used from TestClient's worker threads
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE calendar_events (date TEXT, type TEXT, impact_weight REAL)"))
+        conn.execute(text("""
+            CREATE TABLE sales_forecasts (
+                store_id TEXT, date TEXT, forecast REAL, lower_bound REAL, upper_bound REAL,
+                model_version TEXT, generated_at TEXT, PRIMARY KEY (store_id, date)
+            )
+        """))
+    return ModelTrainer(engine=engine, model_dir=str(tmp_path))
@@ -0,0 +1,50 @@
+"""
+Training Data Fingerprint
+
+Cheap content fingerprint of a training frame: row count, date range and
+a hash of the target and regressor columns, plus the preprocessing
+settings that change what gets fitted. Stored in model metadata so a
+retrain on identical data can return the current model without fitting.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+
+def compute_fingerprint(
+    df: pd.DataFrame,
+    value_columns: List[str],
+    settings: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Fingerprint a training frame.
+    
+    Args:
+        df: Frame with a 'ds' column
+        value_columns: Target/regressor columns to hash (missing ones are ignored)
+        settings: Pipeline settings that affect training (hashed along with the data)
+    
+    Returns:
+        {rows, start_date, end_date, hash}
+    """
+    columns = [col for col in value_columns if col in df.columns]
+    digest = hashlib.sha1()
+    digest.update(json.dumps([columns, settings or {}], sort_keys=True, default=str).encode("utf-8"))
+    if len(df):
+        digest.update(pd.util.hash_pandas_object(df[["ds"] + columns], index=False).values.tobytes())
+    
+    ds = pd.to_datetime(df["ds"]) if len(df) else None
+    return {
+        "rows": int(len(df)),
+        "start_date": ds.min().date().isoformat() if ds is not None else None,
+        "end_date": ds.max().date().isoformat() if ds is not None else None,
+        "hash": digest.hexdigest(),
+    }
+
+
+def fingerprint_matches(metadata: Optional[Dict[str, Any]], fingerprint: Dict[str, Any]) -> bool:
+    """True if the model metadata was trained on exactly this fingerprint"""
+    return bool(metadata) and metadata.get("data_fingerprint") == fingerprint
@@ -0,0 +1,373 @@
+"""
+Lightweight Fallback Forecast Engines
+
+Pure NumPy models for series where a Prophet/Stan fit is not worth it:
+short histories and intermittent (mostly-zero) demand. Each engine fits
+in milliseconds and exposes the same predict(ds, regressor_values)
+interface as fast_engine.FastForecastEngine, so Predictor serves them
+like any other model.
+
+- seasonal_naive: mean of the last few weeks per weekday
+- ets: additive Holt-Winters with damped trend and weekly season
+- ridge: ridge regression on trend, Fourier and calendar features
+- croston_tsb: Teunter-Syntetos-Babai (Croston variant) for intermittent demand
+
+All engines work on the original scale (no log transform) and derive their
+features from ds alone, so they take no external regressors.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    CATEGORY_ENGINE, FALLBACK_MIN_PROPHET_DAYS, FALLBACK_SHORT_SERIES_DAYS,
+    FALLBACK_INTERMITTENT_ZERO_RATIO
+)
+
+logger = logging.getLogger(__name__)
+
+PERIOD = 7
+HOLDOUT_DAYS = 7
+
+
+def _days(ds) -> np.ndarray:
+    """Days since epoch (int64) for an array-like of dates"""
+    return pd.to_datetime(pd.Series(ds)).to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+
+class FallbackEngine:
+    """
+    Base class: subclasses implement _fit and _forecast on day numbers.
+
+    Engines with a recursive state (ETS, TSB) keep their one-step-ahead
+    in-sample fit in fitted_, which predict returns for training dates.
+    """
+
+    name = ""
+    regressors: List[str] = []
+
+    def __init__(self):
+        self.first_day: Optional[int] = None
+        self.last_day: Optional[int] = None
+        self.fitted_: Optional[np.ndarray] = None
+
+    def fit(self, ds, y) -> "FallbackEngine":
+        days = _days(ds)
+        y = np.asarray(y, dtype=np.float64)
+        if len(y) == 0:
+            raise ValueError(f"{self.name}: empty training series")
+        self.first_day, self.last_day = int(days[0]), int(days[-1])
+        self._fit(days, y)
+        return self
+
+    def predict(self, ds, regressor_values: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Point forecast for the given dates (regressor_values is ignored).
+
+        Returns:
+            Dict with 'yhat'
+        """
+        days = _days(ds)
+        yhat = np.asarray(self._forecast(days), dtype=np.float64)
+
+        if self.fitted_ is not None:
+            in_sample = (days >= self.first_day) & (days <= self.last_day)
+            yhat[in_sample] = self.fitted_[days[in_sample] - self.first_day]
+
+        return {"yhat": yhat}
+
+    def params(self) -> Dict[str, Any]:
+        """Fitted hyperparameters (for metadata / ml_model_metrics)"""
+        return {}
+
+    def get_state(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """Fitted state as (JSON-serializable scalars, float arrays), for compact artifacts"""
+        scalars, arrays = {}, {}
+        for key, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                arrays[key] = value
+            else:
+                scalars[key] = value.item() if isinstance(value, np.generic) else value
+        return scalars, arrays
+
+    @classmethod
+    def from_state(cls, scalars: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> "FallbackEngine":
+        """Rebuild a fitted engine from get_state() output"""
+        engine = cls()
+        for key, value in {**scalars, **arrays}.items():
+            if not hasattr(engine, key):
+                raise ValueError(f"{cls.name}: unknown state field '{key}'")
+            setattr(engine, key, value)
+        return engine
+
+    def _fit(self, days: np.ndarray, y: np.ndarray):
+        raise NotImplementedError
+
+    def _forecast(self, days: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class SeasonalNaiveEngine(FallbackEngine):
+    """Per-weekday mean of the last `seasons` weeks"""
+
+    name = "seasonal_naive"
+
+    def __init__(self, seasons: int = 4):
+        super().__init__()
+        self.seasons = seasons
+        self.profile = np.zeros(PERIOD)
+
+    def _fit(self, days: np.ndarray, y: np.ndarray):
+        recent = slice(-self.seasons * PERIOD, None)
+        phases, values = days[recent] % PERIOD, y[recent]
+        counts = np.bincount(phases, minlength=PERIOD)
+        sums = np.bincount(phases, weights=values, minlength=PERIOD)
+        # Weekdays not seen yet (less than a week of data) get the overall mean
+        self.profile = np.where(counts > 0, sums / np.maximum(counts, 1), values.mean())
+
+    def _forecast(self, days: np.ndarray) -> np.ndarray:
+        return self.profile[days % PERIOD]
+
+    def params(self) -> Dict[str, Any]:
+        return {"seasons": self.seasons}
+
+
+def _holt_winters(
+    y: np.ndarray,
+    phases: np.ndarray,
+    alpha: float,
+    beta: float,
+    gamma: float,
+    phi: float
+) -> Tuple[float, float, float, np.ndarray, np.ndarray]:
+    """
+    Additive damped Holt-Winters filter.
+
+    Returns:
+        (sse, level, trend, season by phase, one-step-ahead fitted values)
+    """
+    level = y[:PERIOD].mean()
+    trend = (y[PERIOD:2 * PERIOD].mean() - level) / PERIOD if len(y) >= 2 * PERIOD else 0.0
+    season = np.zeros(PERIOD)
+    season[phases[:PERIOD]] = y[:PERIOD] - level
+
+    fitted = np.empty(len(y))
+    sse = 0.0
+    for i in range(len(y)):
+        p = phases[i]
+        fitted[i] = level + phi * trend + season[p]
+        error = y[i] - fitted[i]
+        sse += error * error
+        previous_level = level
+        level = previous_level + phi * trend + alpha * error
+        trend = phi * trend + alpha * beta * error
+        season[p] = season[p] + gamma * error
+
+    return sse, level, trend, season, fitted
+
+
+class ETSEngine(FallbackEngine):
+    """Additive Holt-Winters (damped trend, weekly season), smoothing weights by grid search"""
+
+    name = "ets"
+
+    ALPHAS = (0.05, 0.1, 0.2, 0.4)
+    BETAS = (0.0, 0.05, 0.2)
+    GAMMAS = (0.05, 0.1, 0.3)
+
+    def __init__(self, phi: float = 0.9):
+        super().__init__()
+        self.phi = phi
+        self.alpha = self.beta = self.gamma = 0.0
+        self.level = self.trend = 0.0
+        self.season = np.zeros(PERIOD)
+
+    def _fit(self, days: np.ndarray, y: np.ndarray):
+        phases = days % PERIOD
+        best = None
+        for alpha in self.ALPHAS:
+            for beta in self.BETAS:
+                for gamma in self.GAMMAS:
+                    result = _holt_winters(y, phases, alpha, beta, gamma, self.phi)
+                    if best is None or result[0] < best[0][0]:
+                        best = (result, (alpha, beta, gamma))
+
+        (_, self.level, self.trend, self.season, self.fitted_), (self.alpha, self.beta, self.gamma) = best
+
+    def _forecast(self, days: np.ndarray) -> np.ndarray:
+        h = np.maximum(days - self.last_day, 1)
+        damped = self.phi * (1 - self.phi ** h) / (1 - self.phi)
+        return self.level + damped * self.trend + self.season[days % PERIOD]
+
+    def params(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "beta": self.beta, "gamma": self.gamma, "phi": self.phi}
+
+
+class RidgeEngine(FallbackEngine):
+    """Ridge regression on linear trend, weekly/yearly Fourier terms and calendar flags"""
+
+    name = "ridge"
+
+    def __init__(self, weekly_order: int = 3, yearly_order: int = 2, alpha: float = 1.0):
+        super().__init__()
+        self.weekly_order = weekly_order
+        self.yearly_order = yearly_order
+        self.alpha = alpha
+        self.use_yearly = False
+        self.coef = np.zeros(0)
+
+    def _design(self, days: np.ndarray) -> np.ndarray:
+        t = (days - self.first_day) / max(self.last_day - self.first_day, 1)
+        dom = pd.to_datetime(days, unit="D").day.to_numpy()
+        columns = [
+            np.ones(len(days)),
+            t,
+            ((days + 3) % 7 >= 5).astype(np.float64),   # weekend (1970-01-01 was a Thursday)
+            (dom <= 5).astype(np.float64),
+            (dom >= 25).astype(np.float64),
+        ]
+        seasons = [(7.0, self.weekly_order)] + ([(365.25, self.yearly_order)] if self.use_yearly else [])
+        for period, order in seasons:
+            angles = 2 * np.pi * days[:, None] * np.arange(1, order + 1)[None, :] / period
+            columns.extend(np.sin(angles).T)
+            columns.extend(np.cos(angles).T)
+        return np.column_stack(columns)
+
+    def _fit(self, days: np.ndarray, y: np.ndarray):
+        self.use_yearly = len(y) >= 365
+        X = self._design(days)
+        penalty = self.alpha * np.eye(X.shape[1])
+        penalty[0, 0] = 0.0  # intercept is not shrunk
+        self.coef = np.linalg.solve(X.T @ X + penalty, X.T @ y)
+
+    def _forecast(self, days: np.ndarray) -> np.ndarray:
+        return self._design(days) @ self.coef
+
+    def params(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "weekly_order": self.weekly_order,
+                "yearly_order": self.yearly_order if self.use_yearly else 0}
+
+
+class CrostonTSBEngine(FallbackEngine):
+    """
+    TSB intermittent-demand model: demand probability and demand size are
+    smoothed separately, the forecast is their product (flat over the horizon).
+    """
+
+    name = "croston_tsb"
+
+    ALPHAS = (0.05, 0.1, 0.2, 0.3)
+    BETAS = (0.05, 0.1, 0.2, 0.3)
+
+    def __init__(self):
+        super().__init__()
+        self.alpha = self.beta = 0.0
+        self.probability = self.size = 0.0
+
+    @staticmethod
+    def _filter(y: np.ndarray, alpha: float, beta: float) -> Tuple[float, float, float, np.ndarray]:
+        nonzero = y > 0
+        probability = nonzero.mean()
+        size = y[nonzero].mean() if nonzero.any() else 0.0
+        fitted = np.empty(len(y))
+        for i in range(len(y)):
+            fitted[i] = probability * size
+            if nonzero[i]:
+                probability += beta * (1 - probability)
+                size += alpha * (y[i] - size)
+            else:
+                probability -= beta * probability
+        return float(((y - fitted) ** 2).sum()), probability, size, fitted
+
+    def _fit(self, days: np.ndarray, y: np.ndarray):
+        best = None
+        for alpha in self.ALPHAS:
+            for beta in self.BETAS:
+                result = self._filter(y, alpha, beta)
+                if best is None or result[0] < best[0][0]:
+                    best = (result, (alpha, beta))
+
+        (_, self.probability, self.size, self.fitted_), (self.alpha, self.beta) = best
+
+    def _forecast(self, days: np.ndarray) -> np.ndarray:
+        return np.full(len(days), self.probability * self.size)
+
+    def params(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "beta": self.beta}
+
+
+ENGINES = {
+    engine.name: engine
+    for engine in (SeasonalNaiveEngine, ETSEngine, RidgeEngine, CrostonTSBEngine)
+}
+
+
+def create_engine(name: str) -> FallbackEngine:
+    if name not in ENGINES:
+        raise ValueError(f"Unknown fallback engine '{name}', expected one of {list(ENGINES)}")
+    return ENGINES[name]()
+
+
+def is_fallback_engine(model: Any) -> bool:
+    return isinstance(model, FallbackEngine)
+
+
+def trim_leading_zeros(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop the zero-filled days before the first sale (series that started recently)"""
+    nonzero = np.flatnonzero(df['y'].to_numpy() > 0)
+    start = nonzero[0] if len(nonzero) else max(len(df) - 1, 0)
+    return df.iloc[start:].reset_index(drop=True)
+
+
+def series_profile(y: np.ndarray) -> Dict[str, Any]:
+    """History length (from the first sale) and zero ratio of a zero-filled daily series"""
+    y = np.asarray(y, dtype=np.float64)
+    nonzero = np.flatnonzero(y > 0)
+    history = y[nonzero[0]:] if len(nonzero) else y[:0]
+    return {
+        "history_days": int(len(history)),
+        "zero_ratio": round(float((history == 0).mean()), 3) if len(history) else 1.0,
+    }
+
+
+def _holdout_mape(name: str, ds: pd.Series, y: np.ndarray) -> float:
+    """MAPE of an engine fitted without the last HOLDOUT_DAYS days"""
+    engine = create_engine(name).fit(ds[:-HOLDOUT_DAYS], y[:-HOLDOUT_DAYS])
+    predicted = np.maximum(engine.predict(ds[-HOLDOUT_DAYS:])["yhat"], 0)
+    actual = y[-HOLDOUT_DAYS:]
+    mask = actual > 0
+    return float(np.mean(np.abs(actual[mask] - predicted[mask]) / actual[mask])) if mask.any() else np.inf
+
+
+def select_engine(df: pd.DataFrame, configured: str = CATEGORY_ENGINE) -> Tuple[str, str]:
+    """
+    Pick the forecasting engine for a zero-filled daily series.
+
+    - intermittent (zero ratio >= FALLBACK_INTERMITTENT_ZERO_RATIO): croston_tsb
+    - history < FALLBACK_SHORT_SERIES_DAYS: seasonal_naive
+    - history < FALLBACK_MIN_PROPHET_DAYS: ets or ridge, whichever wins a 7-day holdout
+    - otherwise: prophet
+
+    Returns:
+        (engine name, reason)
+    """
+    if configured != "auto":
+        return configured, "configured"
+
+    profile = series_profile(df['y'].to_numpy())
+    history_days, zero_ratio = profile["history_days"], profile["zero_ratio"]
+
+    if zero_ratio >= FALLBACK_INTERMITTENT_ZERO_RATIO:
+        return "croston_tsb", f"intermittent ({zero_ratio:.0%} zero days)"
+    if history_days < FALLBACK_SHORT_SERIES_DAYS:
+        return "seasonal_naive", f"short history ({history_days} days)"
+    if history_days < FALLBACK_MIN_PROPHET_DAYS:
+        history = trim_leading_zeros(df)
+        ds, y = history['ds'], history['y'].to_numpy(dtype=np.float64)
+        scores = {name: _holdout_mape(name, ds, y) for name in ("ets", "ridge")}
+        best = min(scores, key=scores.get)
+        return best, f"short history ({history_days} days), holdout MAPE {scores[best] * 100:.1f}%"
+    return "prophet", f"{history_days} days history"
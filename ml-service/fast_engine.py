@@ -0,0 +1,251 @@
+"""
+Vectorized NumPy Forecast Engine
+
+Evaluates a fitted Prophet model's point forecast (yhat) without going
+through Prophet.predict, which rebuilds seasonality features in pandas
+and simulates uncertainty on every call.
+
+Fitted parameters (trend knots, Fourier coefficients, regressor betas)
+are extracted once per model and reused for every request:
+
+    trend = piecewise_linear(t) * y_scale + floor
+    yhat  = trend * (1 + X @ beta_mult) + (X @ beta_add) * y_scale
+
+Only linear/flat growth with plain seasonalities and extra regressors is
+supported (which is what ModelTrainer and CategoryTrainer produce).
+Anything else is reported as unsupported and the caller falls back to
+Prophet.predict.
+"""
+
+import logging
+import threading
+import weakref
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+
+logger = logging.getLogger(__name__)
+
+NANOSECONDS_PER_SECOND = 1000 * 1000 * 1000
+SECONDS_PER_DAY = 3600 * 24.
+
+
+class UnsupportedModelError(Exception):
+    """Raised when a Prophet model cannot be evaluated by the NumPy engine"""
+    pass
+
+
+class FastForecastEngine:
+    """
+    Precomputed, NumPy-only view of a fitted Prophet model.
+    """
+
+    def __init__(
+        self,
+        growth: str,
+        start_ns: int,
+        t_scale_ns: int,
+        y_scale: float,
+        floor: float,
+        k: float,
+        m: float,
+        deltas: np.ndarray,
+        changepoints_t: np.ndarray,
+        seasonalities: List[Dict],
+        regressors: List[str],
+        regressor_mu: np.ndarray,
+        regressor_std: np.ndarray,
+        beta: np.ndarray,
+        additive_mask: np.ndarray,
+        sigma_obs: float = 0.0,
+        interval_width: float = 0.8
+    ):
+        self.growth = growth
+        self.start_ns = start_ns
+        self.t_scale_ns = t_scale_ns
+        self.y_scale = y_scale
+        self.floor = floor
+        self.k = k
+        self.m = m
+        self.deltas = deltas
+        self.changepoints_t = changepoints_t
+        self.seasonalities = seasonalities
+        self.regressors = regressors
+        self.regressor_mu = regressor_mu
+        self.regressor_std = regressor_std
+        self.additive_mask = additive_mask
+        self.sigma_obs = sigma_obs
+        self.interval_width = interval_width
+
+        # Split beta once into additive / multiplicative coefficient vectors
+        self.beta_add = beta * additive_mask
+        self.beta_mult = beta * (1.0 - additive_mask)
+        self.beta = beta
+        self.n_features = len(beta)
+
+    @classmethod
+    def from_prophet(cls, model: Prophet) -> "FastForecastEngine":
+        """Extract fitted parameters from a Prophet model"""
+        if model.params is None or model.history is None:
+            raise UnsupportedModelError("Model has not been fit")
+        if model.growth not in ("linear", "flat"):
+            raise UnsupportedModelError(f"Unsupported growth: {model.growth}")
+        if model.holidays is not None or model.country_holidays is not None:
+            raise UnsupportedModelError("Holiday components are not supported")
+
+        seasonalities = []
+        modes = []
+        for name, props in model.seasonalities.items():
+            if props.get("condition_name") is not None:
+                raise UnsupportedModelError(f"Conditional seasonality '{name}' is not supported")
+            seasonalities.append({
+                "name": name,
+                "period": float(props["period"]),
+                "fourier_order": int(props["fourier_order"]),
+                "mode": props["mode"],
+            })
+            modes.extend([props["mode"]] * (2 * int(props["fourier_order"])))
+
+        regressors = list(model.extra_regressors.keys())
+        regressor_mu = np.array(
+            [float(model.extra_regressors[r]["mu"]) for r in regressors], dtype=np.float64
+        )
+        regressor_std = np.array(
+            [float(model.extra_regressors[r]["std"]) for r in regressors], dtype=np.float64
+        )
+        modes.extend(model.extra_regressors[r]["mode"] for r in regressors)
+
+        beta = np.nanmean(np.atleast_2d(model.params["beta"]), axis=0).astype(np.float64)
+        if len(modes) == 0:
+            # Prophet adds a single 'zeros' dummy column when there are no features
+            modes = ["additive"] * len(beta)
+        if len(beta) != len(modes):
+            raise UnsupportedModelError(
+                f"Feature layout mismatch: {len(beta)} betas vs {len(modes)} features"
+            )
+
+        floor = float(model.y_min) if getattr(model, "scaling", "absmax") == "minmax" else 0.0
+
+        sigma_obs = model.params.get("sigma_obs")
+        sigma_obs = float(np.nanmean(sigma_obs)) if sigma_obs is not None else 0.0
+
+        return cls(
+            growth=model.growth,
+            start_ns=pd.Timestamp(model.start).value,
+            t_scale_ns=pd.Timedelta(model.t_scale).value,
+            y_scale=float(model.y_scale),
+            floor=floor,
+            k=float(np.nanmean(model.params["k"])),
+            m=float(np.nanmean(model.params["m"])),
+            deltas=np.nanmean(np.atleast_2d(model.params["delta"]), axis=0).astype(np.float64),
+            changepoints_t=np.asarray(model.changepoints_t, dtype=np.float64),
+            seasonalities=seasonalities,
+            regressors=regressors,
+            regressor_mu=regressor_mu,
+            regressor_std=regressor_std,
+            beta=beta,
+            additive_mask=np.array([mode == "additive" for mode in modes], dtype=np.float64),
+            sigma_obs=sigma_obs,
+            interval_width=float(model.interval_width),
+        )
+
+    def trend(self, ds_ns: np.ndarray) -> np.ndarray:
+        """Trend component on the original y scale"""
+        t = (ds_ns - self.start_ns) / self.t_scale_ns
+
+        if self.growth == "flat":
+            trend = np.full(t.shape, self.m)
+        else:
+            # Piecewise linear: rate and offset change at each changepoint
+            active = self.changepoints_t[None, :] <= t[:, None]
+            k_t = self.k + active @ self.deltas
+            m_t = self.m - active @ (self.deltas * self.changepoints_t)
+            trend = k_t * t + m_t
+
+        return trend * self.y_scale + self.floor
+
+    def feature_matrix(self, ds_ns: np.ndarray, regressor_values: np.ndarray) -> np.ndarray:
+        """
+        Build the (n, n_features) design matrix: Fourier terms followed by
+        standardized regressors, in the same column order as Prophet.
+        """
+        n = len(ds_ns)
+        X = np.empty((n, self.n_features), dtype=np.float64)
+
+        if not self.seasonalities and not self.regressors:
+            X[:, :] = 0.0
+            return X
+
+        # Days since epoch, computed exactly like Prophet.fourier_series
+        days = (ds_ns // NANOSECONDS_PER_SECOND) / SECONDS_PER_DAY
+        col = 0
+        for season in self.seasonalities:
+            order = season["fourier_order"]
+            orders = np.arange(1, order + 1, dtype=np.float64)
+            angles = (days * np.pi * 2)[:, None] * orders[None, :] / season["period"]
+            X[:, col:col + 2 * order:2] = np.sin(angles)
+            X[:, col + 1:col + 2 * order:2] = np.cos(angles)
+            col += 2 * order
+
+        if self.regressors:
+            X[:, col:] = (regressor_values - self.regressor_mu) / self.regressor_std
+
+        return X
+
+    def predict(self, ds: pd.Series, regressor_values: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Evaluate the point forecast.
+
+        Args:
+            ds: Forecast dates
+            regressor_values: (n, len(self.regressors)) array, columns in
+                self.regressors order
+
+        Returns:
+            Dict with 'trend', 'additive_terms', 'multiplicative_terms', 'yhat'
+        """
+        ds_ns = pd.to_datetime(ds).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+        if regressor_values is None:
+            regressor_values = np.zeros((len(ds_ns), len(self.regressors)), dtype=np.float64)
+
+        X = self.feature_matrix(ds_ns, regressor_values)
+        trend = self.trend(ds_ns)
+        additive = (X @ self.beta_add) * self.y_scale
+        multiplicative = X @ self.beta_mult
+
+        return {
+            "trend": trend,
+            "additive_terms": additive,
+            "multiplicative_terms": multiplicative,
+            "yhat": trend * (1 + multiplicative) + additive,
+        }
+
+
+# Engines are derived from (cached) model objects, so key them weakly by model
+_engines: "weakref.WeakKeyDictionary[Prophet, Optional[FastForecastEngine]]" = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+
+def get_engine(model: Prophet) -> Optional[FastForecastEngine]:
+    """
+    Return the NumPy engine for a model, building it on first use.
+
+    Returns None if the model is not supported (caller should fall back
+    to Prophet.predict).
+    """
+    with _engines_lock:
+        if model in _engines:
+            return _engines[model]
+
+    try:
+        engine = FastForecastEngine.from_prophet(model)
+    except UnsupportedModelError as e:
+        logger.info(f"Fast engine unavailable, using Prophet.predict: {e}")
+        engine = None
+
+    with _engines_lock:
+        _engines[model] = engine
+    return engine
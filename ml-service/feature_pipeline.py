@@ -0,0 +1,162 @@
+"""
+Fused Training Feature Pipeline
+
+Single-pass NumPy equivalent of the ModelTrainer preprocessing chain
+(handle_outliers -> add_calendar_features -> add_lag_features ->
+apply_smoothing -> fit_scaler -> apply_scaler). Every column is kept as
+one float64 array; lag, rolling, calendar and scaling are computed on
+those arrays and the Prophet frame is built once at the end, instead of
+copying the whole DataFrame at every step.
+
+The output matches the pandas chain (see test_feature_pipeline.py).
+"""
+
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import (
+    REGRESSOR_PRIOR_SCALES, SCALED_REGRESSORS, SCALER_VERSION,
+    OUTLIER_HANDLING, OUTLIER_CLIP_PERCENTILE, OUTLIER_Z_SCORE_THRESHOLD,
+    APPLY_SMOOTHING, SMOOTHING_WINDOW, USE_LOG_TRANSFORM
+)
+
+logger = logging.getLogger(__name__)
+
+LAG_DAYS = 7
+ROLLING_WINDOW = 7
+ROLLING_MIN_PERIODS = 3
+
+
+class TrainingFeatures(NamedTuple):
+    train_df: pd.DataFrame      # ds, y (log1p if enabled), active regressors (scaled)
+    y_original: np.ndarray      # target after outlier handling/smoothing, original scale
+    regressors: List[str]       # active regressors, in REGRESSOR_PRIOR_SCALES order
+    scaler_params: Dict
+
+
+def _window_stats(values: np.ndarray, before: int, after: int, min_periods: int):
+    """
+    Mean and sample std over [i - before, i + after] for every i
+    (NaN where fewer than min_periods values are available).
+    """
+    padded = np.concatenate([np.full(before, np.nan), values, np.full(after, np.nan)])
+    windows = sliding_window_view(padded, before + after + 1)
+    valid = ~np.isnan(windows)
+    count = valid.sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid, windows, 0.0).sum(axis=1) / count
+        deviations = np.where(valid, windows - mean[:, None], 0.0)
+        std = np.sqrt((deviations ** 2).sum(axis=1) / (count - 1))
+
+    mean[count < min_periods] = np.nan
+    std[count < max(min_periods, 2)] = np.nan
+    return mean, std
+
+
+def _fill_with_mean(values: np.ndarray) -> np.ndarray:
+    missing = np.isnan(values)
+    if missing.any():
+        values[missing] = values[~missing].mean() if (~missing).any() else 0.0
+    return values
+
+
+def build_training_features(
+    df: pd.DataFrame,
+    regressor_prior_scales: Dict[str, float] = REGRESSOR_PRIOR_SCALES,
+    scaled_regressors: List[str] = SCALED_REGRESSORS,
+    outlier_handling: str = OUTLIER_HANDLING,
+    clip_percentile=OUTLIER_CLIP_PERCENTILE,
+    z_score_threshold: float = OUTLIER_Z_SCORE_THRESHOLD,
+    smoothing_window: Optional[int] = SMOOTHING_WINDOW if APPLY_SMOOTHING else None,
+    log_transform: bool = USE_LOG_TRANSFORM
+) -> TrainingFeatures:
+    """
+    Build the Prophet training frame from fetched daily_sales_summary rows.
+
+    Args:
+        df: Frame with ds, y and raw regressor columns (any order)
+        smoothing_window: Centered smoothing window, None = no smoothing
+
+    Returns:
+        TrainingFeatures
+    """
+    order = np.argsort(df["ds"].values, kind="stable")
+    ds = df["ds"].values[order]
+    y = df["y"].to_numpy(dtype=np.float64)[order]
+    columns = {
+        col: df[col].to_numpy(dtype=np.float64)[order]
+        for col in regressor_prior_scales if col in df.columns
+    }
+
+    # 1. Outliers
+    if outlier_handling == "clip":
+        lower, upper = np.percentile(y, clip_percentile)
+        outliers_count = int(((y < lower) | (y > upper)).sum())
+        y = np.clip(y, lower, upper)
+        logger.info(f"Clipped {outliers_count} outliers to [{lower:.1f}, {upper:.1f}]")
+    elif outlier_handling == "remove":
+        std = y.std(ddof=1)
+        keep = np.abs((y - y.mean()) / std) <= z_score_threshold if std > 0 else np.ones(len(y), dtype=bool)
+        logger.info(f"Removed {int((~keep).sum())} outliers (z-score > {z_score_threshold})")
+        ds, y = ds[keep], y[keep]
+        columns = {col: values[keep] for col, values in columns.items()}
+
+    # 2. Calendar
+    day = pd.DatetimeIndex(ds).day.to_numpy()
+    columns["is_month_start"] = (day <= 5).astype(np.float64)
+    columns["is_month_end"] = (day >= 26).astype(np.float64)
+    if "is_payday" not in columns:
+        columns["is_payday"] = ((day >= 25) | (day <= 5)).astype(np.float64)
+    columns.setdefault("is_day_before_holiday", np.zeros(len(y)))
+    columns.setdefault("is_school_holiday", np.zeros(len(y)))
+
+    # 3. Lag / backward-looking rolling features (shifted by one day, no leakage)
+    lag = np.full(len(y), np.nan)
+    if len(y) > LAG_DAYS:
+        lag[LAG_DAYS:] = y[:-LAG_DAYS]
+    shifted = np.concatenate([[np.nan], y[:-1]])
+    rolling_mean, rolling_std = _window_stats(shifted, ROLLING_WINDOW - 1, 0, ROLLING_MIN_PERIODS)
+    columns["lag_7"] = _fill_with_mean(lag)
+    columns["rolling_mean_7"] = _fill_with_mean(rolling_mean)
+    columns["rolling_std_7"] = _fill_with_mean(rolling_std)
+
+    # 4. Centered smoothing (mean preserved)
+    if smoothing_window:
+        original_mean = y.mean()
+        after = (smoothing_window - 1) // 2
+        y, _ = _window_stats(y, smoothing_window - 1 - after, after, 1)
+        new_mean = y.mean()
+        if new_mean > 0:
+            y = y * (original_mean / new_mean)
+
+    y_original = y
+    y_model = np.log1p(y) if log_transform else y
+
+    # 5. Standard scaling (population std, constant columns keep scale 1)
+    scale_cols = [col for col in scaled_regressors if col in columns]
+    mean_, scale_ = {}, {}
+    for col in scale_cols:
+        values = columns[col]
+        mean = values.mean()
+        scale = values.std()
+        if scale <= 1e-12 * max(1.0, abs(mean)):
+            scale = 1.0
+        mean_[col], scale_[col] = float(mean), float(scale)
+        columns[col] = (values - mean) / scale
+
+    scaler_params = {
+        "mean_": mean_,
+        "scale_": scale_,
+        "columns": scale_cols,
+        "version": SCALER_VERSION
+    }
+
+    regressors = [reg for reg in regressor_prior_scales if reg in columns]
+    train_df = pd.DataFrame({"ds": ds, "y": y_model, **{reg: columns[reg] for reg in regressors}})
+
+    return TrainingFeatures(train_df, y_original, regressors, scaler_params)
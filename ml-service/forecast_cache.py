@@ -0,0 +1,127 @@
+"""
+Forecast Result Cache
+
+Caches finished /ml/predict results so repeated dashboard requests with
+the same store, horizon and events skip the forecast pipeline.
+
+Key: (store_id, model_version, start_date, periods, events_hash, interval_mode)
+
+Entries expire after a TTL, the cache is bounded (LRU eviction), and all
+entries of a store are dropped when a new model version is saved.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from config import FORECAST_CACHE_ENABLED, FORECAST_CACHE_TTL_SECONDS, FORECAST_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+
+def hash_events(events: Optional[List[Dict[str, Any]]]) -> str:
+    """Order-independent hash of an event list"""
+    if not events:
+        return "none"
+    canonical = sorted(json.dumps(event, sort_keys=True, default=str) for event in events)
+    return hashlib.sha1("\n".join(canonical).encode("utf-8")).hexdigest()
+
+
+class ForecastCache:
+    """
+    Thread-safe TTL + LRU cache of forecast results.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = FORECAST_CACHE_TTL_SECONDS,
+        max_entries: int = FORECAST_CACHE_MAX_ENTRIES,
+        enabled: bool = FORECAST_CACHE_ENABLED
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        store_id: str,
+        model_version: Optional[str],
+        start_date: date,
+        periods: int,
+        events: Optional[List[Dict[str, Any]]],
+        interval_mode: Optional[str] = None
+    ) -> Tuple:
+        return (
+            str(store_id),
+            model_version,
+            start_date.isoformat(),
+            int(periods),
+            hash_events(events),
+            interval_mode,
+        )
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple, value: Any):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_store(self, store_id: Hashable):
+        """Drop all cached forecasts of a store (called when a new model is saved)"""
+        store_id = str(store_id)
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == store_id]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached forecasts for store {store_id}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Singleton instance
+forecast_cache = ForecastCache()
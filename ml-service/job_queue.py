@@ -0,0 +1,310 @@
+"""
+Durable Training Job Queue
+
+Replaces FastAPI BackgroundTasks for training. Jobs are persisted in a
+local SQLite file (under model_dir) so they survive restarts, are
+de-duplicated while active (same dedupe key = same job), run on a
+bounded worker pool and are retried with backoff on failure.
+
+Job states: queued -> running -> succeeded | failed
+(a failed attempt with retries left goes back to queued)
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import (
+    TRAIN_JOB_WORKERS, TRAIN_JOB_MAX_ATTEMPTS,
+    TRAIN_JOB_RETRY_BACKOFF_SECONDS, TRAIN_JOB_POLL_SECONDS
+)
+from timezone_utils import wib_isoformat
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ("queued", "running")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    stage TEXT,
+    stages TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_dedupe
+    ON jobs (dedupe_key) WHERE state IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_jobs_state_available ON jobs (state, available_at);
+"""
+
+
+class PermanentJobError(Exception):
+    """Raised by handlers for failures that retrying cannot fix"""
+    pass
+
+
+class JobContext:
+    """
+    Passed to job handlers to report progress and stage timings.
+
+    Calling stage("fit") closes the previous stage and starts timing the
+    new one; timings are persisted so /ml/jobs/{id} can show them live.
+    """
+
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self._queue = queue
+        self.job_id = job_id
+        self._stages: Dict[str, float] = {}
+        self._current: Optional[str] = None
+        self._started: float = 0.0
+
+    def stage(self, name: str, progress: Optional[float] = None):
+        self._close_stage()
+        self._current = name
+        self._started = time.perf_counter()
+        self._queue._update(self.job_id, stage=name, stages=json.dumps(self._stages),
+                            **({"progress": progress} if progress is not None else {}))
+
+    def progress(self, fraction: float):
+        self._queue._update(self.job_id, progress=max(0.0, min(1.0, fraction)))
+
+    def finish(self) -> Dict[str, float]:
+        self._close_stage()
+        self._current = None
+        return self._stages
+
+    def _close_stage(self):
+        if self._current is not None:
+            elapsed = time.perf_counter() - self._started
+            self._stages[self._current] = round(self._stages.get(self._current, 0.0) + elapsed, 3)
+
+
+JobHandler = Callable[[Dict[str, Any], JobContext], Optional[Dict[str, Any]]]
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with a bounded pool of worker threads.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_workers: int = TRAIN_JOB_WORKERS,
+        max_attempts: int = TRAIN_JOB_MAX_ATTEMPTS,
+        retry_backoff_seconds: float = TRAIN_JOB_RETRY_BACKOFF_SECONDS,
+        poll_seconds: float = TRAIN_JOB_POLL_SECONDS
+    ):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.poll_seconds = poll_seconds
+        self._handlers: Dict[str, JobHandler] = {}
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._claim_lock = threading.Lock()
+        self._threads = []
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def register(self, job_type: str, handler: JobHandler):
+        self._handlers[job_type] = handler
+
+    def start(self):
+        """Requeue jobs interrupted by a restart and start worker threads"""
+        with self._connect() as conn:
+            recovered = conn.execute(
+                "UPDATE jobs SET state = 'queued', stage = NULL, updated_at = ? WHERE state = 'running'",
+                (wib_isoformat(),)
+            ).rowcount
+        if recovered:
+            logger.info(f"Requeued {recovered} job(s) interrupted by restart")
+
+        self._stopping.clear()
+        for i in range(self.max_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"train-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Job queue started with {self.max_workers} worker(s): {self.db_path}")
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def enqueue(self, job_type: str, dedupe_key: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Add a job unless an active job with the same dedupe key exists.
+
+        Returns:
+            (job, created) - created is False when an existing job was returned
+        """
+        now = wib_isoformat()
+        job_id = uuid.uuid4().hex
+
+        with self._connect() as conn:
+            # Twice: the conflicting job can finish between INSERT and SELECT
+            for _ in range(2):
+                try:
+                    conn.execute(
+                        """
+                        INSERT INTO jobs (id, job_type, dedupe_key, payload, state, max_attempts,
+                                          available_at, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?)
+                        """,
+                        (job_id, job_type, dedupe_key, json.dumps(payload, default=str),
+                         self.max_attempts, time.time(), now, now)
+                    )
+                    created = True
+                    break
+                except sqlite3.IntegrityError:
+                    row = conn.execute(
+                        "SELECT id FROM jobs WHERE dedupe_key = ? AND state IN ('queued', 'running')",
+                        (dedupe_key,)
+                    ).fetchone()
+                    if row is not None:
+                        job_id = row["id"]
+                        created = False
+                        break
+            else:
+                raise RuntimeError(f"Could not enqueue {job_type} job ({dedupe_key}): active job kept changing")
+
+        if created:
+            logger.info(f"Queued {job_type} job {job_id} ({dedupe_key})")
+            self._wakeup.set()
+        else:
+            logger.info(f"Deduplicated {job_type} job ({dedupe_key}) -> {job_id}")
+
+        return self.get(job_id), created
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Atomically move the oldest available queued job to running"""
+        with self._claim_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    """
+                    SELECT * FROM jobs
+                    WHERE state = 'queued' AND available_at <= ?
+                    ORDER BY created_at LIMIT 1
+                    """,
+                    (time.time(),)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                now = wib_isoformat()
+                conn.execute(
+                    """
+                    UPDATE jobs SET state = 'running', attempts = attempts + 1, error = NULL,
+                                    started_at = ?, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (now, now, row["id"])
+                )
+                conn.execute("COMMIT")
+                return row
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                row = self._claim()
+            except Exception as e:
+                logger.error(f"Failed to claim job: {e}", exc_info=True)
+                row = None
+
+            if row is None:
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+                continue
+
+            self._run(row)
+
+    def _run(self, row: sqlite3.Row):
+        job_id = row["id"]
+        job_type = row["job_type"]
+        attempt = row["attempts"] + 1
+        context = JobContext(self, job_id)
+        handler = self._handlers.get(job_type)
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job type '{job_type}'")
+
+            logger.info(f"Running {job_type} job {job_id} (attempt {attempt}/{row['max_attempts']})")
+            result = handler(json.loads(row["payload"]), context)
+
+            self._update(
+                job_id, state="succeeded", progress=1.0, stage=None,
+                stages=json.dumps(context.finish()),
+                result=json.dumps(result or {}, default=str),
+                finished_at=wib_isoformat()
+            )
+            logger.info(f"{job_type} job {job_id} succeeded")
+
+        except Exception as e:
+            stages = json.dumps(context.finish())
+            if attempt < row["max_attempts"] and not isinstance(e, PermanentJobError):
+                delay = self.retry_backoff_seconds * (2 ** (attempt - 1))
+                self._update(job_id, state="queued", stage=None, stages=stages, error=str(e),
+                             available_at=time.time() + delay)
+                logger.warning(f"{job_type} job {job_id} failed (attempt {attempt}), retrying in {delay:.0f}s: {e}")
+            else:
+                self._update(job_id, state="failed", stage=None, stages=stages, error=str(e),
+                             finished_at=wib_isoformat())
+                logger.error(f"{job_type} job {job_id} failed permanently: {e}", exc_info=True)
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = wib_isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["stages"] = json.loads(job["stages"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job.pop("available_at", None)
+        return job
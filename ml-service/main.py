@@ -3,19 +3,30 @@ Minimal FastAPI ML Service for Prophet Model Training & Prediction
 Only contains ML-related endpoints, business logic moved to TypeScript backend
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-import threading
-from typing import Optional, List, Dict, Any
-from datetime import date
+from typing import Optional, List, Dict, Any, Literal, Union
+from datetime import date, timedelta
 import os
 import logging
-from sqlalchemy import create_engine
+import threading
 
-# Import local modules
-from model_trainer import ModelTrainer
-from predictor import predictor
+# Import local modules (light only: pandas/Prophet/Stan are loaded by the
+# warm-up thread or on first use, see get_trainer / warmup.py)
+from config import MODEL_DIR, STARTUP_WARMUP_ENABLED, PREWARM_ENABLED, PREWARM_PERIODS, PREDICT_BATCH_MAX_ITEMS
+from job_queue import JobQueue, JobContext, PermanentJobError
+from training_supervisor import TrainingSupervisor
+from forecast_cache import forecast_cache, hash_events
+from serialization import ForecastJSONResponse, format_forecast
+from timezone_utils import get_current_date_wib
+from warmup import Warmup
+from prewarm import RequestTracker, discover_models, prewarm_order, prewarm_models
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,26 +53,198 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is required")
 
-engine = create_engine(DATABASE_URL)
+# Engine and trainer are created lazily (importing model_trainer loads Prophet)
+_engine = None
+_trainer = None
+_trainer_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    with _trainer_lock:
+        if _engine is None:
+            from sqlalchemy import create_engine
+            _engine = create_engine(DATABASE_URL)
+        return _engine
+
+
+def get_trainer():
+    global _trainer
+    engine = get_engine()
+    with _trainer_lock:
+        if _trainer is None:
+            from model_trainer import ModelTrainer
+            _trainer = ModelTrainer(engine)
+        return _trainer
+
+
+os.makedirs(MODEL_DIR, exist_ok=True)
+
+# Durable training job queue (replaces FastAPI BackgroundTasks)
+job_queue = JobQueue(os.path.join(MODEL_DIR, "jobs.db"))
+
+# Last request time per model, used to order the startup prewarm
+request_tracker = RequestTracker(os.path.join(MODEL_DIR, "prewarm_requests.json"))
+
+# Training jobs run in resource-limited child processes, not in the API process
+supervisor = TrainingSupervisor()
+
+
+def _parse_end_date(end_date: Optional[str]) -> Optional[date]:
+    if not end_date:
+        return None
+    from datetime import datetime
+    try:
+        return datetime.fromisoformat(end_date).date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD")
+
+
+def _run_train_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    from model_trainer import DataQualityError
+    
+    store_id = payload["store_id"]
+    end_date_obj = date.fromisoformat(payload["end_date"]) if payload.get("end_date") else None
+    try:
+        model, metadata = get_trainer().train_model(
+            store_id,
+            end_date=end_date_obj,
+            force_retrain=payload.get("force_retrain", False),
+            on_stage=ctx.stage
+        )
+    except DataQualityError as e:
+        raise PermanentJobError(str(e)) from e
+    
+    logger.info(f"Training completed for store {store_id}: accuracy={metadata.get('accuracy')}%")
+    return {
+        "store_id": store_id,
+        "model_version": metadata.get("model_version"),
+        "accuracy": metadata.get("accuracy"),
+        "validation_mape": metadata.get("validation_mape"),
+        "retrain_skipped": metadata.get("retrain_skipped")
+    }
+
+
+def _run_train_categories_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    end_date_obj = date.fromisoformat(payload["end_date"]) if payload.get("end_date") else None
+    ctx.stage("train")
+    results = get_category_trainer().train_all_categories(
+        end_date=end_date_obj,
+        force_retrain=payload.get("force_retrain", False),
+        on_progress=lambda done, total: ctx.progress(done / total if total else 1.0)
+    )
+    logger.info(f"Category training completed: {results.get('categories_trained', 0)} trained")
+    return results
+
+
+def _run_tune_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    from model_trainer import DataQualityError
+    
+    end_date_obj = date.fromisoformat(payload["end_date"]) if payload.get("end_date") else None
+    search_options = {
+        key: payload[key] for key in ("max_trials", "budget_seconds") if payload.get(key) is not None
+    }
+    
+    if payload.get("category"):
+        ctx.stage("search")
+        profile = get_category_trainer().tune_category(payload["category"], end_date_obj, **search_options)
+    else:
+        try:
+            profile = get_trainer().tune_model(payload["store_id"], end_date_obj, on_stage=ctx.stage, **search_options)
+        except DataQualityError as e:
+            raise PermanentJobError(str(e)) from e
+    
+    if profile is None:
+        raise PermanentJobError("Not enough data to tune")
+    return profile
+
+
+def _run_supervised_train_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    result = supervisor.run(_run_train_job, payload, ctx)
+    if supervisor.isolated:
+        # The child published the model; swap it into this process's cache
+        get_trainer().refresh_cached_model(payload["store_id"])
+        forecast_cache.invalidate_store(payload["store_id"])
+    return result
+
+
+def _run_supervised_train_categories_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    result = supervisor.run(_run_train_categories_job, payload, ctx)
+    if supervisor.isolated:
+        get_category_trainer().refresh_cached_models()
+    return result
+
+
+job_queue.register("train", _run_supervised_train_job)
+job_queue.register("train_categories", _run_supervised_train_categories_job)
+job_queue.register("tune", supervisor.wrap(_run_tune_job))
+
+
+def _load_stan_backend():
+    # Prophet() loads the compiled CmdStan model; later fits/predicts reuse it
+    from prophet import Prophet
+    Prophet()
+
+
+def _warm_store(store_id: str):
+    from predictor import predictor
+    model, metadata = get_trainer().load_model(store_id)
+    if model is None:
+        raise ValueError("model could not be loaded")
+    predictor.predict_with_events(model, metadata, periods=PREWARM_PERIODS)
+
+
+def _warm_category(category: str):
+    if get_category_trainer().predict_category(category, PREWARM_PERIODS).empty:
+        raise ValueError("model could not be loaded")
+
+
+def _prewarm_models():
+    trainer, cat_trainer = get_trainer(), get_category_trainer()
+    models = discover_models(trainer.model_dir, str(cat_trainer.model_dir))
+    order = prewarm_order(models, request_tracker.last_requested())
+    prewarm_models(order, _warm_store, _warm_category, on_progress=warmup.progress, cache=trainer.cache)
+
+
+warmup = Warmup()
+warmup.add_step("trainer", get_trainer)
+warmup.add_step("category_trainer", lambda: get_category_trainer())
+warmup.add_step("stan_backend", _load_stan_backend)
+if PREWARM_ENABLED:
+    warmup.add_step("prewarm", _prewarm_models)
+
+IMPORT_SECONDS = round(time.perf_counter() - _IMPORT_STARTED, 3)
+
+
+def _start_warmup():
+    """Warm up in the background, or (STARTUP_WARMUP_ENABLED=false) load on first request and be ready now"""
+    if STARTUP_WARMUP_ENABLED:
+        warmup.start()
+    else:
+        warmup.defer()
 
-# Initialize trainer
-trainer = ModelTrainer(engine)
 
 @app.on_event("startup")
 def startup_event():
-    """Trigger background model check on startup so the server doesn't block"""
-    logger.info("Application startup: Triggering background model check...")
-    def _auto_train():
-        try:
-            logger.info("Running auto-train check on startup")
-            cat_trainer = get_category_trainer()
-            cat_trainer.train_all_categories(force_retrain=False)
-        except Exception as e:
-            logger.error(f"Startup auto-training failed: {e}", exc_info=True)
+    """Start training workers and queue the startup model check so the server doesn't block"""
+    logger.info(f"main imported in {IMPORT_SECONDS:.3f}s")
+    _start_warmup()
+    job_queue.start()
+    logger.info("Application startup: Queueing background category model check...")
+    try:
+        job_queue.enqueue(
+            "train_categories",
+            dedupe_key="train_categories:latest",
+            payload={"end_date": None, "force_retrain": False}
+        )
+    except Exception as e:
+        logger.error(f"Startup auto-training could not be queued: {e}", exc_info=True)
+
 
-    thread = threading.Thread(target=_auto_train)
-    thread.daemon = True
-    thread.start()
+@app.on_event("shutdown")
+def shutdown_event():
+    job_queue.stop(timeout=5)
+    request_tracker.flush()
 
 
 # ===== REQUEST MODELS =====
@@ -72,16 +255,35 @@ class TrainRequest(BaseModel):
     force_retrain: bool = False
 
 
+class TuneRequest(BaseModel):
+    store_id: Optional[str] = None
+    category: Optional[str] = None   # Tune a category model instead of a store model
+    end_date: Optional[str] = None
+    max_trials: Optional[int] = None
+    budget_seconds: Optional[int] = None
+
+
 class EventInput(BaseModel):
     date: str
     type: str
     impact: float
 
 
+IntervalMode = Literal["none", "analytic", "sampled"]
+# Forecast response shape: "records" = [{ds, yhat, ...}], "columnar" = {ds: [...], yhat: [...], ...}
+ForecastFormat = Literal["records", "columnar"]
+
+
 class PredictRequest(BaseModel):
     store_id: str
     periods: int = 30
     events: List[EventInput] = []
+    interval_mode: Optional[IntervalMode] = None  # None = server default (INTERVAL_MODE)
+    format: ForecastFormat = "records"
+
+
+class BatchPredictRequest(BaseModel):
+    items: List[PredictRequest]
 
 
 # ===== ENDPOINTS =====
@@ -92,40 +294,43 @@ def health_check():
     return {"status": "ok", "service": "ml-service"}
 
 
-def _background_train(store_id: str, end_date_obj, force_retrain: bool):
-    try:
-        logger.info(f"Background training started for store {store_id}")
-        model, metadata = trainer.train_model(store_id, end_date=end_date_obj, force_retrain=force_retrain)
-        logger.info(f"Background training completed for store {store_id}: accuracy={metadata.get('accuracy')}%")
-    except Exception as e:
-        logger.error(f"Background training failed for store {store_id}: {e}", exc_info=True)
+@app.get("/ready")
+def readiness_check():
+    """
+    Readiness: 200 once the warm-up (trainer, Stan backend, model prewarm) has finished, 503 before
+    
+    With STARTUP_WARMUP_ENABLED=false there is no warm-up (state "deferred"), so 200 right away
+    """
+    status = {**warmup.status(), "import_seconds": IMPORT_SECONDS}
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=status)
+
 
 @app.post("/ml/train", status_code=202)
-def train_model(req: TrainRequest, background_tasks: BackgroundTasks):
+def train_model(req: TrainRequest):
     """
-    Train Prophet model for a specific store asynchronously
+    Queue Prophet model training for a specific store.
+    
+    Jobs are de-duplicated by (store_id, end_date) while queued or running;
+    poll /ml/jobs/{job_id} for progress.
     """
     try:
-        # Parse end_date if provided
-        end_date_obj = None
-        if req.end_date:
-            from datetime import datetime
-            try:
-                end_date_obj = datetime.fromisoformat(req.end_date).date()
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD")
+        end_date_obj = _parse_end_date(req.end_date)
         
-        # Add to background tasks
-        background_tasks.add_task(
-            _background_train, 
-            req.store_id, 
-            end_date_obj, 
-            req.force_retrain
+        job, created = job_queue.enqueue(
+            "train",
+            dedupe_key=f"train:{req.store_id}:{end_date_obj or 'latest'}",
+            payload={
+                "store_id": req.store_id,
+                "end_date": end_date_obj,
+                "force_retrain": req.force_retrain
+            }
         )
         
         return {
             "status": "accepted",
-            "message": f"Training queued for store {req.store_id}"
+            "message": f"Training queued for store {req.store_id}",
+            "job_id": job["id"],
+            "deduplicated": not created
         }
         
     except HTTPException:
@@ -135,7 +340,144 @@ def train_model(req: TrainRequest, background_tasks: BackgroundTasks):
         raise HTTPException(status_code=500, detail=f"Failed to queue training: {str(e)}")
 
 
-@app.post("/ml/predict")
+@app.post("/ml/tune", status_code=202)
+def tune_model(req: TuneRequest):
+    """
+    Queue an offline hyperparameter search for a store or category model.
+    
+    The winning profile is saved next to the model and used by later retrains.
+    """
+    if not req.store_id and not req.category:
+        raise HTTPException(status_code=400, detail="store_id or category is required")
+    
+    end_date_obj = _parse_end_date(req.end_date)
+    target = f"category:{req.category}" if req.category else f"store:{req.store_id}"
+    
+    try:
+        job, created = job_queue.enqueue(
+            "tune",
+            dedupe_key=f"tune:{target}",
+            payload={
+                "store_id": req.store_id,
+                "category": req.category,
+                "end_date": end_date_obj,
+                "max_trials": req.max_trials,
+                "budget_seconds": req.budget_seconds
+            }
+        )
+    except Exception as e:
+        logger.error(f"Failed to queue tuning: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to queue tuning: {str(e)}")
+    
+    return {
+        "status": "accepted",
+        "message": f"Tuning queued for {target}",
+        "job_id": job["id"],
+        "deduplicated": not created
+    }
+
+
+@app.get("/ml/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Get training job state, progress and stage timings
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+def _events_to_dicts(events: List[EventInput]) -> List[Dict[str, Any]]:
+    return [{"date": event.date, "type": event.type, "impact": event.impact} for event in events]
+
+
+def _store_forecasts(
+    trainer,
+    store_id: str,
+    model,
+    metadata: Dict[str, Any],
+    start_date: date,
+    items: List[tuple],
+    calendars: Optional[Dict[tuple, Any]] = None
+) -> List[Union[tuple, Exception]]:
+    """
+    Forecasts of one store model for (periods, events, interval_mode) items
+    
+    Each item is served from the forecast cache, from materialized
+    forecasts (event-less, default interval mode) or computed; computed
+    items that share events and interval mode use one model evaluation.
+    
+    Returns:
+        (columns, source, cache_hit) per item; columns as built by
+        predictor.forecast_columns (also the forecast cache format).
+        Items whose forecast failed get the exception instead, so a
+        failure only affects the items that share its lookup or model
+        evaluation.
+    """
+    from predictor import predictor
+    
+    model_version = metadata.get("model_version")
+    results: List[Optional[Union[tuple, Exception]]] = [None] * len(items)
+    keys: List[Optional[tuple]] = [None] * len(items)
+    pending: Dict[tuple, List[int]] = {}
+    
+    for index, (periods, events_list, interval_mode) in enumerate(items):
+        try:
+            # Resolved, so an explicit default mode shares entries with None
+            interval_mode = predictor.effective_interval_mode(model, interval_mode)
+            cache_key = forecast_cache.make_key(store_id, model_version, start_date, periods, events_list, interval_mode)
+            
+            predictions = forecast_cache.get(cache_key)
+            if predictions is not None:
+                results[index] = (predictions, "cache", True)
+                continue
+            
+            # Fast path: event-less requests are served from sales_forecasts,
+            # which was materialized (with known calendar events and the
+            # default interval mode) at train time
+            if not events_list and interval_mode == predictor.effective_interval_mode(model):
+                materialized = trainer.load_materialized_forecasts(store_id, model_version, start_date, periods)
+                if materialized is not None:
+                    predictions = predictor.predict_from_materialized(materialized, metadata, columnar=True)
+                    forecast_cache.put(cache_key, predictions)
+                    results[index] = (predictions, "materialized", False)
+                    continue
+        except Exception as e:
+            logger.error(f"Forecast lookup failed for store {store_id}: {e}", exc_info=True)
+            results[index] = e
+            continue
+        
+        # Same events and interval mode -> same future regressors
+        keys[index] = cache_key
+        pending.setdefault((hash_events(events_list), interval_mode), []).append(index)
+    
+    for (_, interval_mode), indices in pending.items():
+        _, events_list, _ = items[indices[0]]
+        try:
+            forecasts = predictor.predict_horizons(
+                model=model,
+                metadata=metadata,
+                horizons=[items[index][0] for index in indices],
+                events=events_list,
+                start_date=start_date,
+                interval_mode=interval_mode,
+                calendars=calendars,
+                columnar=True
+            )
+        except Exception as e:
+            logger.error(f"Forecast failed for store {store_id} ({len(indices)} items): {e}", exc_info=True)
+            for index in indices:
+                results[index] = e
+            continue
+        for index, predictions in zip(indices, forecasts):
+            forecast_cache.put(keys[index], predictions)
+            results[index] = (predictions, "computed", False)
+    
+    return results
+
+
+@app.post("/ml/predict", response_class=ForecastJSONResponse)
 def predict(req: PredictRequest):
     """
     Generate forecast predictions
@@ -144,13 +486,21 @@ def predict(req: PredictRequest):
         store_id: Store identifier
         periods: Number of days to forecast
         events: List of calendar events to consider
+        interval_mode: "none", "analytic" or "sampled" (default: INTERVAL_MODE)
+        format: "records" (default) or "columnar" predictions
     
     Returns:
-        Forecast predictions with yhat, yhat_lower, yhat_upper
+        Forecast predictions with yhat, yhat_lower, yhat_upper; metadata
+        interval_mode is the mode actually used - "sampled" falls back to
+        "analytic" for compact and fallback-engine models
     """
     try:
+        from predictor import predictor
         logger.info(f"Predicting {req.periods} periods for store {req.store_id}")
         
+        trainer = get_trainer()
+        request_tracker.record("store", req.store_id)
+        
         # Load model
         model, metadata = trainer.load_model(req.store_id)
         
@@ -160,37 +510,37 @@ def predict(req: PredictRequest):
                 detail=f"Model not found for store {req.store_id}. Train the model first."
             )
         
-        # Convert events to dict format
-        events_list = [
-            {
-                "date": event.date,
-                "type": event.type,
-                "impact": event.impact
-            }
-            for event in req.events
-        ]
+        events_list = _events_to_dicts(req.events)
         
-        # Generate predictions using predictor
-        predictions = predictor.predict_with_events(
-            model=model,
-            metadata=metadata,
-            periods=req.periods,
-            events=events_list,
-            start_date=None  # Start from tomorrow
+        # Forecast starts tomorrow; resolved here so it is part of the cache key
+        start_date = get_current_date_wib() + timedelta(days=1)
+        [forecast] = _store_forecasts(
+            trainer, req.store_id, model, metadata, start_date, [(req.periods, events_list, req.interval_mode)]
         )
+        if isinstance(forecast, Exception):
+            raise forecast
+        columns, source, cache_hit = forecast
         
-        logger.info(f"Prediction completed: {len(predictions)} data points")
+        logger.info(f"Prediction completed: {len(columns['ds'])} data points (source: {source})")
+        cache_stats = forecast_cache.stats()
         
-        return {
+        return ForecastJSONResponse({
             "status": "success",
-            "predictions": predictions,
+            "predictions": format_forecast(columns, req.format),
             "metadata": {
                 "model_age_days": trainer._get_model_age_days(metadata),
                 "model_accuracy": metadata.get("accuracy"),
-                "periods": len(predictions),
-                "events_applied": len(events_list)
+                "periods": len(columns["ds"]),
+                "events_applied": len(events_list),
+                "interval_mode": predictor.effective_interval_mode(model, req.interval_mode),
+                "source": source,
+                "forecast_cache": {
+                    "hit": cache_hit,
+                    "hits": cache_stats["hits"],
+                    "misses": cache_stats["misses"]
+                }
             }
-        }
+        })
         
     except HTTPException:
         raise
@@ -199,6 +549,115 @@ def predict(req: PredictRequest):
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
+def _batch_error(store_id: str, error: Exception) -> Dict[str, Any]:
+    """Result entry of a failed /ml/predict/batch item"""
+    if isinstance(error, HTTPException):
+        status_code, detail = error.status_code, error.detail
+    else:
+        logger.error(f"Batch prediction failed for store {store_id}: {error}", exc_info=error)
+        status_code, detail = 500, f"Prediction failed: {str(error)}"
+    return {"store_id": store_id, "status": "error", "status_code": status_code, "error": detail}
+
+
+@app.post("/ml/predict/batch", response_class=ForecastJSONResponse)
+def predict_batch(req: BatchPredictRequest):
+    """
+    Forecasts for several stores in one round trip
+    
+    Items are grouped by store, so each model is loaded once; items of a
+    store with the same events and interval mode are computed with one
+    model evaluation (predictor.predict_horizons), and calendar frames
+    are built once per distinct start date and horizon across all stores.
+    Forecast cache and materialized forecasts are used per item as in
+    /ml/predict. Errors are isolated: a missing or unloadable model fails
+    the items of that store, a failed evaluation only the items computed
+    with it.
+    
+    Returns:
+        results: One entry per item, in request order - the /ml/predict
+            response fields (including the effective interval_mode) plus
+            store_id, or status "error" with status_code and error for
+            that item only
+    """
+    from predictor import predictor
+    
+    if len(req.items) > PREDICT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items ({len(req.items)}), at most {PREDICT_BATCH_MAX_ITEMS} per batch"
+        )
+    
+    logger.info(f"Batch prediction: {len(req.items)} items")
+    trainer = get_trainer()
+    start_date = get_current_date_wib() + timedelta(days=1)
+    calendars: Dict[tuple, Any] = {}
+    results: List[Optional[Dict[str, Any]]] = [None] * len(req.items)
+    
+    by_store: Dict[str, List[int]] = {}
+    for index, item in enumerate(req.items):
+        by_store.setdefault(item.store_id, []).append(index)
+    
+    for store_id, indices in by_store.items():
+        try:
+            request_tracker.record("store", store_id)
+            model, metadata = trainer.load_model(store_id)
+            if not model:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Model not found for store {store_id}. Train the model first."
+                )
+        except Exception as e:
+            for index in indices:
+                results[index] = _batch_error(store_id, e)
+            continue
+        
+        items = []
+        item_indices = []
+        for index in indices:
+            try:
+                items.append((req.items[index].periods, _events_to_dicts(req.items[index].events), req.items[index].interval_mode))
+                item_indices.append(index)
+            except Exception as e:
+                results[index] = _batch_error(store_id, e)
+        
+        forecasts = _store_forecasts(trainer, store_id, model, metadata, start_date, items, calendars)
+        
+        for index, (periods, events_list, interval_mode), forecast in zip(item_indices, items, forecasts):
+            try:
+                if isinstance(forecast, Exception):
+                    raise forecast
+                columns, source, cache_hit = forecast
+                results[index] = {
+                    "store_id": store_id,
+                    "status": "success",
+                    "predictions": format_forecast(columns, req.items[index].format),
+                    "metadata": {
+                        "model_age_days": trainer._get_model_age_days(metadata),
+                        "model_accuracy": metadata.get("accuracy"),
+                        "periods": len(columns["ds"]),
+                        "events_applied": len(events_list),
+                        "interval_mode": predictor.effective_interval_mode(model, interval_mode),
+                        "source": source,
+                        "forecast_cache": {"hit": cache_hit}
+                    }
+                }
+            except Exception as e:
+                results[index] = _batch_error(store_id, e)
+    
+    failed = sum(1 for result in results if result["status"] == "error")
+    logger.info(f"Batch prediction completed: {len(results) - failed} succeeded, {failed} failed")
+    
+    return ForecastJSONResponse({
+        "status": "success",
+        "results": results,
+        "metadata": {
+            "items": len(results),
+            "stores": len(by_store),
+            "failed": failed
+        }
+    })
+
+
 @app.get("/ml/model/{store_id}/status")
 def get_model_status(store_id: str):
     """
@@ -211,14 +670,16 @@ def get_model_status(store_id: str):
         Model existence, age, accuracy, last trained time
     """
     try:
-        model, metadata = trainer.load_model(store_id)
+        trainer = get_trainer()
+        entry = trainer.registry.get("store", store_id)
         
-        if not model:
+        if entry is None:
             return {
                 "exists": False,
                 "store_id": store_id
             }
         
+        metadata = entry["summary"]
         age_days = trainer._get_model_age_days(metadata)
         
         return {
@@ -231,6 +692,10 @@ def get_model_status(store_id: str):
             "last_trained": metadata.get("saved_at"),
             "data_points": metadata.get("data_points"),
             "cv": metadata.get("cv"),
+            "data_fingerprint": metadata.get("data_fingerprint"),
+            "model_version": entry["version"],
+            "checksum": entry["checksum"],
+            "size_bytes": entry["size_bytes"],
         }
         
     except Exception as e:
@@ -245,10 +710,13 @@ _category_trainer = None
 
 def get_category_trainer():
     global _category_trainer
-    if _category_trainer is None:
-        from category_trainer import CategoryTrainer
-        _category_trainer = CategoryTrainer(engine)
-    return _category_trainer
+    engine = get_engine()
+    registry = get_trainer().registry  # one registry for store and category models
+    with _trainer_lock:
+        if _category_trainer is None:
+            from category_trainer import CategoryTrainer
+            _category_trainer = CategoryTrainer(engine, registry=registry)
+        return _category_trainer
 
 
 class CategoryTrainRequest(BaseModel):
@@ -260,43 +728,29 @@ class CategoryPredictRequest(BaseModel):
     periods: int = 30
     events: List[EventInput] = []
     category: Optional[str] = None  # If None, predict all categories
+    interval_mode: Optional[IntervalMode] = None
+    format: ForecastFormat = "records"
 
 
-def _background_train_categories(end_date_obj, force_retrain: bool):
-    try:
-        logger.info("Background category training started")
-        cat_trainer = get_category_trainer()
-        results = cat_trainer.train_all_categories(end_date=end_date_obj, force_retrain=force_retrain)
-        trained_count = results.get('categories_trained', 0)
-        logger.info(f"Background category training completed: {trained_count} trained")
-    except Exception as e:
-        logger.error(f"Background category training failed: {e}", exc_info=True)
-
 @app.post("/ml/train/categories", status_code=202)
-def train_category_models(req: CategoryTrainRequest, background_tasks: BackgroundTasks):
+def train_category_models(req: CategoryTrainRequest):
     """
-    Train Prophet models for all product categories asynchronously.
+    Queue Prophet model training for all product categories.
     """
     try:
-        # Parse end_date if provided
-        end_date_obj = None
-        if req.end_date:
-            from datetime import datetime
-            try:
-                end_date_obj = datetime.fromisoformat(req.end_date).date()
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD")
+        end_date_obj = _parse_end_date(req.end_date)
         
-        # Add to background tasks
-        background_tasks.add_task(
-            _background_train_categories, 
-            end_date_obj, 
-            req.force_retrain
+        job, created = job_queue.enqueue(
+            "train_categories",
+            dedupe_key=f"train_categories:{end_date_obj or 'latest'}",
+            payload={"end_date": end_date_obj, "force_retrain": req.force_retrain}
         )
         
         return {
             "status": "accepted",
-            "message": "Category training queued"
+            "message": "Category training queued",
+            "job_id": job["id"],
+            "deduplicated": not created
         }
         
     except HTTPException:
@@ -306,7 +760,7 @@ def train_category_models(req: CategoryTrainRequest, background_tasks: Backgroun
         raise HTTPException(status_code=500, detail=f"Failed to queue category training: {str(e)}")
 
 
-@app.post("/ml/predict/categories")
+@app.post("/ml/predict/categories", response_class=ForecastJSONResponse)
 def predict_categories(req: CategoryPredictRequest):
     """
     Generate predictions for all categories or a specific category.
@@ -318,23 +772,28 @@ def predict_categories(req: CategoryPredictRequest):
         periods: Number of days to forecast
         events: List of calendar events to consider
         category: Optional specific category to predict (None = all)
+        interval_mode: "none", "analytic" or "sampled" (default: INTERVAL_MODE)
+        format: "records" (default) or "columnar" predictions
     
     Returns:
         Predictions for each category with yhat, yhat_lower, yhat_upper
+        (ds as ISO datetime, 'YYYY-MM-DDT00:00:00'), and the interval mode
+        actually used (interval_mode, or interval_modes per category) -
+        "sampled" falls back to "analytic" for compact and fallback-engine models
     """
     try:
+        from predictor import forecast_columns
         cat_trainer = get_category_trainer()
         
-        # Convert events to dict format
-        events_list = [
-            {"date": e.date, "type": e.type, "impact": e.impact}
-            for e in req.events
-        ]
+        events_list = _events_to_dicts(req.events)
         
         if req.category:
             # Predict single category
             logger.info(f"Predicting {req.periods} days for category: {req.category}")
-            forecast = cat_trainer.predict_category(req.category, req.periods, events_list)
+            request_tracker.record("category", req.category)
+            forecast = cat_trainer.predict_category(
+                req.category, req.periods, events_list, req.interval_mode
+            )
             
             if forecast.empty:
                 raise HTTPException(
@@ -342,20 +801,18 @@ def predict_categories(req: CategoryPredictRequest):
                     detail=f"No model found for category '{req.category}'. Train category models first."
                 )
             
-            # Convert to list of dicts
-            predictions = forecast.to_dict(orient='records')
-            for pred in predictions:
-                pred['ds'] = pred['ds'].isoformat() if hasattr(pred['ds'], 'isoformat') else str(pred['ds'])
-            
-            return {
+            return ForecastJSONResponse({
                 "status": "success",
                 "category": req.category,
-                "predictions": predictions
-            }
+                "interval_mode": forecast.attrs.get("interval_mode"),
+                "predictions": format_forecast(forecast_columns(forecast, ds_unit='s'), req.format)
+            })
         else:
             # Predict all categories
             logger.info(f"Predicting {req.periods} days for all categories")
-            all_predictions = cat_trainer.predict_all_categories(req.periods, events_list)
+            all_predictions = cat_trainer.predict_all_categories(
+                req.periods, events_list, req.interval_mode
+            )
             
             if not all_predictions:
                 raise HTTPException(
@@ -363,19 +820,19 @@ def predict_categories(req: CategoryPredictRequest):
                     detail="No category models found. Train category models first."
                 )
             
-            # Convert to serializable format
             result = {}
+            interval_modes = {}
             for category, forecast in all_predictions.items():
-                predictions = forecast.to_dict(orient='records')
-                for pred in predictions:
-                    pred['ds'] = pred['ds'].isoformat() if hasattr(pred['ds'], 'isoformat') else str(pred['ds'])
-                result[category] = predictions
+                request_tracker.record("category", category)
+                result[category] = format_forecast(forecast_columns(forecast, ds_unit='s'), req.format)
+                interval_modes[category] = forecast.attrs.get("interval_mode")
             
-            return {
+            return ForecastJSONResponse({
                 "status": "success",
                 "categories": list(result.keys()),
+                "interval_modes": interval_modes,
                 "predictions": result
-            }
+            })
         
     except HTTPException:
         raise
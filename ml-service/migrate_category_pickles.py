@@ -0,0 +1,37 @@
+"""
+Convert legacy category model pickles
+
+Usage (from ml-service/, MODEL_DIR set):
+    python migrate_category_pickles.py [--model-dir /app/models/categories]
+
+Earlier versions saved category models as {name}_model.pkl. The service
+never unpickles them (a pickle can run arbitrary code on load); run this
+once, against a model directory you trust, to re-save them as bundles
+(see model_artifact.py). Categories that already have a current
+artifact are skipped, and the pickles are removed once converted.
+"""
+
+import argparse
+import logging
+import os
+
+from config import MODEL_DIR
+from category_trainer import CategoryTrainer
+from model_registry import ModelRegistry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=os.path.join(MODEL_DIR, "categories"))
+    parser.add_argument("--registry", default=os.path.join(MODEL_DIR, "registry.db"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    # No database access is needed to re-save models
+    trainer = CategoryTrainer(None, model_dir=args.model_dir, registry=ModelRegistry(args.registry))
+    converted = trainer.migrate_legacy_pickles()
+    print(f"Converted {len(converted)} category model(s): {', '.join(converted) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
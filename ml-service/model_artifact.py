@@ -0,0 +1,217 @@
+"""
+Model Artifacts (Bundles)
+
+Prophet's model_to_json serializes the full training history and the
+fitted component columns next to the parameters, which makes every store
+artifact (and each of its KEEP_MODEL_HISTORY archived copies) grow with
+the training window. Pickled models (the former category format) are
+slow to load, tied to exact library versions and unsafe to load from
+an untrusted model directory.
+
+A compact artifact stores only the fitted state needed for serving:
+
+- Prophet models: the FastForecastEngine parameters (growth, time/y
+  scaling, k, m, changepoints/deltas, seasonality specs, regressor specs,
+  betas, sigma_obs)
+- Fallback engines (fallback_engines.py): their get_state() fields
+- Prophet layouts FastForecastEngine cannot serve (or
+  MODEL_ARTIFACT_FORMAT=json): the model_to_json string ("prophet_json")
+
+as two .npz members:
+
+- header (UTF-8 JSON): format version, kind ("prophet", "prophet_json"
+  or the fallback engine name), scalar state, array layout, feature
+  scaler params, the model metadata and a SHA-256 checksum over header
+  and values
+- values: all float arrays concatenated into one float64 array
+
+It is read with allow_pickle=False. Each .npz member costs a zip entry
+and an array header parse on load, so the artifact has just these two.
+
+Model and metadata travel in the same file so a version is published
+with a single atomic rename: save_model_bundle writes a temp file in the
+target directory, fsyncs it and os.replace()s it over the target. A
+reader opens either the complete previous bundle or the complete new
+one - never a partial write or a model paired with another version's
+metadata - and a crash mid-write leaves the previous version in place.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from prophet import Prophet
+from prophet.serialize import model_from_json, model_to_json
+
+from config import MODEL_ARTIFACT_COMPRESS
+from fast_engine import FastForecastEngine
+from fallback_engines import ENGINES, FallbackEngine
+
+ARTIFACT_FORMAT_VERSION = 3
+
+_PROPHET_SCALARS = (
+    "growth", "start_ns", "t_scale_ns", "y_scale", "floor", "k", "m",
+    "sigma_obs", "interval_width", "seasonalities", "regressors",
+)
+_PROPHET_ARRAYS = ("changepoints_t", "deltas", "beta", "additive_mask", "regressor_mu", "regressor_std")
+
+CompactModel = Union[FastForecastEngine, FallbackEngine]
+PROPHET_JSON_KIND = "prophet_json"
+
+
+class ArtifactFormatError(Exception):
+    """Raised when a model bundle is corrupt or has an unknown format"""
+    pass
+
+
+def _checksum(header: Dict[str, Any], values: np.ndarray) -> str:
+    body = json.dumps({key: value for key, value in header.items() if key != "checksum"}, sort_keys=True)
+    return "sha256:" + hashlib.sha256(body.encode("utf-8") + values.tobytes()).hexdigest()
+
+
+def atomic_write(path: str, write: Callable[[BinaryIO], None]):
+    """
+    Write a file via a temp file in the same directory and os.replace().
+
+    The temp file is fsynced before the rename and the directory after it,
+    so the target holds either its previous or its new content, also
+    across a crash.
+
+    Args:
+        path: Target file
+        write: Called with the open (binary) temp file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def atomic_write_json(path: str, data: Any, **dumps_kwargs):
+    """atomic_write() of a JSON document"""
+    body = json.dumps(data, **dumps_kwargs).encode("utf-8")
+    atomic_write(path, lambda f: f.write(body))
+
+
+def _model_state(model: Any) -> Tuple[str, Dict[str, Any], Dict[str, np.ndarray]]:
+    """(kind, scalars, arrays) of a model"""
+    if isinstance(model, FastForecastEngine):
+        scalars = {name: getattr(model, name) for name in _PROPHET_SCALARS}
+        scalars["regressors"] = list(scalars["regressors"])
+        return "prophet", scalars, {name: getattr(model, name) for name in _PROPHET_ARRAYS}
+    if isinstance(model, FallbackEngine):
+        scalars, arrays = model.get_state()
+        return model.name, scalars, arrays
+    if isinstance(model, Prophet):
+        return PROPHET_JSON_KIND, {"model_json": model_to_json(model)}, {}
+    raise TypeError(f"Unsupported model type for model bundle: {type(model).__name__}")
+
+
+def save_model_bundle(
+    path: str,
+    model: Union[CompactModel, Prophet],
+    metadata: Optional[Dict[str, Any]] = None,
+    scaler_params: Optional[Dict[str, Any]] = None,
+    compress: bool = MODEL_ARTIFACT_COMPRESS
+):
+    """
+    Atomically write a model bundle (see atomic_write).
+
+    Args:
+        path: Target file (written as given, no .npz suffix is added)
+        model: FastForecastEngine (FastForecastEngine.from_prophet), a
+            fitted fallback engine, or a fitted Prophet model (stored as
+            its full model_to_json serialization)
+        metadata: Model metadata published together with the model
+        scaler_params: Feature scaler params used at train time
+        compress: Zip-compress the members (smaller, slightly slower to load)
+    """
+    kind, scalars, arrays = _model_state(model)
+    layout: List[Tuple[str, int]] = []
+    chunks = []
+    for name, array in arrays.items():
+        array = np.asarray(array, dtype=np.float64).ravel()
+        layout.append((name, len(array)))
+        chunks.append(array)
+    values = np.concatenate(chunks) if chunks else np.zeros(0)
+
+    # Round-trip through JSON first so the checksum covers exactly what is read back
+    header = json.loads(json.dumps({
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "kind": kind,
+        "state": scalars,
+        "arrays": layout,
+        "scaler_params": scaler_params or {},
+        "metadata": metadata,
+    }, default=str))
+    header["checksum"] = _checksum(header, values)
+
+    savez = np.savez_compressed if compress else np.savez
+    header_bytes = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+    atomic_write(path, lambda f: savez(f, header=header_bytes, values=values))
+
+
+def load_model_bundle(path: str) -> Tuple[Union[CompactModel, Prophet], Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Read a model bundle.
+
+    Returns:
+        (model, metadata, scaler_params); metadata is None for bundles
+        written before it was embedded (format 1 and 2)
+
+    Raises:
+        ArtifactFormatError: Unknown version/kind or checksum mismatch
+    """
+    with np.load(path, allow_pickle=False) as data:
+        header = json.loads(data["header"].tobytes())
+        values = data["values"]
+
+    version = header.get("format_version")
+    if version == 1:
+        # First compact format: Prophet only, flat header, no checksum
+        kind = "prophet"
+        scalars = {name: header[name] for name in _PROPHET_SCALARS}
+        layout = list(zip(_PROPHET_ARRAYS, header["lengths"]))
+    elif version in (2, ARTIFACT_FORMAT_VERSION):
+        if header.get("checksum") != _checksum(header, values):
+            raise ArtifactFormatError(f"Checksum mismatch in {path}")
+        kind, scalars, layout = header["kind"], header["state"], header["arrays"]
+    else:
+        raise ArtifactFormatError(f"Unsupported artifact format {version} in {path}")
+
+    offsets = np.cumsum([length for _, length in layout])[:-1] if layout else []
+    arrays = dict(zip((name for name, _ in layout), np.split(values, offsets)))
+
+    if kind == "prophet":
+        model = FastForecastEngine(**scalars, **arrays)
+    elif kind == PROPHET_JSON_KIND:
+        model = model_from_json(scalars["model_json"])
+    elif kind in ENGINES:
+        model = ENGINES[kind].from_state(scalars, arrays)
+    else:
+        raise ArtifactFormatError(f"Unknown model kind '{kind}' in {path}")
+    return model, header.get("metadata"), header["scaler_params"]
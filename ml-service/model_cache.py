@@ -0,0 +1,210 @@
+"""
+In-Memory Model Cache
+
+Bounded LRU cache of deserialized (model, metadata) pairs so that
+repeat predictions skip reading and deserializing model artifacts.
+
+Entries are validated against an artifact signature (file mtimes and
+sizes), so a model rewritten on disk - by this process or another one -
+is reloaded. Callers that pass the signature as a callable let the cache
+skip the stat calls for revalidate_seconds after the last check, so warm
+lookups do no filesystem I/O at all.
+
+Lookups take no lock (read-copy-update): the entries live in a dict that
+is never mutated once published. Writers (put / invalidate / eviction)
+serialize on a lock, build a modified copy and swap the reference, so a
+reader sees either the old or the new entry - never a partial update -
+and never waits for a model being loaded or published. The dict holds a
+few dozen entries at most, so the copy is cheap. LRU order is tracked
+with a per-entry use tick instead of moving entries on every hit.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from config import (
+    MODEL_CACHE_ENABLED, MODEL_CACHE_MAX_ENTRIES, MODEL_CACHE_MAX_BYTES,
+    MODEL_CACHE_REVALIDATE_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _CacheEntry:
+    __slots__ = ("model", "metadata", "signature", "size_bytes", "validated_at", "last_used")
+
+    def __init__(self, model: Any, metadata: Dict, signature: Tuple, size_bytes: int, tick: int):
+        self.model = model
+        self.metadata = metadata
+        self.signature = signature
+        self.size_bytes = size_bytes
+        self.validated_at = time.monotonic()
+        self.last_used = tick
+
+
+class ModelCache:
+    """
+    LRU cache for loaded models with lock-free lookups.
+
+    - Bounded by entry count and by an approximate memory budget
+      (estimated from on-disk artifact size)
+    - Invalidated when the artifact signature or model_version changes
+    - put() of an existing key swaps in the new version atomically
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MODEL_CACHE_MAX_ENTRIES,
+        max_bytes: int = MODEL_CACHE_MAX_BYTES,
+        enabled: bool = MODEL_CACHE_ENABLED,
+        revalidate_seconds: float = MODEL_CACHE_REVALIDATE_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.revalidate_seconds = revalidate_seconds
+        # Published snapshot: replaced, never mutated (see module docstring)
+        self._entries: Dict[Hashable, _CacheEntry] = {}
+        self._write_lock = threading.Lock()
+        self._ticks = itertools.count(1)
+        # Counters are updated without a lock and may be slightly off under contention
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(
+        self,
+        key: Hashable,
+        signature: Union[Tuple, Callable[[], Tuple]],
+        model_version: Optional[str] = None
+    ) -> Optional[Tuple[Any, Dict]]:
+        """
+        Return cached (model, metadata) if the entry matches the given
+        artifact signature (and model_version, when provided).
+
+        A callable signature is only evaluated when the entry was last
+        validated more than revalidate_seconds ago.
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if callable(signature):
+            now = time.monotonic()
+            if now - entry.validated_at < self.revalidate_seconds:
+                signature = entry.signature
+            else:
+                signature = signature()
+                entry.validated_at = now
+
+        stale = entry.signature != signature or (
+            model_version is not None
+            and entry.metadata.get("model_version") != model_version
+        )
+        if stale:
+            self._update(lambda entries: entries.pop(key, None) if entries.get(key) is entry else None)
+            self.misses += 1
+            logger.info(f"Model cache entry for {key} is stale, reloading")
+            return None
+
+        entry.last_used = next(self._ticks)
+        self.hits += 1
+        return entry.model, entry.metadata
+
+    def put(
+        self,
+        key: Hashable,
+        model: Any,
+        metadata: Dict,
+        signature: Tuple,
+        size_bytes: int = 0
+    ):
+        """Insert or replace an entry, evicting least recently used ones"""
+        if not self.enabled:
+            return
+
+        if self.max_bytes and size_bytes > self.max_bytes:
+            logger.warning(f"Model {key} ({size_bytes} bytes) exceeds cache budget, not cached")
+            return
+
+        entry = _CacheEntry(model, metadata, signature, size_bytes, next(self._ticks))
+
+        def insert(entries: Dict[Hashable, _CacheEntry]):
+            entries[key] = entry
+            total_bytes = sum(e.size_bytes for e in entries.values())
+            while entries and (
+                len(entries) > self.max_entries
+                or (self.max_bytes and total_bytes > self.max_bytes)
+            ):
+                evicted_key = min(entries, key=lambda k: entries[k].last_used)
+                total_bytes -= entries.pop(evicted_key).size_bytes
+                self.evictions += 1
+                logger.info(f"Evicted model {evicted_key} from cache")
+
+        self._update(insert)
+
+    def touch(self, key: Hashable):
+        """Mark an entry as most recently used (no-op if not cached)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.last_used = next(self._ticks)
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry"""
+        self._update(lambda entries: entries.pop(key, None))
+
+    def invalidate_kind(self, kind: str):
+        """Drop all entries keyed (kind, ...), e.g. every category model"""
+        def drop(entries: Dict[Hashable, _CacheEntry]):
+            for key in self._kind_keys(entries, kind):
+                del entries[key]
+
+        self._update(drop)
+
+    def keys(self, kind: Optional[str] = None) -> List[Hashable]:
+        """Keys currently cached, optionally only those keyed (kind, ...)"""
+        entries = self._entries
+        return self._kind_keys(entries, kind) if kind is not None else list(entries)
+
+    def clear(self):
+        self._update(lambda entries: entries.clear())
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries
+        return {
+            "enabled": self.enabled,
+            "entries": len(entries),
+            "max_entries": self.max_entries,
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    @property
+    def _total_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    @staticmethod
+    def _kind_keys(entries: Dict[Hashable, _CacheEntry], kind: str) -> List[Hashable]:
+        return [key for key in entries if isinstance(key, tuple) and key[:1] == (kind,)]
+
+    def _update(self, mutate: Callable[[Dict[Hashable, _CacheEntry]], Any]):
+        """Apply mutate to a copy of the entries and publish the copy"""
+        with self._write_lock:
+            entries = dict(self._entries)
+            mutate(entries)
+            self._entries = entries
+
+
+# Singleton instance
+model_cache = ModelCache()
@@ -0,0 +1,265 @@
+"""
+Model Registry
+
+One SQLite manifest (registry.db under the store model_dir) indexing every
+store and category model version: artifact path, checksum, size,
+accuracy, trained_at and a small status summary from the metadata.
+
+Trainers publish each saved model here in one transaction (the previous
+current version is marked archived or dropped at the same time), so
+status endpoints answer with a primary-key lookup instead of reading
+metadata files and the database, and history pruning deletes the
+versions the registry lists instead of globbing history/.
+
+SQLite (WAL) rather than a JSON index because models are published
+concurrently from training child processes and category pool workers.
+
+Deployments that predate the registry are indexed once from the files
+on disk (see ModelTrainer / CategoryTrainer backfill).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from timezone_utils import WIB, wib_isoformat
+
+logger = logging.getLogger(__name__)
+
+# Metadata fields copied into the registry for the status endpoints
+SUMMARY_FIELDS = (
+    "accuracy", "accuracy_source", "train_mape", "validation_mape", "mape",
+    "data_points", "cv", "data_fingerprint", "engine", "saved_at", "trained_at",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    kind TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    state TEXT NOT NULL,
+    path TEXT NOT NULL,
+    meta_path TEXT,
+    checksum TEXT,
+    size_bytes INTEGER,
+    accuracy REAL,
+    trained_at TEXT,
+    summary TEXT NOT NULL DEFAULT '{}',
+    registered_at TEXT NOT NULL,
+    PRIMARY KEY (kind, target_id, version)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_models_current
+    ON models (kind, target_id) WHERE state = 'current';
+CREATE TABLE IF NOT EXISTS targets (
+    kind TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    PRIMARY KEY (kind, target_id)
+);
+"""
+
+# Newest version first. Versions are %Y%m%d_%H%M%S timestamps; anything else
+# ("unversioned" entries of registries backfilled by earlier releases)
+# predates the registry and counts as oldest.
+_NEWEST_FIRST = (
+    "version GLOB '[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]_[0-9][0-9][0-9][0-9][0-9][0-9]' DESC, version DESC"
+)
+
+
+def file_checksum(path: str) -> Optional[str]:
+    """SHA-256 of a file ("sha256:<hex>"), None if it cannot be read"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return f"sha256:{digest.hexdigest()}"
+
+
+def file_version(path: str) -> str:
+    """
+    Version of a model saved without a model_version: its file's
+    modification time, in the trainers' version format (%Y%m%d_%H%M%S) so
+    that it sorts among generated versions
+    """
+    return datetime.fromtimestamp(os.path.getmtime(path), WIB).strftime("%Y%m%d_%H%M%S")
+
+
+def _size(*paths: Optional[str]) -> int:
+    total = 0
+    for path in paths:
+        try:
+            total += os.path.getsize(path) if path else 0
+        except OSError:
+            pass
+    return total
+
+
+class ModelRegistry:
+    """
+    SQLite-backed index of model versions ('current' and 'archived').
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _row(
+        self,
+        kind: str,
+        target_id: str,
+        version: str,
+        state: str,
+        path: str,
+        meta_path: Optional[str],
+        metadata: Dict[str, Any]
+    ) -> Tuple:
+        summary = {key: metadata[key] for key in SUMMARY_FIELDS if key in metadata}
+        return (
+            kind, target_id, version, state, path, meta_path,
+            file_checksum(path), _size(path, meta_path),
+            metadata.get("accuracy"), metadata.get("saved_at") or metadata.get("trained_at"),
+            json.dumps(summary, default=str), wib_isoformat(),
+        )
+
+    def publish(
+        self,
+        kind: str,
+        target_id: str,
+        version: str,
+        path: str,
+        meta_path: Optional[str],
+        metadata: Dict[str, Any],
+        archived: Optional[Tuple[str, Optional[str]]] = None
+    ):
+        """
+        Make a saved model the current version.
+
+        Args:
+            path / meta_path: Artifact and metadata files of the new version
+            archived: (path, meta_path) the previous current version was
+                copied to; None drops the previous entry (overwritten in place)
+        """
+        row = self._row(kind, target_id, version, "current", path, meta_path, metadata)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if archived is not None:
+                    conn.execute(
+                        """
+                        UPDATE models SET state = 'archived', path = ?, meta_path = ?
+                        WHERE kind = ? AND target_id = ? AND state = 'current' AND version != ?
+                        """,
+                        (archived[0], archived[1], kind, target_id, version)
+                    )
+                conn.execute(
+                    "DELETE FROM models WHERE kind = ? AND target_id = ? AND (state = 'current' OR version = ?)",
+                    (kind, target_id, version)
+                )
+                conn.execute("INSERT INTO models VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def add_archived(
+        self,
+        kind: str,
+        target_id: str,
+        version: str,
+        path: str,
+        meta_path: Optional[str],
+        metadata: Dict[str, Any]
+    ):
+        """Index an archived version (backfill of pre-registry history)"""
+        row = self._row(kind, target_id, version, "archived", path, meta_path, metadata)
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO models VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def prune(self, kind: str, target_id: str, keep: int) -> List[Dict[str, Any]]:
+        """
+        Drop all but the newest `keep` archived versions from the registry.
+
+        Returns:
+            The dropped entries (the caller deletes their files)
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                f"""
+                SELECT * FROM models WHERE kind = ? AND target_id = ? AND state = 'archived'
+                ORDER BY {_NEWEST_FIRST} LIMIT -1 OFFSET ?
+                """,
+                (kind, target_id, keep)
+            ).fetchall()
+            conn.executemany(
+                "DELETE FROM models WHERE kind = ? AND target_id = ? AND version = ?",
+                [(row["kind"], row["target_id"], row["version"]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        return [self._to_dict(row) for row in rows]
+
+    def get(self, kind: str, target_id: str) -> Optional[Dict[str, Any]]:
+        """Current version of a model, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM models WHERE kind = ? AND target_id = ? AND state = 'current'",
+                (kind, target_id)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_current(self, kind: str) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM models WHERE kind = ? AND state = 'current' ORDER BY target_id", (kind,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def history(self, kind: str, target_id: str) -> List[Dict[str, Any]]:
+        """All indexed versions, newest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM models WHERE kind = ? AND target_id = ? ORDER BY {_NEWEST_FIRST}",
+                (kind, target_id)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def is_empty(self, kind: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM models WHERE kind = ? LIMIT 1", (kind,)).fetchone() is None
+
+    def set_targets(self, kind: str, target_ids: Iterable[str]):
+        """Replace the known targets of a kind (e.g. the categories found in the database)"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM targets WHERE kind = ?", (kind,))
+            conn.executemany("INSERT INTO targets VALUES (?, ?)", [(kind, target_id) for target_id in target_ids])
+            conn.execute("COMMIT")
+
+    def targets(self, kind: str) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT target_id FROM targets WHERE kind = ? ORDER BY target_id", (kind,)).fetchall()
+        return [row["target_id"] for row in rows]
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        entry["summary"] = json.loads(entry["summary"])
+        return entry
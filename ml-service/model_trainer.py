@@ -12,16 +12,29 @@ OPTIMIZATIONS:
 import logging
 import json
 import os
+import re
 import shutil
 from datetime import datetime, timedelta, date
-from typing import Dict, Optional, Tuple, List
+from typing import Callable, Dict, Optional, Tuple, List, Union
 import pandas as pd
 import numpy as np
 from prophet import Prophet
 from prophet.serialize import model_to_json, model_from_json
+from fast_engine import FastForecastEngine, UnsupportedModelError
+from model_artifact import atomic_write, atomic_write_json, load_model_bundle, save_model_bundle
 from sqlalchemy import create_engine, text
 from sklearn.preprocessing import StandardScaler
 from timezone_utils import get_current_time_wib, get_current_date_wib, wib_isoformat
+from model_cache import ModelCache, model_cache
+from model_registry import ModelRegistry, file_version
+from forecast_cache import forecast_cache
+from predictor import predictor, residual_interval
+from warm_start import fit_prophet
+from data_fingerprint import compute_fingerprint, fingerprint_matches
+from summary_cache import SummaryCache
+from feature_pipeline import build_training_features
+from backtest import run_backtest, store_model_metrics
+from tuning import tune_profile, save_profile, load_profile
 
 from config import (
     TRAINING_WINDOW_DAYS, MIN_TRAINING_DAYS, VALIDATION_DAYS,
@@ -32,7 +45,10 @@ from config import (
     SCALED_REGRESSORS, BINARY_REGRESSORS, ALL_REGRESSORS, SCALER_VERSION,
     PROPHET_PARAMS_SHORT, PROPHET_PARAMS_MEDIUM, PROPHET_PARAMS_LONG,
     OUTLIER_HANDLING, OUTLIER_CLIP_PERCENTILE,
-    APPLY_SMOOTHING, SMOOTHING_WINDOW, USE_LOG_TRANSFORM
+    APPLY_SMOOTHING, SMOOTHING_WINDOW, USE_LOG_TRANSFORM,
+    FORECAST_MATERIALIZE_ENABLED, FORECAST_MATERIALIZE_DAYS, WARM_START_ENABLED,
+    SKIP_UNCHANGED_RETRAIN, SUMMARY_CACHE_ENABLED, BACKTEST_ENABLED, MODEL_DIR,
+    MODEL_ARTIFACT_FORMAT, MODEL_DEBUG_JSON
 )
 
 logger = logging.getLogger(__name__)
@@ -52,11 +68,23 @@ class ModelTrainer:
     - Multiplicative seasonality
     """
     
-    def __init__(self, engine, model_dir: str = "/app/models"):
+    def __init__(
+        self,
+        engine,
+        model_dir: str = MODEL_DIR,
+        cache: Optional[ModelCache] = None,
+        registry: Optional[ModelRegistry] = None
+    ):
         self.engine = engine
         self.model_dir = model_dir
+        self.cache = cache if cache is not None else model_cache
         os.makedirs(model_dir, exist_ok=True)
         os.makedirs(f"{model_dir}/history", exist_ok=True)
+        self.summary_cache = SummaryCache(f"{model_dir}/cache/daily_sales_summary.parquet")
+        # Manifest of store (and, shared with CategoryTrainer, category) model versions
+        self.registry = registry if registry is not None else ModelRegistry(f"{model_dir}/registry.db")
+        if self.registry.is_empty("store"):
+            self._backfill_registry()
     
     def get_prophet_params(self, data_length: int) -> Dict:
         """
@@ -234,6 +262,20 @@ class ModelTrainer:
         
         logger.info(f"Fetching training data: {start_date} to {end_date}")
         
+        if SUMMARY_CACHE_ENABLED:
+            df = self.summary_cache.fetch(start_date, end_date, self._query_daily_summary)
+        else:
+            df = self._query_daily_summary(start_date, end_date)
+        
+        if df.empty:
+            raise DataQualityError("No training data available")
+        
+        logger.info(f"Fetched {len(df)} days, sales range: [{df['y'].min():.1f}, {df['y'].max():.1f}]")
+        
+        return df
+    
+    def _query_daily_summary(self, start_date: date, end_date: date) -> pd.DataFrame:
+        """Read daily_sales_summary rows for an inclusive date range"""
         query = text("""
             SELECT ds, y, transactions_count, items_sold, avg_ticket,
                    is_weekend, promo_intensity, holiday_intensity,
@@ -254,9 +296,6 @@ class ModelTrainer:
             logger.error(f"Failed to fetch training data: {e}")
             raise
         
-        if df.empty:
-            raise DataQualityError("No training data available")
-        
         # Ensure numeric columns
         numeric_cols = ["y", "transactions_count", "items_sold", "avg_ticket", 
                        "is_weekend", "promo_intensity", "holiday_intensity",
@@ -267,10 +306,23 @@ class ModelTrainer:
                 df[col] = 0.0
             df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
         
-        logger.info(f"Fetched {len(df)} days, sales range: [{df['y'].min():.1f}, {df['y'].max():.1f}]")
-        
         return df
     
+    def data_fingerprint(self, df: pd.DataFrame, tuned_profile: Optional[Dict] = None) -> Dict:
+        """Fingerprint of the fetched training frame plus the settings that shape the fit"""
+        return compute_fingerprint(
+            df,
+            ["y"] + ALL_REGRESSORS,
+            settings={
+                "scaler_version": SCALER_VERSION,
+                "log_transform": USE_LOG_TRANSFORM,
+                "outlier_handling": OUTLIER_HANDLING,
+                "smoothing": APPLY_SMOOTHING,
+                "regressor_prior_scales": REGRESSOR_PRIOR_SCALES,
+                "tuned_profile": (tuned_profile or {}).get("tuned_at"),
+            }
+        )
+    
     def validate_data_quality(self, df: pd.DataFrame) -> Dict:
         """Validate data quality before training"""
         quality_report = {}
@@ -332,11 +384,20 @@ class ModelTrainer:
         self, 
         store_id: str,
         end_date: Optional[date] = None,
-        force_retrain: bool = False
+        force_retrain: bool = False,
+        on_stage: Optional[Callable[[str], None]] = None
     ) -> Tuple[Prophet, Dict]:
         """
         Train Prophet model with adaptive parameters
+        
+        Args:
+            on_stage: Optional callback invoked with the name of each pipeline
+                stage as it starts (used for job progress/timings)
         """
+        def stage(name: str):
+            if on_stage is not None:
+                on_stage(name)
+        
         # Check if retraining needed
         if not force_retrain:
             existing_model, existing_meta = self.load_model(store_id)
@@ -347,75 +408,72 @@ class ModelTrainer:
                     return existing_model, existing_meta
         
         # Fetch data
+        stage("fetch")
         df = self.fetch_training_data(end_date)
         
-        # Validate quality
-        quality_report = self.validate_data_quality(df)
-        
-        # Sort and preprocess
-        df = df.sort_values("ds").copy()
-        
-        # === PREPROCESSING PIPELINE ===
+        tuned_profile = self.load_tuned_profile(store_id)
         
-        # 1. Handle outliers BEFORE other processing
-        df = self.handle_outliers(df)
-        
-        # 2. Add calendar features
-        df = self.add_calendar_features(df)
-        
-        # 3. Add lag/rolling features (CRITICAL for short-term accuracy)
-        df = self.add_lag_features(df)
+        # Skip the fit entirely if the current model was trained on identical data
+        fingerprint = self.data_fingerprint(df, tuned_profile)
+        if SKIP_UNCHANGED_RETRAIN:
+            existing_model, existing_meta = self.load_model(store_id)
+            if existing_model and fingerprint_matches(existing_meta, fingerprint):
+                logger.info(f"Training data unchanged for store {store_id}, keeping model {existing_meta.get('model_version')}")
+                return existing_model, {**existing_meta, "retrain_skipped": "data_unchanged"}
         
-        # 4. Apply smoothing (optional, for noisy data)
-        if APPLY_SMOOTHING:
-            df = self.apply_smoothing(df)
+        # Validate quality
+        stage("preprocess")
+        quality_report = self.validate_data_quality(df)
         
-        # 5. Store original y for accuracy calculation
-        df['y_original'] = df['y'].copy()
+        # === FUSED PREPROCESSING PIPELINE ===
+        # Outliers -> calendar -> lag/rolling -> smoothing -> log -> scaling
+        # in one NumPy pass (see feature_pipeline.py)
+        features = build_training_features(df)
+        train_df = features.train_df
+        active_regressors = features.regressors
+        scaler_params = features.scaler_params
+        y_original = pd.Series(features.y_original)
         
-        # 6. Log transform
         if USE_LOG_TRANSFORM:
-            df['y_log'] = np.log1p(df['y'])
-            logger.info(f"Log transform: y=[{df['y'].min():.1f}, {df['y'].max():.1f}] → y_log=[{df['y_log'].min():.3f}, {df['y_log'].max():.3f}]")
-        else:
-            df['y_log'] = df['y']
+            logger.info(f"Log transform: y=[{y_original.min():.1f}, {y_original.max():.1f}] → y_log=[{train_df['y'].min():.3f}, {train_df['y'].max():.3f}]")
         
         # === SELECT ADAPTIVE PARAMETERS ===
-        prophet_params = self.get_prophet_params(len(df))
+        prophet_params, cv = self._adaptive_prophet_params(y_original)
         
-        # Adjust changepoint scale based on volatility
-        base_scale = prophet_params.get('changepoint_prior_scale', 0.05)
-        changepoint_scale, cv = self.calculate_dynamic_changepoint_scale(df, base_scale)
-        prophet_params['changepoint_prior_scale'] = changepoint_scale
-        
-        # === FIT SCALER ===
-        scaler, scaler_params = self.fit_scaler(df)
+        # A tuned profile (from /ml/tune) overrides the adaptive choice
+        if tuned_profile:
+            prophet_params.update(tuned_profile["prophet_params"])
+            logger.info(f"Using tuned profile from {tuned_profile.get('tuned_at')} (backtest MAPE {tuned_profile.get('score')}%)")
+        changepoint_scale = prophet_params['changepoint_prior_scale']
         
         # === INITIALIZE PROPHET ===
         logger.info(f"Prophet params: {prophet_params}")
         model = Prophet(**prophet_params)
         
         # Add regressors
-        active_regressors = []
-        for reg, prior_scale in REGRESSOR_PRIOR_SCALES.items():
-            if reg in df.columns:
-                model.add_regressor(reg, prior_scale=prior_scale, mode='additive')
-                active_regressors.append(reg)
+        for reg in active_regressors:
+            model.add_regressor(reg, prior_scale=REGRESSOR_PRIOR_SCALES[reg], mode='additive')
         
         logger.info(f"Active regressors ({len(active_regressors)}): {active_regressors}")
         
-        # === APPLY SCALER & TRAIN ===
-        df_scaled = self.apply_scaler(df, scaler_params)
-        
-        train_cols = ["ds", "y_log"] + active_regressors
-        train_df = df_scaled[train_cols].copy().rename(columns={'y_log': 'y'})
+        # Previous model provides the optimizer init for warm-start refits
+        previous_model, previous_meta = None, None
+        if WARM_START_ENABLED:
+            previous_model, previous_meta = self.load_model(store_id)
         
         logger.info(f"Training on {len(train_df)} days...")
-        start_time = get_current_time_wib()
-        model.fit(train_df)
-        training_time = (get_current_time_wib() - start_time).total_seconds()
+        stage("fit")
+        fit_stats = fit_prophet(
+            model, train_df, previous_model, (previous_meta or {}).get("fit_stats")
+        )
+        training_time = fit_stats["fit_seconds"]
         logger.info(f"Training completed in {training_time:.1f}s")
         
+        # In-sample residual quantiles for analytic prediction intervals
+        stage("evaluate")
+        fitted = predictor.predict_point(model, train_df)
+        interval_residuals = residual_interval(train_df['y'].values, fitted)
+        
         # === BUILD METADATA ===
         metadata = {
             "log_transform": USE_LOG_TRANSFORM,
@@ -423,65 +481,201 @@ class ModelTrainer:
             "scaler_version": SCALER_VERSION,
             "scaler_params": scaler_params,
             "training_window_days": TRAINING_WINDOW_DAYS,
-            "data_points": len(df),
-            "start_date": df['ds'].min().isoformat(),
-            "end_date": df['ds'].max().isoformat(),
+            "data_points": len(train_df),
+            "start_date": train_df['ds'].min().isoformat(),
+            "end_date": train_df['ds'].max().isoformat(),
             "cv": round(cv, 4),
             "changepoint_prior_scale": changepoint_scale,
             "prophet_params": prophet_params,
             "regressors": active_regressors,
             "scaled_regressors": [r for r in active_regressors if r in SCALED_REGRESSORS],
             "binary_regressors": [r for r in active_regressors if r in BINARY_REGRESSORS],
-            "y_mean": float(df['y_original'].mean()),
-            "y_std": float(df['y_original'].std()),
+            "y_mean": float(y_original.mean()),
+            "y_std": float(y_original.std()),
             # Add recent averages (last 14 days) for more accurate prediction
-            "y_recent_mean": float(df['y_original'].tail(14).mean()),
-            "y_recent_std": float(df['y_original'].tail(14).std()),
-            "y_last_value": float(df['y_original'].iloc[-1]),
+            "y_recent_mean": float(y_original.tail(14).mean()),
+            "y_recent_std": float(y_original.tail(14).std()),
+            "y_last_value": float(y_original.iloc[-1]),
             "quality_report": quality_report,
             "training_time_seconds": round(training_time, 1),
+            "fit_stats": fit_stats,
+            "data_fingerprint": fingerprint,
+            "interval_residuals": interval_residuals,
+            "tuned_profile": (
+                {key: tuned_profile.get(key) for key in ("score", "baseline_score", "tuned_at")}
+                if tuned_profile else None
+            ),
             "model_version": self._generate_model_version(),
             "saved_at": wib_isoformat()
         }
         
         # === CALCULATE ACCURACY ===
         accuracy, train_mape, val_mape = self._calculate_accuracy_detailed(
-            df, model, metadata, active_regressors, scaler_params
+            y_original.values, fitted
         )
         metadata["accuracy"] = accuracy
         metadata["train_mape"] = train_mape
         metadata["validation_mape"] = val_mape
+        metadata["accuracy_source"] = "in_sample"
+        
+        # === ROLLING-ORIGIN BACKTEST (out-of-sample accuracy) ===
+        if BACKTEST_ENABLED:
+            stage("backtest")
+            self._apply_backtest(
+                metadata, prophet_params, active_regressors, train_df, y_original.values, model, scaler_params
+            )
         
-        logger.info(f"Training completed - Accuracy: {accuracy}%, Train MAPE: {train_mape}%, Val MAPE: {val_mape}%")
+        logger.info(f"Training completed - Accuracy: {metadata['accuracy']}% ({metadata['accuracy_source']}), Train MAPE: {train_mape}%, Val MAPE: {metadata['validation_mape']}%")
         
         # Save model
+        stage("save")
         self.save_model(store_id, model, metadata)
         
+        try:
+            store_model_metrics(self.engine, "store", store_id, metadata, prophet_params)
+        except Exception as e:
+            logger.warning(f"Failed to record model metrics for store {store_id}: {e}")
+        
+        # Precompute default horizon into sales_forecasts (best effort)
+        if FORECAST_MATERIALIZE_ENABLED:
+            stage("materialize")
+            try:
+                self.materialize_forecasts(store_id, model, metadata)
+            except Exception as e:
+                logger.error(f"Failed to materialize forecasts for store {store_id}: {e}", exc_info=True)
+        
         return model, metadata
     
-    def _calculate_accuracy_detailed(
-        self, 
-        df: pd.DataFrame, 
-        model: Prophet,
+    def _adaptive_prophet_params(self, y_original: pd.Series) -> Tuple[Dict, float]:
+        """Profile for the data length with the volatility-adjusted changepoint scale"""
+        prophet_params = self.get_prophet_params(len(y_original))
+        
+        # Adjust changepoint scale based on volatility
+        base_scale = prophet_params.get('changepoint_prior_scale', 0.05)
+        changepoint_scale, cv = self.calculate_dynamic_changepoint_scale(y_original.to_frame('y'), base_scale)
+        prophet_params['changepoint_prior_scale'] = changepoint_scale
+        return prophet_params, cv
+    
+    def tune_model(
+        self,
+        store_id: str,
+        end_date: Optional[date] = None,
+        on_stage: Optional[Callable[[str], None]] = None,
+        **search_options
+    ) -> Optional[Dict]:
+        """
+        Search Prophet hyperparameters for a store and save the winning profile.
+        
+        The next train_model run for the store picks the profile up.
+        
+        Args:
+            search_options: Passed to tuning.tune_profile (max_trials, budget_seconds, ...)
+        
+        Returns:
+            Saved profile, or None if there was not enough data to tune
+        """
+        def stage(name: str):
+            if on_stage is not None:
+                on_stage(name)
+        
+        stage("fetch")
+        df = self.fetch_training_data(end_date)
+        self.validate_data_quality(df)
+        
+        stage("preprocess")
+        features = build_training_features(df)
+        base_params, _ = self._adaptive_prophet_params(pd.Series(features.y_original))
+        regressors = [[reg, REGRESSOR_PRIOR_SCALES[reg]] for reg in features.regressors]
+        
+        stage("search")
+        profile = tune_profile(
+            base_params, regressors, features.train_df, features.y_original, USE_LOG_TRANSFORM,
+            min_train=MIN_TRAINING_DAYS, history_features=self._backtest_history_features(features.scaler_params),
+            **search_options
+        )
+        if profile:
+            save_profile(self._tuned_profile_path(store_id), profile)
+            logger.info(f"Saved tuned profile for store {store_id}: {profile['prophet_params']}")
+        return profile
+    
+    def load_tuned_profile(self, store_id: str) -> Optional[Dict]:
+        return load_profile(self._tuned_profile_path(store_id))
+    
+    def _tuned_profile_path(self, store_id: str) -> str:
+        return f"{self.model_dir}/store_{store_id}_tuned.json"
+    
+    def _apply_backtest(
+        self,
         metadata: Dict,
+        prophet_params: Dict,
         active_regressors: List[str],
+        train_df: pd.DataFrame,
+        y_original: np.ndarray,
+        model: Prophet,
         scaler_params: Dict
+    ):
+        """Run the rolling-origin backtest and report its MAPE as the model accuracy"""
+        spec = {
+            "prophet_params": prophet_params,
+            "regressors": [[reg, REGRESSOR_PRIOR_SCALES[reg]] for reg in active_regressors]
+        }
+        try:
+            backtest = run_backtest(
+                spec, train_df, y_original, USE_LOG_TRANSFORM,
+                init_model=model, min_train=MIN_TRAINING_DAYS,
+                history_features=self._backtest_history_features(scaler_params)
+            )
+        except Exception as e:
+            logger.error(f"Backtest failed: {e}", exc_info=True)
+            return
+        
+        if not backtest or backtest["mape"] is None:
+            return
+        
+        metadata["backtest"] = backtest
+        metadata["in_sample_accuracy"] = metadata["accuracy"]
+        metadata["accuracy"] = round(max(0, min(100, 100 - backtest["mape"])), 1)
+        metadata["validation_mape"] = backtest["mape"]
+        metadata["accuracy_source"] = "backtest"
+    
+    def _backtest_history_features(self, scaler_params: Dict) -> Callable[[pd.DataFrame, np.ndarray], Dict[str, float]]:
+        """
+        Backtest fold values of the lag and transaction regressors: what the
+        predictor fills in for a model trained on the fold's training part
+        (recent sales of that part, scaled like the training frame)
+        """
+        def history_features(train_part: pd.DataFrame, y_history: np.ndarray) -> Dict[str, float]:
+            recent = pd.Series(y_history).tail(14)
+            values = predictor.history_features({
+                "y_recent_mean": float(recent.mean()),
+                "y_recent_std": float(recent.std()),
+            })
+            scaled = predictor._apply_scaler(pd.DataFrame([values]), scaler_params)
+            return {col: float(scaled[col].iloc[0]) for col in values}
+        
+        return history_features
+    
+    def _calculate_accuracy_detailed(
+        self, 
+        y_original: np.ndarray,
+        fitted: np.ndarray
     ) -> Tuple[float, float, float]:
         """
         Calculate train MAPE, validation MAPE, and accuracy
         
+        Args:
+            y_original: Target on the original scale
+            fitted: In-sample point predictions (model scale) for the same rows;
+                the last VALIDATION_DAYS rows form the validation slice
+        
         Returns:
             (accuracy, train_mape, val_mape)
         """
-        if len(df) < MIN_TRAINING_DAYS + VALIDATION_DAYS:
+        if len(y_original) < MIN_TRAINING_DAYS + VALIDATION_DAYS:
             logger.warning("Insufficient data for validation")
             return 0.0, 0.0, 0.0
         
-        # Split data
-        train_df = df.iloc[:-VALIDATION_DAYS].copy()
-        val_df = df.iloc[-VALIDATION_DAYS:].copy()
-        
-        logger.info(f"Split: train={len(train_df)}, validation={len(val_df)}")
+        logger.info(f"Split: train={len(y_original) - VALIDATION_DAYS}, validation={VALIDATION_DAYS}")
         
         def calculate_mape(actual: np.ndarray, predicted: np.ndarray) -> float:
             mask = actual > 0
@@ -491,28 +685,19 @@ class ModelTrainer:
             return np.mean(np.abs((actual[mask] - predicted[mask]) / actual[mask])) * 100
         
         try:
-            # === TRAIN MAPE ===
-            train_scaled = self.apply_scaler(train_df[["ds"] + active_regressors], scaler_params)
-            train_forecast = model.predict(train_scaled[["ds"] + active_regressors])
-            
             if USE_LOG_TRANSFORM:
-                train_pred = np.expm1(train_forecast['yhat'].values.clip(-10, 20))
+                predicted = np.expm1(np.clip(fitted, -10, 20))
             else:
-                train_pred = train_forecast['yhat'].values
+                predicted = np.asarray(fitted)
             
-            train_actual = train_df['y_original'].values
+            # === TRAIN MAPE ===
+            train_pred = predicted[:-VALIDATION_DAYS]
+            train_actual = y_original[:-VALIDATION_DAYS]
             train_mape = calculate_mape(train_actual, train_pred)
             
             # === VALIDATION MAPE ===
-            val_scaled = self.apply_scaler(val_df[["ds"] + active_regressors], scaler_params)
-            val_forecast = model.predict(val_scaled[["ds"] + active_regressors])
-            
-            if USE_LOG_TRANSFORM:
-                val_pred = np.expm1(val_forecast['yhat'].values.clip(-10, 20))
-            else:
-                val_pred = val_forecast['yhat'].values
-            
-            val_actual = val_df['y_original'].values
+            val_pred = predicted[-VALIDATION_DAYS:]
+            val_actual = y_original[-VALIDATION_DAYS:]
             val_mape = calculate_mape(val_actual, val_pred)
             
             # Accuracy from validation
@@ -529,93 +714,391 @@ class ModelTrainer:
             return 0.0, 0.0, 0.0
     
     def save_model(self, store_id: str, model: Prophet, metadata: Dict):
-        """Save model with versioning"""
-        model_path = f"{self.model_dir}/store_{store_id}.json"
+        """
+        Save model with versioning
+        
+        The model and its metadata are published together as one bundle
+        (store_{id}.npz) with an atomic rename, so concurrent predictions
+        read either the previous or the new version, never a partial one.
+        The bundle holds the compact FastForecastEngine state unless
+        MODEL_ARTIFACT_FORMAT is "json" or the model layout is not supported
+        by the NumPy engine, in which case it holds the full Prophet JSON.
+        store_{id}_meta.json is a copy of the metadata for tooling, and
+        store_{id}.json a full JSON dump when MODEL_DEBUG_JSON is set; the
+        serving path reads neither.
+        
+        The cached model is then swapped for the new version, so readers
+        move over without a cold load.
+        """
+        compact_path, json_path = self._model_paths(store_id)
         meta_path = f"{self.model_dir}/store_{store_id}_meta.json"
         
-        if os.path.exists(model_path):
-            self._archive_model(store_id)
+        archived = None
+        if os.path.exists(compact_path) or os.path.exists(json_path):
+            archived = self._archive_model(store_id)
+        
+        engine = None
+        if MODEL_ARTIFACT_FORMAT == "compact":
+            try:
+                engine = FastForecastEngine.from_prophet(model)
+            except UnsupportedModelError as e:
+                logger.warning(f"Compact artifact unavailable for store {store_id}, bundling full JSON: {e}")
         
         try:
-            with open(model_path, "w") as f:
-                f.write(model_to_json(model))
+            save_model_bundle(
+                compact_path, engine if engine is not None else model, metadata, metadata.get("scaler_params")
+            )
+            atomic_write_json(meta_path, metadata, indent=2)
             
-            with open(meta_path, "w") as f:
-                json.dump(metadata, f, indent=2)
+            if MODEL_DEBUG_JSON:
+                body = model_to_json(model).encode("utf-8")
+                atomic_write(json_path, lambda f: f.write(body))
+            elif os.path.exists(json_path):
+                os.remove(json_path)  # pre-bundle artifact, superseded
             
-            logger.info(f"Model saved: {model_path}")
+            self.registry.publish(
+                "store", store_id, metadata["model_version"], compact_path, meta_path, metadata, archived=archived
+            )
+            self._cleanup_old_history(store_id)
+            logger.info(f"Model saved: {compact_path}")
         except Exception as e:
             logger.error(f"Failed to save model: {e}")
+            self.cache.invalidate(("store", store_id))
+            forecast_cache.invalidate_store(store_id)
             raise
+        
+        self.refresh_cached_model(store_id)
+        forecast_cache.invalidate_store(store_id)
+    
+    def fetch_calendar_events(self, start_date: date, end_date: date) -> List[Dict]:
+        """Fetch known calendar events in [start_date, end_date] in predictor format"""
+        query = text("""
+            SELECT date, type, impact_weight
+            FROM calendar_events
+            WHERE date >= :start_date AND date <= :end_date
+            ORDER BY date
+        """)
+        
+        with self.engine.connect() as conn:
+            rows = conn.execute(query, {"start_date": start_date, "end_date": end_date}).fetchall()
+        
+        return [
+            {
+                "date": str(row[0])[:10],
+                "type": row[1] or "event",
+                "impact": float(row[2]) if row[2] is not None else 1.0
+            }
+            for row in rows
+        ]
+    
+    def materialize_forecasts(
+        self,
+        store_id: str,
+        model: Prophet,
+        metadata: Dict,
+        days: int = FORECAST_MATERIALIZE_DAYS
+    ) -> int:
+        """
+        Precompute the default forecast horizon (with known calendar events)
+        and bulk-upsert it into sales_forecasts in a single statement.
+        
+        Rows are stored before the baseline adjustment and the clipping to
+        >= 0: the adjustment depends on the requested horizon, so both are
+        applied when a slice is served (see predict_from_materialized).
+        
+        Returns:
+            Number of rows written
+        """
+        start_date = get_current_date_wib() + timedelta(days=1)
+        end_date = start_date + timedelta(days=days - 1)
+        
+        events = self.fetch_calendar_events(start_date, end_date)
+        predictions = predictor.predict_with_events(
+            model=model,
+            metadata=metadata,
+            periods=days,
+            events=events,
+            start_date=start_date,
+            adjust_baseline=False
+        )
+        if not predictions:
+            return 0
+        
+        params = {
+            "store_id": str(store_id),
+            "model_version": metadata.get("model_version"),
+            "generated_at": get_current_time_wib(),
+        }
+        values = []
+        for i, pred in enumerate(predictions):
+            values.append(f"(:store_id, :d{i}, :f{i}, :l{i}, :u{i}, :model_version, :generated_at)")
+            params[f"d{i}"] = date.fromisoformat(pred["ds"])
+            params[f"f{i}"] = pred["yhat"]
+            params[f"l{i}"] = pred["yhat_lower"]
+            params[f"u{i}"] = pred["yhat_upper"]
+        
+        query = text(f"""
+            INSERT INTO sales_forecasts
+                (store_id, date, forecast, lower_bound, upper_bound, model_version, generated_at)
+            VALUES {", ".join(values)}
+            ON CONFLICT (store_id, date) DO UPDATE SET
+                forecast = EXCLUDED.forecast,
+                lower_bound = EXCLUDED.lower_bound,
+                upper_bound = EXCLUDED.upper_bound,
+                model_version = EXCLUDED.model_version,
+                generated_at = EXCLUDED.generated_at
+        """)
+        
+        with self.engine.begin() as conn:
+            conn.execute(query, params)
+        
+        logger.info(
+            f"Materialized {len(predictions)} forecast days for store {store_id} "
+            f"({len(events)} calendar events, model {metadata.get('model_version')})"
+        )
+        return len(predictions)
+    
+    def load_materialized_forecasts(
+        self,
+        store_id: str,
+        model_version: Optional[str],
+        start_date: date,
+        periods: int
+    ) -> Optional[pd.DataFrame]:
+        """
+        Read a precomputed (unadjusted) forecast from sales_forecasts.
+        
+        Returns None unless every requested day exists for this model version.
+        """
+        if not FORECAST_MATERIALIZE_ENABLED or not model_version:
+            return None
+        
+        end_date = start_date + timedelta(days=periods - 1)
+        query = text("""
+            SELECT date, forecast, lower_bound, upper_bound
+            FROM sales_forecasts
+            WHERE store_id = :store_id AND model_version = :model_version
+              AND date >= :start_date AND date <= :end_date
+            ORDER BY date
+        """)
+        
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(query, {
+                    "store_id": str(store_id),
+                    "model_version": model_version,
+                    "start_date": start_date,
+                    "end_date": end_date
+                }).fetchall()
+        except Exception as e:
+            logger.warning(f"Materialized forecast lookup failed: {e}")
+            return None
+        
+        if len(rows) != periods:
+            return None
+        
+        forecast = pd.DataFrame(rows, columns=["ds", "yhat", "yhat_lower", "yhat_upper"])
+        forecast["ds"] = pd.to_datetime(forecast["ds"])
+        for col in ["yhat", "yhat_lower", "yhat_upper"]:
+            forecast[col] = pd.to_numeric(forecast[col], errors="coerce").astype(float)
+        forecast["yhat_lower"] = forecast["yhat_lower"].fillna(forecast["yhat"])
+        forecast["yhat_upper"] = forecast["yhat_upper"].fillna(forecast["yhat"])
+        return forecast
     
-    def load_model(self, store_id: str) -> Tuple[Optional[Prophet], Optional[Dict]]:
-        """Load model with metadata"""
-        model_path = f"{self.model_dir}/store_{store_id}.json"
+    def load_model(self, store_id: str) -> Tuple[Optional[Union[Prophet, FastForecastEngine]], Optional[Dict]]:
+        """
+        Load model with metadata (served from the in-memory cache when fresh)
+        
+        Returns the model of the store_{id}.npz bundle if one exists (a
+        FastForecastEngine, or a Prophet model for full-JSON bundles),
+        otherwise the Prophet model of a store_{id}.json saved before bundles.
+        """
+        # Warm path: lock-free cache lookup, no filesystem access until the
+        # entry is due for revalidation
+        cache_key = ("store", store_id)
+        cached = self.cache.get(cache_key, lambda: self._artifact_signature(store_id))
+        if cached is not None:
+            return cached
+        
+        loaded = self._read_model(store_id)
+        if loaded is None:
+            return None, None
+        model, metadata, signature = loaded
+        
+        # Only cache if the artifact did not change while we were reading it
+        if self._artifact_signature(store_id) == signature:
+            self.cache.put(cache_key, model, metadata, signature, self._signature_size(signature))
+        
+        return model, metadata
+    
+    def refresh_cached_model(self, store_id: str):
+        """
+        Load the published version of a store model and swap it into the
+        cache (readers keep using the previous entry until the swap).
+        """
+        cache_key = ("store", store_id)
+        loaded = self._read_model(store_id)
+        if loaded is None:
+            self.cache.invalidate(cache_key)
+            return
+        model, metadata, signature = loaded
+        self.cache.put(cache_key, model, metadata, signature, self._signature_size(signature))
+    
+    def _read_model(self, store_id: str) -> Optional[Tuple[Union[Prophet, FastForecastEngine], Dict, Tuple]]:
+        """
+        Read a store model from disk, bypassing the cache.
+        
+        Returns:
+            (model, metadata, signature) or None if missing / unreadable
+        """
+        compact_path, _ = self._model_paths(store_id)
         meta_path = f"{self.model_dir}/store_{store_id}_meta.json"
         
+        model_path = self._current_model_path(store_id)
         if not os.path.exists(model_path):
-            return None, None
+            return None
+        signature = self._artifact_signature(store_id)
         
+        metadata = None
+        artifact_scaler_params = None
         try:
-            with open(model_path, "r") as f:
-                model = model_from_json(f.read())
+            if model_path == compact_path:
+                model, metadata, artifact_scaler_params = load_model_bundle(model_path)
+            else:
+                with open(model_path, "r") as f:
+                    model = model_from_json(f.read())
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
-            return None, None
+            return None
         
-        metadata = {}
-        if os.path.exists(meta_path):
+        if metadata is None:
+            # Saved before metadata was bundled with the model
+            metadata = {}
+            if os.path.exists(meta_path):
+                try:
+                    with open(meta_path, "r") as f:
+                        metadata = json.load(f)
+                except Exception as e:
+                    logger.error(f"Failed to load metadata: {e}")
+        if 'log_transform' not in metadata:
+            metadata['log_transform'] = True
+        if artifact_scaler_params and not metadata.get('scaler_params'):
+            metadata['scaler_params'] = artifact_scaler_params
+        
+        return model, metadata, signature
+    
+    def _model_paths(self, store_id: str) -> Tuple[str, str]:
+        """(bundle .npz, legacy/debug full .json) artifact paths of a store model"""
+        base = f"{self.model_dir}/store_{store_id}"
+        return f"{base}.npz", f"{base}.json"
+    
+    def _current_model_path(self, store_id: str) -> str:
+        """Artifact load_model reads: the bundle if present"""
+        compact_path, json_path = self._model_paths(store_id)
+        return compact_path if os.path.exists(compact_path) else json_path
+    
+    def _artifact_signature(self, store_id: str) -> Tuple:
+        """
+        (path, mtime, size) of the served artifact, used for cache
+        invalidation; a legacy JSON model adds its metadata file
+        """
+        def _stat(path: str) -> Tuple[Optional[int], Optional[int]]:
             try:
-                with open(meta_path, "r") as f:
-                    metadata = json.load(f)
-                if 'log_transform' not in metadata:
-                    metadata['log_transform'] = True
-            except Exception as e:
-                logger.error(f"Failed to load metadata: {e}")
-                metadata = {'log_transform': True}
-        else:
-            metadata = {'log_transform': True}
-        
-        return model, metadata
+                st = os.stat(path)
+                return st.st_mtime_ns, st.st_size
+            except OSError:
+                return None, None
+        
+        model_path = self._current_model_path(store_id)
+        signature = (model_path, *_stat(model_path))
+        if not model_path.endswith(".npz"):
+            signature += _stat(f"{self.model_dir}/store_{store_id}_meta.json")
+        return signature
+    
+    @staticmethod
+    def _signature_size(signature: Tuple) -> int:
+        return sum(size or 0 for size in signature[2::2])
     
-    def _archive_model(self, store_id: str):
-        """Archive old model"""
-        model_path = f"{self.model_dir}/store_{store_id}.json"
+    def _archive_model(self, store_id: str) -> Optional[Tuple[str, str]]:
+        """
+        Copy the current model files to history/
+        
+        Returns:
+            (artifact, metadata) paths of the archived copy, None on failure
+        """
+        compact_path, json_path = self._model_paths(store_id)
         meta_path = f"{self.model_dir}/store_{store_id}_meta.json"
         
         timestamp = get_current_time_wib().strftime("%Y%m%d_%H%M%S")
-        archive_model = f"{self.model_dir}/history/store_{store_id}_{timestamp}.json"
-        archive_meta = f"{self.model_dir}/history/store_{store_id}_{timestamp}_meta.json"
+        archive_base = f"{self.model_dir}/history/store_{store_id}_{timestamp}"
         
         try:
-            if os.path.exists(model_path):
-                shutil.copy2(model_path, archive_model)
-            if os.path.exists(meta_path):
-                shutil.copy2(meta_path, archive_meta)
-            self._cleanup_old_history(store_id)
+            for path, suffix in ((compact_path, ".npz"), (json_path, ".json"), (meta_path, "_meta.json")):
+                if os.path.exists(path):
+                    shutil.copy2(path, f"{archive_base}{suffix}")
         except Exception as e:
             logger.warning(f"Failed to archive: {e}")
+            return None
+        
+        suffix = ".npz" if os.path.exists(compact_path) else ".json"
+        return f"{archive_base}{suffix}", f"{archive_base}_meta.json"
     
     def _cleanup_old_history(self, store_id: str):
-        """Keep only last N versions"""
-        history_dir = f"{self.model_dir}/history"
-        
+        """Keep only last N versions (the registry lists them, no directory scan)"""
         try:
-            import glob
-            history_files = sorted(
-                glob.glob(f"{history_dir}/store_{store_id}_*_meta.json"), 
-                reverse=True
-            )
-            
-            for old_file in history_files[KEEP_MODEL_HISTORY:]:
-                base = old_file.replace("_meta.json", "")
-                if os.path.exists(old_file):
-                    os.remove(old_file)
-                if os.path.exists(f"{base}.json"):
-                    os.remove(f"{base}.json")
+            for entry in self.registry.prune("store", store_id, KEEP_MODEL_HISTORY):
+                base = os.path.splitext(entry["path"])[0]
+                for path in (entry["meta_path"], f"{base}.npz", f"{base}.json"):
+                    if path and os.path.exists(path):
+                        os.remove(path)
         except Exception as e:
             logger.warning(f"Cleanup failed: {e}")
     
+    def _backfill_registry(self):
+        """Index models saved before the registry existed (runs once, on an empty registry)"""
+        history_meta = re.compile(r"^store_(?P<id>.+)_(?P<timestamp>\d{8}_\d{6})_meta\.json$")
+        indexed = 0
+        
+        def read_metadata(path: str) -> Dict:
+            try:
+                with open(path, "r") as f:
+                    return json.load(f)
+            except Exception:
+                return {}
+        
+        for name in sorted(os.listdir(self.model_dir)):
+            match = re.match(r"^store_(?P<id>.+)_meta\.json$", name)
+            if not match:
+                continue
+            store_id = match.group("id")
+            model_path = self._current_model_path(store_id)
+            if not os.path.exists(model_path):
+                continue
+            meta_path = f"{self.model_dir}/{name}"
+            metadata = read_metadata(meta_path)
+            version = metadata.get("model_version") or file_version(model_path)
+            self.registry.publish("store", store_id, version, model_path, meta_path, metadata)
+            indexed += 1
+        
+        history_dir = f"{self.model_dir}/history"
+        for name in sorted(os.listdir(history_dir)):
+            match = history_meta.match(name)
+            if not match:
+                continue
+            base = f"{history_dir}/{name[:-len('_meta.json')]}"
+            model_path = f"{base}.npz" if os.path.exists(f"{base}.npz") else f"{base}.json"
+            if not os.path.exists(model_path):
+                continue
+            metadata = read_metadata(f"{base}_meta.json")
+            self.registry.add_archived(
+                "store", match.group("id"), metadata.get("model_version") or match.group("timestamp"),
+                model_path, f"{base}_meta.json", metadata
+            )
+            indexed += 1
+        
+        if indexed:
+            logger.info(f"Indexed {indexed} existing store model file(s) in the model registry")
+    
     def _generate_model_version(self) -> str:
         return get_current_time_wib().strftime("%Y%m%d_%H%M%S")
     
@@ -3,16 +3,111 @@ Prophet Predictor Module
 Handles forecast generation with event calendar integration
 """
 
+import copy
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
 from prophet import Prophet
 from typing import List, Dict, Any, Optional
+from statistics import NormalDist
 import logging
 from timezone_utils import get_current_date_wib
+from fast_engine import FastForecastEngine, get_engine
+from fallback_engines import is_fallback_engine
+from serialization import FORECAST_VALUE_COLUMNS, records_from_columns
+from config import FAST_ENGINE_ENABLED, INTERVAL_MODE, INTERVAL_SAMPLES, INTERVAL_WIDTH
 
 logger = logging.getLogger(__name__)
 
+INTERVAL_MODES = ("none", "analytic", "sampled")
+
+# Regressor column per event type (any other type -> event_intensity)
+EVENT_COLUMNS = ("promo_intensity", "holiday_intensity", "event_intensity", "closure_intensity")
+_EVENT_COLUMN_INDEX = {"promotion": 0, "holiday": 1, "event": 2, "store-closed": 3}
+
+
+def residual_interval(
+    actual: np.ndarray,
+    fitted: np.ndarray,
+    width: float = INTERVAL_WIDTH
+) -> Dict[str, float]:
+    """
+    Residual quantiles of the in-sample fit, used for analytic intervals.
+    
+    Offsets are in model space (log scale if the model was log-transformed)
+    and are added to yhat before the inverse transform.
+    """
+    residuals = np.asarray(actual, dtype=float) - np.asarray(fitted, dtype=float)
+    residuals = residuals[np.isfinite(residuals)]
+    if len(residuals) == 0:
+        return {"width": width, "lower": 0.0, "upper": 0.0}
+    
+    return {
+        "width": width,
+        "lower": float(np.quantile(residuals, (1 - width) / 2)),
+        "upper": float(np.quantile(residuals, (1 + width) / 2)),
+    }
+
+
+def event_intensities(ds: pd.Series, events: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Event regressor columns for the rows of ds (ascending dates).
+    
+    Events are parsed once into typed arrays and mapped to row offsets by
+    integer day arithmetic; each column takes the largest impact of the
+    events on a day (np.maximum.at), so the result does not depend on
+    event order - the forecast cache hashes events order-independently.
+    Days without events are 0.
+    
+    Returns:
+        {column: float array} for every column in EVENT_COLUMNS
+    """
+    days = pd.DatetimeIndex(ds).values.astype('datetime64[D]').astype(np.int64)
+    values = np.full((len(EVENT_COLUMNS), len(days)), -np.inf)
+    
+    if events and len(days):
+        event_days = pd.to_datetime(
+            pd.Series([event.get('date') for event in events], dtype=object), errors='coerce', format='ISO8601'
+        )
+        invalid = event_days.isna().to_numpy()
+        if invalid.any():
+            logger.warning(f"Invalid event dates: {[events[i].get('date') for i in np.flatnonzero(invalid)]}")
+        
+        columns = np.array([
+            _EVENT_COLUMN_INDEX.get(event.get('type', 'event'), _EVENT_COLUMN_INDEX['event'])
+            for event in events
+        ])
+        impacts = np.array([float(event.get('impact', 1.0)) for event in events])
+        impacts[columns == _EVENT_COLUMN_INDEX['store-closed']] = 1.0  # Full closure
+        
+        event_days = event_days.to_numpy().astype('datetime64[D]').astype(np.int64)
+        rows = np.searchsorted(days, event_days)
+        in_range = ~invalid & (rows < len(days))
+        in_range[in_range] &= days[rows[in_range]] == event_days[in_range]
+        
+        np.maximum.at(values, (columns[in_range], rows[in_range]), impacts[in_range])
+    
+    values[np.isneginf(values)] = 0.0
+    return dict(zip(EVENT_COLUMNS, values))
+
+
+def forecast_columns(forecast: pd.DataFrame, ds_unit: str = 'D') -> Dict[str, Any]:
+    """
+    Columnar form of a forecast frame (see serialization.py)
+    
+    Args:
+        forecast: DataFrame with ds, yhat, yhat_lower, yhat_upper
+        ds_unit: 'D' for 'YYYY-MM-DD' dates, 's' for 'YYYY-MM-DDTHH:MM:SS'
+    
+    Returns:
+        {"ds": [str], "yhat"/"yhat_lower"/"yhat_upper": float64 arrays}
+    """
+    ds = pd.DatetimeIndex(forecast['ds']).values.astype(f'datetime64[{ds_unit}]')
+    columns = {'ds': np.datetime_as_string(ds, unit=ds_unit).tolist()}
+    for name in FORECAST_VALUE_COLUMNS:
+        columns[name] = forecast[name].to_numpy(dtype=np.float64)
+    return columns
+
 
 class Predictor:
     """
@@ -28,7 +123,8 @@ class Predictor:
         periods: int,
         events: List[Dict[str, Any]],
         metadata: Dict[str, Any],
-        start_date: Optional[date] = None
+        start_date: Optional[date] = None,
+        calendars: Optional[Dict[tuple, pd.DataFrame]] = None
     ) -> pd.DataFrame:
         """
         Generate future dataframe with all required regressors
@@ -39,6 +135,8 @@ class Predictor:
             events: List of calendar events
             metadata: Model metadata with scaler params and regressors
             start_date: Start date for forecast (default: tomorrow)
+            calendars: Calendar frames by (start_date, periods), shared by
+                the models of a batch request (filled on first use)
         
         Returns:
             DataFrame with ds and all regressor columns
@@ -46,52 +144,26 @@ class Predictor:
         if start_date is None:
             start_date = get_current_date_wib() + timedelta(days=1)
         
-        # Create date range
-        future_dates = pd.date_range(
-            start=start_date,
-            periods=periods,
-            freq='D'
-        )
-        
-        future_df = pd.DataFrame({'ds': future_dates})
-        
-        # Add basic calendar features
-        future_df['is_weekend'] = future_df['ds'].dt.dayofweek.isin([5, 6]).astype(int)
-        future_df['is_payday'] = (
-            future_df['ds'].dt.day.isin([25, 26, 27, 28, 29, 30, 31]) | 
-            (future_df['ds'].dt.day <= 5)
-        ).astype(int)
-        future_df['is_month_start'] = (future_df['ds'].dt.day <= 5).astype(int)
-        future_df['is_month_end'] = (future_df['ds'].dt.day >= 26).astype(int)
+        if calendars is None:
+            future_df = self.calendar_frame(start_date, periods)
+        else:
+            key = (start_date, periods)
+            if key not in calendars:
+                calendars[key] = self.calendar_frame(start_date, periods)
+            future_df = calendars[key].copy()
         
-        # Add event-based regressors
-        future_df['promo_intensity'] = 0.0
-        future_df['holiday_intensity'] = 0.0
-        future_df['event_intensity'] = 0.0
-        future_df['closure_intensity'] = 0.0
-        
-        # Process calendar events
-        if events:
-            future_df = self._apply_events_to_dataframe(future_df, events)
+        # Add event-based regressors (0 on days without events)
+        future_df = self._apply_events_to_dataframe(future_df, events or [])
         
         # Add default calendar features (if not from events)
         future_df['is_day_before_holiday'] = 0
         future_df['is_school_holiday'] = 0
         
-        # Add lag features (use RECENT historical data for more accurate prediction)
-        # Use y_recent_mean (last 14 days) if available, fallback to y_mean
-        recent_mean = metadata.get('y_recent_mean', metadata.get('y_mean', 0))
-        recent_std = metadata.get('y_recent_std', metadata.get('y_std', 0))
-        
-        future_df['lag_7'] = recent_mean
-        future_df['rolling_mean_7'] = recent_mean
-        future_df['rolling_std_7'] = recent_std
-        
-        logger.info(f"Lag features set to recent_mean={recent_mean:.1f} (y_mean={metadata.get('y_mean', 0):.1f})")
+        # Lag and transaction features (not known in advance, filled from history)
+        for col, value in self.history_features(metadata).items():
+            future_df[col] = value
         
-        # Add transaction features (use historical averages)
-        future_df['transactions_count'] = metadata.get('avg_transactions', 0)
-        future_df['avg_ticket'] = metadata.get('avg_ticket_value', 0)
+        logger.info(f"Lag features set to recent_mean={future_df['lag_7'].iloc[0]:.1f} (y_mean={metadata.get('y_mean', 0):.1f})")
         
         # Apply scaler to scaled regressors
         future_df = self._apply_scaler(future_df, metadata.get('scaler_params', {}))
@@ -101,13 +173,45 @@ class Predictor:
         
         return future_df
     
+    def history_features(self, metadata: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Unscaled forecast values of the regressors that depend on sales history
+        
+        Lag features use RECENT historical data: y_recent_mean / y_recent_std
+        (last 14 days) if available, falling back to y_mean / y_std.
+        Transaction features use the historical averages.
+        """
+        recent_mean = metadata.get('y_recent_mean', metadata.get('y_mean', 0))
+        recent_std = metadata.get('y_recent_std', metadata.get('y_std', 0))
+        return {
+            'lag_7': recent_mean,
+            'rolling_mean_7': recent_mean,
+            'rolling_std_7': recent_std,
+            'transactions_count': metadata.get('avg_transactions', 0),
+            'avg_ticket': metadata.get('avg_ticket_value', 0),
+        }
+    
+    def calendar_frame(self, start_date: date, periods: int) -> pd.DataFrame:
+        """Date range with the model-independent calendar features"""
+        future_df = pd.DataFrame({'ds': pd.date_range(start=start_date, periods=periods, freq='D')})
+        
+        future_df['is_weekend'] = future_df['ds'].dt.dayofweek.isin([5, 6]).astype(int)
+        future_df['is_payday'] = (
+            future_df['ds'].dt.day.isin([25, 26, 27, 28, 29, 30, 31]) | 
+            (future_df['ds'].dt.day <= 5)
+        ).astype(int)
+        future_df['is_month_start'] = (future_df['ds'].dt.day <= 5).astype(int)
+        future_df['is_month_end'] = (future_df['ds'].dt.day >= 26).astype(int)
+        
+        return future_df
+    
     def _apply_events_to_dataframe(
         self,
         df: pd.DataFrame,
         events: List[Dict[str, Any]]
     ) -> pd.DataFrame:
         """
-        Apply calendar events to regressor columns
+        Apply calendar events to regressor columns (in place, see event_intensities)
         
         Event types:
         - promotion: affects promo_intensity
@@ -115,36 +219,8 @@ class Predictor:
         - event: affects event_intensity
         - store-closed: affects closure_intensity (sets to 1)
         """
-        df = df.copy()
-        
-        for event in events:
-            event_date = event.get('date')
-            event_type = event.get('type', 'event')
-            impact = event.get('impact', 1.0)
-            
-            # Parse event date
-            if isinstance(event_date, str):
-                try:
-                    event_date = pd.to_datetime(event_date).date()
-                except:
-                    logger.warning(f"Invalid event date: {event_date}")
-                    continue
-            
-            # Find matching rows
-            mask = df['ds'].dt.date == event_date
-            
-            if not mask.any():
-                continue
-            
-            # Apply event impact to appropriate regressor
-            if event_type == 'promotion':
-                df.loc[mask, 'promo_intensity'] = impact
-            elif event_type == 'holiday':
-                df.loc[mask, 'holiday_intensity'] = impact
-            elif event_type == 'store-closed':
-                df.loc[mask, 'closure_intensity'] = 1.0  # Full closure
-            else:  # 'event' or default
-                df.loc[mask, 'event_intensity'] = impact
+        for column, values in event_intensities(df['ds'], events).items():
+            df[column] = values
         
         return df
     
@@ -181,11 +257,105 @@ class Predictor:
         
         return df
     
+    def predict_point(self, model: Prophet, df: pd.DataFrame) -> np.ndarray:
+        """
+        Point forecast (yhat) in model space, without any uncertainty simulation
+        """
+        if is_fallback_engine(model):
+            return model.predict(df['ds'])['yhat']
+        
+        if isinstance(model, FastForecastEngine):
+            engine = model  # compact artifact (see model_artifact.py)
+        else:
+            engine = get_engine(model) if FAST_ENGINE_ENABLED else None
+        if engine is not None:
+            result = engine.predict(df['ds'], df[engine.regressors].to_numpy(dtype=np.float64))
+            return result['yhat']
+        
+        prepared = model.setup_dataframe(df.copy())
+        trend = np.asarray(model.predict_trend(prepared), dtype=float)
+        seasonal = model.predict_seasonal_components(prepared)
+        return (
+            trend * (1 + seasonal['multiplicative_terms'].values)
+            + seasonal['additive_terms'].values
+        )
+    
+    def forecast_with_intervals(
+        self,
+        model: Prophet,
+        predict_df: pd.DataFrame,
+        metadata: Dict[str, Any],
+        interval_mode: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Raw forecast in model space (before inverse transform/adjustments)
+        
+        Returns:
+            DataFrame with ds, yhat, yhat_lower, yhat_upper
+        """
+        mode = self.effective_interval_mode(model, interval_mode)
+        
+        if mode == "sampled":
+            # Shallow copy so the shared (cached) model object is never mutated
+            sampler = copy.copy(model)
+            sampler.uncertainty_samples = INTERVAL_SAMPLES
+            forecast = sampler.predict(predict_df)
+            return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+        
+        yhat = self.predict_point(model, predict_df)
+        
+        if mode == "none":
+            lower_offset, upper_offset = 0.0, 0.0
+        else:
+            lower_offset, upper_offset = self._analytic_offsets(model, metadata)
+        
+        return pd.DataFrame({
+            'ds': pd.to_datetime(predict_df['ds']).reset_index(drop=True),
+            'yhat': yhat,
+            'yhat_lower': yhat + lower_offset,
+            'yhat_upper': yhat + upper_offset,
+        })
+    
+    def effective_interval_mode(self, model: Prophet, interval_mode: Optional[str] = None) -> str:
+        """
+        Interval mode a forecast of the model actually uses
+        
+        "sampled" needs a full Prophet model to simulate; compact artifacts
+        and fallback engines get "analytic" (residual quantiles) instead.
+        """
+        mode = interval_mode or INTERVAL_MODE
+        if mode not in INTERVAL_MODES:
+            raise ValueError(f"Invalid interval mode '{mode}', expected one of {INTERVAL_MODES}")
+        if mode == "sampled" and (is_fallback_engine(model) or isinstance(model, FastForecastEngine)):
+            return "analytic"
+        return mode
+    
+    def _analytic_offsets(self, model: Prophet, metadata: Dict[str, Any]) -> tuple:
+        """
+        Interval offsets around yhat: stored residual quantiles, or the
+        observation-noise band (sigma_obs) for models trained before they existed
+        """
+        residuals = metadata.get('interval_residuals')
+        if residuals:
+            return residuals['lower'], residuals['upper']
+        if is_fallback_engine(model):
+            return 0.0, 0.0
+        
+        if isinstance(model, FastForecastEngine):
+            sigma_obs = model.sigma_obs
+        else:
+            sigma_obs = float(np.nanmean(model.params['sigma_obs'])) if 'sigma_obs' in model.params else 0.0
+        z = NormalDist().inv_cdf(0.5 + model.interval_width / 2)
+        half_width = z * sigma_obs * model.y_scale
+        return -half_width, half_width
+    
     def predict(
         self,
         model: Prophet,
         future_df: pd.DataFrame,
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        interval_mode: Optional[str] = None,
+        adjust_baseline: bool = True
     ) -> pd.DataFrame:
         """
         Generate forecast predictions
@@ -194,10 +364,24 @@ class Predictor:
             model: Trained Prophet model
             future_df: Future dataframe with all regressors
             metadata: Model metadata
+            interval_mode: "none", "analytic" or "sampled" (default: INTERVAL_MODE)
+            adjust_baseline: Apply the recent-sales baseline adjustment and
+                clip to >= 0
         
         Returns:
             Forecast dataframe with predictions
         """
+        forecast = self._raw_forecast(model, future_df, metadata, interval_mode)
+        return self._finish_forecast(forecast, metadata, adjust_baseline)
+    
+    def _raw_forecast(
+        self,
+        model: Prophet,
+        future_df: pd.DataFrame,
+        metadata: Dict[str, Any],
+        interval_mode: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Forecast in model space (see predict)"""
         # Get active regressors from metadata
         active_regressors = metadata.get('regressors', [])
         
@@ -214,17 +398,55 @@ class Predictor:
         # Select only required columns for prediction
         predict_df = future_df[required_cols].copy()
         
-        # Generate forecast
-        forecast = model.predict(predict_df)
+        # Generate forecast (NumPy engine when the model layout supports it)
+        return self.forecast_with_intervals(model, predict_df, metadata, interval_mode)
+    
+    def _finish_forecast(
+        self,
+        forecast: pd.DataFrame,
+        metadata: Dict[str, Any],
+        adjust_baseline: bool = True,
+        inverse_transform: bool = True
+    ) -> pd.DataFrame:
+        """
+        Inverse transform and baseline adjustment of a model-space forecast
         
+        Args:
+            forecast: Forecast dataframe
+            metadata: Model metadata
+            adjust_baseline: Apply the baseline adjustment and clip to >= 0
+                (False keeps the unclipped sales-space forecast, as stored
+                by materialize_forecasts)
+            inverse_transform: forecast is in model space (False for rows
+                that are already in sales units)
+        """
         # Apply inverse transform if log transform was used
-        if metadata.get('log_transform', False):
+        if inverse_transform and metadata.get('log_transform', False):
             # Inverse log transform: y = exp(y_log) - 1
             forecast['yhat'] = np.expm1(forecast['yhat'].clip(-10, 20))
             forecast['yhat_lower'] = np.expm1(forecast['yhat_lower'].clip(-10, 20))
             forecast['yhat_upper'] = np.expm1(forecast['yhat_upper'].clip(-10, 20))
             logger.info("Applied inverse log transform to predictions")
         
+        if adjust_baseline:
+            forecast = self.apply_baseline_adjustment(forecast, metadata)
+        
+        logger.info(f"Generated {len(forecast)} predictions")
+        logger.info(f"Prediction range: [{forecast['yhat'].min():.2f}, {forecast['yhat'].max():.2f}]")
+        
+        return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+    
+    def apply_baseline_adjustment(
+        self,
+        forecast: pd.DataFrame,
+        metadata: Dict[str, Any]
+    ) -> pd.DataFrame:
+        """
+        Scale the forecast towards recent sales levels, then clip to >= 0.
+        
+        The factor depends on the mean over the whole forecast horizon, so it
+        is applied to exactly the requested slice (also for materialized rows).
+        """
         # Apply baseline adjustment based on recent sales trend
         # This fixes the issue where Prophet predictions anchor to overall historical mean
         # instead of reflecting recent sales levels
@@ -247,15 +469,14 @@ class Predictor:
                 forecast['yhat_lower'] = forecast['yhat_lower'] * adjustment_factor
                 forecast['yhat_upper'] = forecast['yhat_upper'] * adjustment_factor
         
-        # Ensure non-negative predictions
+        return self._clip_non_negative(forecast)
+    
+    def _clip_non_negative(self, forecast: pd.DataFrame) -> pd.DataFrame:
+        """Ensure non-negative predictions"""
         forecast['yhat'] = forecast['yhat'].clip(lower=0)
         forecast['yhat_lower'] = forecast['yhat_lower'].clip(lower=0)
         forecast['yhat_upper'] = forecast['yhat_upper'].clip(lower=0)
-        
-        logger.info(f"Generated {len(forecast)} predictions")
-        logger.info(f"Prediction range: [{forecast['yhat'].min():.2f}, {forecast['yhat'].max():.2f}]")
-        
-        return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+        return forecast
     
     def predict_with_events(
         self,
@@ -263,8 +484,11 @@ class Predictor:
         metadata: Dict[str, Any],
         periods: int = 30,
         events: List[Dict[str, Any]] = None,
-        start_date: Optional[date] = None
-    ) -> List[Dict[str, Any]]:
+        start_date: Optional[date] = None,
+        interval_mode: Optional[str] = None,
+        adjust_baseline: bool = True,
+        columnar: bool = False
+    ) -> Any:
         """
         Complete prediction pipeline with event integration
         
@@ -274,9 +498,13 @@ class Predictor:
             periods: Number of days to forecast
             events: Calendar events
             start_date: Start date for forecast
+            interval_mode: "none", "analytic" or "sampled" (default: INTERVAL_MODE)
+            adjust_baseline: Apply the recent-sales baseline adjustment and
+                clip to >= 0
+            columnar: Return forecast_columns() instead of records
         
         Returns:
-            List of prediction dictionaries
+            List of prediction dictionaries (or columns)
         """
         # Generate future dataframe
         future_df = self.generate_future_dataframe(
@@ -288,19 +516,66 @@ class Predictor:
         )
         
         # Generate predictions
-        forecast = self.predict(model, future_df, metadata)
-        
-        # Convert to list of dictionaries
-        predictions = []
-        for _, row in forecast.iterrows():
-            predictions.append({
-                'ds': row['ds'].strftime('%Y-%m-%d'),
-                'yhat': float(row['yhat']),
-                'yhat_lower': float(row['yhat_lower']),
-                'yhat_upper': float(row['yhat_upper'])
-            })
-        
-        return predictions
+        forecast = self.predict(model, future_df, metadata, interval_mode, adjust_baseline)
+        
+        return self._to_output(forecast, columnar)
+    
+    def predict_horizons(
+        self,
+        model: Prophet,
+        metadata: Dict[str, Any],
+        horizons: List[int],
+        events: List[Dict[str, Any]] = None,
+        start_date: Optional[date] = None,
+        interval_mode: Optional[str] = None,
+        calendars: Optional[Dict[tuple, pd.DataFrame]] = None,
+        columnar: bool = False
+    ) -> List[Any]:
+        """
+        predict_with_events for several horizons of one model, with one
+        model evaluation.
+        
+        The model-space forecast is computed once for the longest horizon;
+        each horizon gets its prefix, then its own inverse transform and
+        baseline adjustment (which depends on the horizon mean).
+        
+        Returns:
+            Prediction records (or columns, see predict_with_events) per
+            horizon, in the order given
+        """
+        future_df = self.generate_future_dataframe(
+            model=model,
+            periods=max(horizons),
+            events=events or [],
+            metadata=metadata,
+            start_date=start_date,
+            calendars=calendars
+        )
+        forecast = self._raw_forecast(model, future_df, metadata, interval_mode)
+        
+        return [
+            self._to_output(self._finish_forecast(forecast.iloc[:periods].copy(), metadata), columnar)
+            for periods in horizons
+        ]
+    
+    def predict_from_materialized(
+        self,
+        forecast: pd.DataFrame,
+        metadata: Dict[str, Any],
+        columnar: bool = False
+    ) -> Any:
+        """
+        Finish a forecast slice read from sales_forecasts (stored in sales
+        units, unadjusted and unclipped) exactly like a fresh forecast
+        """
+        return self._to_output(self._finish_forecast(forecast, metadata, inverse_transform=False), columnar)
+    
+    def _to_output(self, forecast: pd.DataFrame, columnar: bool) -> Any:
+        return forecast_columns(forecast) if columnar else self._to_records(forecast)
+    
+    def _to_records(self, forecast: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Convert forecast dataframe to list of dictionaries"""
+        return records_from_columns(forecast_columns(forecast))
 
 
 # Singleton instance
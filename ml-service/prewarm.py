@@ -0,0 +1,201 @@
+"""
+Startup Model Prewarming
+
+After a deploy the first prediction per store/category used to pay for
+deserializing the artifact and for the first-call overhead of the
+forecast code paths. The prewarm step of the startup warm-up loads the
+existing artifacts into the shared model cache and runs one small
+prediction per model.
+
+Order: models requested most recently (request times are persisted in
+model_dir, so they survive restarts) first, then the remaining models by
+artifact mtime, newest first. At most PREWARM_MAX_MODELS are loaded so
+prewarming never evicts its own entries.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import PREWARM_MAX_MODELS
+from model_cache import ModelCache
+
+logger = logging.getLogger(__name__)
+
+_STORE_ARTIFACT = re.compile(r"^store_(?P<id>.+)\.(npz|json)$")
+_STORE_SIDECARS = ("_meta.json", "_tuned.json")
+_CATEGORY_ARTIFACT = re.compile(r"^(?P<safe_name>.+)_model\.(npz|json)$")
+
+
+class RequestTracker:
+    """
+    Last prediction request time per model, persisted as a small JSON file
+    (written at most every flush_seconds and on shutdown).
+    """
+
+    def __init__(self, path: str, flush_seconds: float = 60.0):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._dirty = False
+        self._requested: Dict[str, float] = {}
+
+        try:
+            with open(path, "r") as f:
+                self._requested = {key: float(value) for key, value in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable request log {path}: {e}")
+
+    @staticmethod
+    def key(kind: str, target_id: str) -> str:
+        return f"{kind}:{target_id}"
+
+    def record(self, kind: str, target_id: str):
+        with self._lock:
+            self._requested[self.key(kind, target_id)] = time.time()
+            self._dirty = True
+            due = time.monotonic() - self._last_flush >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def last_requested(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._requested)
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._requested)
+            self._dirty = False
+            self._last_flush = time.monotonic()
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to write request log {self.path}: {e}")
+
+
+def discover_models(store_dir: str, category_dir: str) -> List[Tuple[str, str, float]]:
+    """
+    Existing model artifacts as (kind, target_id, mtime).
+
+    Category names are read from the metadata file, since the artifact
+    file name is a lossy version of the name.
+    """
+    models = []
+    seen_stores = set()
+
+    for name in _listdir(store_dir):
+        match = _STORE_ARTIFACT.match(name)
+        if match and not name.endswith(_STORE_SIDECARS) and match.group("id") not in seen_stores:
+            # A compact artifact may have a debug JSON next to it
+            seen_stores.add(match.group("id"))
+            models.append(("store", match.group("id"), _mtime(os.path.join(store_dir, name))))
+
+    seen_categories = set()
+    for name in _listdir(category_dir):
+        match = _CATEGORY_ARTIFACT.match(name)
+        if not match or match.group("safe_name") in seen_categories:
+            continue
+        seen_categories.add(match.group("safe_name"))
+        meta_path = os.path.join(category_dir, f"{match.group('safe_name')}_metadata.json")
+        try:
+            with open(meta_path, "r") as f:
+                category = json.load(f)["category"]
+        except Exception as e:
+            logger.warning(f"Skipping category artifact {name} for prewarm: {e}")
+            continue
+        models.append(("category", category, _mtime(os.path.join(category_dir, name))))
+
+    return models
+
+
+def prewarm_order(
+    models: List[Tuple[str, str, float]],
+    last_requested: Dict[str, float]
+) -> List[Tuple[str, str]]:
+    """Most recently requested first, then never-requested models by newest artifact"""
+    def priority(model):
+        kind, target_id, mtime = model
+        requested = last_requested.get(RequestTracker.key(kind, target_id))
+        return (0, -requested) if requested is not None else (1, -mtime)
+
+    return [(kind, target_id) for kind, target_id, _ in sorted(models, key=priority)]
+
+
+def prewarm_models(
+    order: List[Tuple[str, str]],
+    warm_store: Callable[[str], Any],
+    warm_category: Callable[[str], Any],
+    max_models: int = PREWARM_MAX_MODELS,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    cache: Optional[ModelCache] = None
+) -> Dict[str, Any]:
+    """
+    Load and exercise models in the given order.
+
+    Args:
+        order: [(kind, target_id), ...] from prewarm_order
+        warm_store / warm_category: Load one model into the cache and run a
+            small prediction; a failure only skips that model
+        cache: Model cache to reorder afterwards, so the highest priority
+            models are the last to be evicted
+
+    Returns:
+        Counts and timing of the prewarm
+    """
+    selected = order[:max_models]
+    warmers = {"store": warm_store, "category": warm_category}
+    start = time.perf_counter()
+    warmed, failed = 0, 0
+
+    for done, (kind, target_id) in enumerate(selected, start=1):
+        try:
+            warmers[kind](target_id)
+            warmed += 1
+        except Exception as e:
+            failed += 1
+            logger.warning(f"Prewarm of {kind} {target_id} failed: {e}")
+        if on_progress is not None:
+            on_progress(done, len(selected))
+
+    if cache is not None:
+        for kind, target_id in reversed(selected):
+            cache.touch((kind, target_id))
+
+    seconds = time.perf_counter() - start
+    logger.info(
+        f"Prewarmed {warmed}/{len(selected)} models in {seconds:.2f}s "
+        f"({len(order) - len(selected)} skipped over PREWARM_MAX_MODELS)"
+    )
+    return {
+        "warmed": warmed,
+        "failed": failed,
+        "skipped": len(order) - len(selected),
+        "seconds": round(seconds, 3),
+    }
+
+
+def _listdir(path: str) -> List[str]:
+    try:
+        return sorted(os.listdir(path))
+    except FileNotFoundError:
+        return []
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
@@ -0,0 +1,69 @@
+"""
+Forecast Response Serialization
+
+Forecasts travel through the service as columns - {"ds": [...],
+"yhat": array, "yhat_lower": array, "yhat_upper": array}, built with
+predictor.forecast_columns - instead of one dict per row. Endpoints
+return them either in that columnar shape (format="columnar") or, for
+existing clients, as the row-oriented list of records (the default).
+
+ForecastJSONResponse encodes with orjson, which writes the NumPy float
+arrays directly, and FastAPI skips jsonable_encoder for Response
+instances. orjson is optional: without it the response falls back to the
+standard json module (arrays converted with tolist()).
+
+No NumPy/pandas imports here, so main.py can import this module at
+startup (see warmup.py).
+"""
+
+import json
+from typing import Any, Dict, List
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, stdlib json fallback
+    orjson = None
+
+FORECAST_FORMATS = ("records", "columnar")
+FORECAST_VALUE_COLUMNS = ("yhat", "yhat_lower", "yhat_upper")
+
+
+def records_from_columns(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Row-oriented shape ([{ds, yhat, yhat_lower, yhat_upper}, ...]) of forecast columns"""
+    values = [_to_list(columns[name]) for name in FORECAST_VALUE_COLUMNS]
+    return [
+        {"ds": ds, "yhat": yhat, "yhat_lower": yhat_lower, "yhat_upper": yhat_upper}
+        for ds, yhat, yhat_lower, yhat_upper in zip(_to_list(columns["ds"]), *values)
+    ]
+
+
+def format_forecast(columns: Dict[str, Any], forecast_format: str = "records") -> Any:
+    """Forecast columns in the requested response shape"""
+    if forecast_format == "columnar":
+        return columns
+    return records_from_columns(columns)
+
+
+def _to_list(values: Any) -> list:
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, "tolist"):  # NumPy arrays and scalars
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ForecastJSONResponse(JSONResponse):
+    """
+    JSON response that encodes NumPy arrays directly (orjson when installed)
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY, default=_default)
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+        ).encode("utf-8")
@@ -0,0 +1,113 @@
+"""
+Incremental daily_sales_summary Cache
+
+Keeps the summary rows used for training in a local Parquet file under
+model_dir. The file records the date range it covers; a training run
+only queries rows after that range plus the last SUMMARY_CACHE_REFETCH_DAYS
+days (late corrections), merges them in and serves the window from disk.
+
+A window that does not start inside (or right after) the covered range
+triggers a full fetch that replaces the cache.
+"""
+
+import logging
+import os
+import threading
+from datetime import date, timedelta
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import SUMMARY_CACHE_REFETCH_DAYS
+from model_artifact import atomic_write
+
+logger = logging.getLogger(__name__)
+
+QueryFn = Callable[[date, date], pd.DataFrame]
+
+
+class SummaryCache:
+    """
+    Parquet-backed cache of daily summary rows with delta fetches.
+    """
+
+    def __init__(self, path: str, refetch_days: int = SUMMARY_CACHE_REFETCH_DAYS):
+        self.path = path
+        self.refetch_days = refetch_days
+        self._lock = threading.Lock()
+
+    def fetch(self, start_date: date, end_date: date, query: QueryFn) -> pd.DataFrame:
+        """
+        Return summary rows with start_date <= ds <= end_date.
+        
+        Args:
+            query: query(start, end) reading rows for an inclusive date range from the DB
+        """
+        with self._lock:
+            cached, covered = self._read()
+            
+            if cached is not None and covered[0] <= start_date <= covered[1] + timedelta(days=1):
+                delta_start = max(start_date, covered[1] - timedelta(days=self.refetch_days - 1))
+                new_covered = (covered[0], max(covered[1], end_date))
+            else:
+                cached = None
+                delta_start = start_date
+                new_covered = (start_date, end_date)
+            
+            if delta_start <= end_date:
+                fetched = query(delta_start, end_date)
+                if cached is not None:
+                    stale = (cached['ds'] >= pd.Timestamp(delta_start)) & (cached['ds'] <= pd.Timestamp(end_date))
+                    merged = pd.concat([cached[~stale], fetched], ignore_index=True)
+                else:
+                    merged = fetched
+                merged['ds'] = pd.to_datetime(merged['ds'])
+                merged = merged.sort_values('ds').reset_index(drop=True)
+                self._write(merged, new_covered)
+                logger.info(
+                    f"Summary cache: fetched {len(fetched)} rows from {delta_start} "
+                    f"({'delta' if cached is not None else 'full'})"
+                )
+            else:
+                merged = cached
+                logger.info("Summary cache: window fully cached, no DB query")
+        
+        window = (merged['ds'] >= pd.Timestamp(start_date)) & (merged['ds'] <= pd.Timestamp(end_date))
+        return merged[window].reset_index(drop=True)
+
+    def clear(self):
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _read(self) -> Tuple[Optional[pd.DataFrame], Optional[Tuple[date, date]]]:
+        if not os.path.exists(self.path):
+            return None, None
+        try:
+            table = pq.read_table(self.path)
+            meta = table.schema.metadata or {}
+            covered = (
+                date.fromisoformat(meta[b"covered_from"].decode()),
+                date.fromisoformat(meta[b"covered_to"].decode()),
+            )
+            return table.to_pandas(), covered
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable summary cache {self.path}: {e}")
+            return None, None
+
+    def _write(self, df: pd.DataFrame, covered: Tuple[date, date]):
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                b"covered_from": covered[0].isoformat().encode(),
+                b"covered_to": covered[1].isoformat().encode(),
+            })
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            atomic_write(self.path, lambda f: pq.write_table(table, f))
+        except Exception as e:
+            logger.warning(f"Failed to write summary cache {self.path}: {e}")
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+from backtest import fold_cutoffs, fold_frames, run_backtest
+
+
+def test_fold_cutoffs_expand_towards_the_end():
+    assert fold_cutoffs(100, horizon=14, step=7, folds=3, min_train=30) == [72, 79, 86]
+    # Folds without enough training rows are dropped
+    assert fold_cutoffs(60, horizon=14, step=7, folds=4, min_train=30) == [32, 39, 46]
+    assert fold_cutoffs(40, horizon=14, step=7, folds=4, min_train=30) == []
+
+def test_run_backtest_reports_per_horizon_metrics():
+    rng = np.random.default_rng(5)
+    ds = pd.date_range(start='2024-01-01', periods=120)
+    y = 100 + np.arange(120) * 0.5 + 10 * (ds.dayofweek >= 5) + rng.normal(0, 2, 120)
+    train_df = pd.DataFrame({'ds': ds, 'y': y})
+    spec = {
+        "prophet_params": {"yearly_seasonality": False, "weekly_seasonality": 3, "daily_seasonality": False},
+        "regressors": [],
+    }
+
+    result = run_backtest(spec, train_df, y, log_transform=False, horizon=7, step=7, folds=2, workers=1)
+
+    assert result["folds"] == 2
+    assert result["cutoffs"] == ['2024-04-16', '2024-04-23']
+    assert [row["h"] for row in result["per_horizon"]] == list(range(1, 8))
+    assert all(row["n"] == 2 for row in result["per_horizon"])
+    # A well-specified model forecasts this series within a few percent
+    assert result["mape"] < 5
+    assert 0 <= result["coverage"] <= 1
+
+def test_run_backtest_needs_enough_rows():
+    train_df = pd.DataFrame({'ds': pd.date_range(start='2024-01-01', periods=20), 'y': 1.0})
+    spec = {"prophet_params": {}, "regressors": []}
+    assert run_backtest(spec, train_df, train_df['y'].values, log_transform=False, min_train=30) is None
+
+def test_fold_frames_fill_history_regressors_from_the_training_part():
+    ds = pd.date_range(start='2024-01-01', periods=60)
+    y = np.arange(60, dtype=float)
+    # Unshifted rolling mean: contains each day's own target
+    train_df = pd.DataFrame({'ds': ds, 'y': y, 'is_weekend': (ds.dayofweek >= 5).astype(float),
+                             'rolling_mean_7': pd.Series(y).rolling(7, min_periods=1).mean()})
+
+    def history_features(train_part, y_history):
+        assert len(y_history) == len(train_part)
+        return {'rolling_mean_7': float(train_part['y'].mean()), 'absent_column': 1.0}
+
+    (train_part, test_part), = fold_frames(train_df, y, [46], horizon=14, history_features=history_features)
+
+    assert train_part['ds'].max() < test_part['ds'].min()
+    assert (test_part['rolling_mean_7'] == y[:46].mean()).all()
+    assert 'absent_column' not in test_part.columns
+    # Known-in-advance columns are kept as observed
+    assert test_part['is_weekend'].tolist() == train_df['is_weekend'].iloc[46:].tolist()
+    assert train_df['rolling_mean_7'].iloc[46] == y[40:47].mean()
+
+def test_run_backtest_does_not_score_on_observed_target_regressors():
+    rng = np.random.default_rng(3)
+    ds = pd.date_range(start='2024-01-01', periods=120)
+    y = 100 + 20 * np.sin(np.arange(120) / 5) + rng.normal(0, 2, 120)
+    train_df = pd.DataFrame({'ds': ds, 'y': y, 'same_day': y})
+    spec = {
+        "prophet_params": {"yearly_seasonality": False, "weekly_seasonality": False, "daily_seasonality": False},
+        "regressors": [["same_day", None]],
+    }
+    kwargs = dict(log_transform=False, horizon=14, step=7, folds=2, workers=1)
+
+    leaked = run_backtest(spec, train_df, y, **kwargs)
+    honest = run_backtest(
+        spec, train_df, y, **kwargs,
+        history_features=lambda part, _: {'same_day': float(part['y'].tail(14).mean())}
+    )
+
+    assert leaked["mape"] < 1
+    assert honest["mape"] > 5
+
+def test_get_pool_keeps_pools_of_other_worker_counts_usable():
+    from backtest import get_pool
+
+    two = get_pool(2)
+    assert get_pool(3) is not two
+    assert get_pool(2) is two
+    # Holders of the first pool can still submit
+    assert two.submit(abs, -1).result(timeout=60) == 1
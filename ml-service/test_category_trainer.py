@@ -0,0 +1,141 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from category_trainer import CategoryTrainer
+
+
+@pytest.fixture
+def cat_trainer(tmp_path):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE category_sales_summary (ds TEXT, category TEXT, revenue REAL)"))
+        conn.execute(text("""
+            INSERT INTO category_sales_summary VALUES
+                ('2025-01-01', 'Coffee', 100), ('2025-01-03', 'Coffee', 300),
+                ('2025-01-02', 'Tea', 50), ('2024-01-01', 'Tea', 999)
+        """))
+    return CategoryTrainer(engine, model_dir=str(tmp_path))
+
+def test_fetch_all_category_data_pivots_and_fills_gaps(cat_trainer):
+    data = cat_trainer.fetch_all_category_data(["Coffee", "Tea", "Snacks"], end_date=date(2025, 1, 3))
+
+    coffee = data["Coffee"].set_index("ds")["y"]
+    assert len(coffee) == 366
+    assert coffee["2025-01-01"] == 100
+    assert coffee["2025-01-02"] == 0
+    assert coffee["2025-01-03"] == 300
+
+    # Rows outside the training window are excluded
+    assert data["Tea"]["y"].sum() == 50
+    # Categories without any rows behave like fetch_category_data (empty frame)
+    assert data["Snacks"].empty
+
+def test_fetch_all_category_data_returns_none_without_view(tmp_path):
+    trainer = CategoryTrainer(create_engine("sqlite://"), model_dir=str(tmp_path))
+    assert trainer.fetch_all_category_data(["Coffee"]) is None
+
+def test_short_series_uses_fallback_engine(cat_trainer):
+    ds = pd.date_range("2024-01-01", periods=366)
+    y = np.where(np.arange(366) >= 346, 100.0 + 50 * (ds.dayofweek >= 5), 0.0)
+    result = cat_trainer.train_category_model("Coffee", df=pd.DataFrame({"ds": ds, "y": y}))
+
+    assert result["status"] == "success"
+    assert result["engine"] == "seasonal_naive"
+    assert result["history_days"] == 20
+
+    forecast = cat_trainer.predict_category("Coffee", periods=7)
+    assert len(forecast) == 7
+    assert (forecast["yhat"] > 0).all()
+    # No simulated intervals without a full Prophet model
+    sampled = cat_trainer.predict_category("Coffee", periods=7, interval_mode="sampled")
+    assert sampled.attrs["interval_mode"] == "analytic"
+
+    closed = forecast["ds"].iloc[2].strftime("%Y-%m-%d")
+    with_events = cat_trainer.predict_category("Coffee", periods=7, events=[{"date": closed, "type": "store-closed", "impact": 1.0}])
+    assert with_events["yhat"].iloc[2] == 0
+    np.testing.assert_allclose(with_events["yhat"].drop(index=2), forecast["yhat"].drop(index=2))
+
+def test_legacy_pickle_is_only_converted_offline(cat_trainer, tmp_path, monkeypatch):
+    import json
+    import pickle
+    from fallback_engines import SeasonalNaiveEngine
+
+    ds = pd.date_range("2024-12-01", periods=28)
+    engine = SeasonalNaiveEngine().fit(ds, np.arange(28, dtype=float))
+    with open(tmp_path / "Tea_model.pkl", "wb") as f:
+        pickle.dump(engine, f)
+    with open(tmp_path / "Tea_metadata.json", "w") as f:
+        json.dump({"category": "Tea", "engine": "seasonal_naive"}, f)
+
+    # Serving never unpickles
+    def refuse(*args, **kwargs):
+        raise AssertionError("pickle.load called while serving")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(pickle, "load", refuse)
+        assert cat_trainer._load_model("Tea") == (None, {})
+    assert (tmp_path / "Tea_model.pkl").exists()
+
+    assert cat_trainer.migrate_legacy_pickles() == ["Tea"]
+    model, metadata = cat_trainer._load_model("Tea")
+    assert isinstance(model, SeasonalNaiveEngine)
+    np.testing.assert_allclose(model.profile, engine.profile)
+    assert metadata["engine"] == "seasonal_naive"
+    assert not (tmp_path / "Tea_model.pkl").exists()
+    assert (tmp_path / "Tea_model.npz").exists()
+    assert cat_trainer.migrate_legacy_pickles() == []
+
+def test_pickle_only_category_is_retrained_after_upgrade(cat_trainer, tmp_path):
+    import json
+    import pickle
+    from fallback_engines import SeasonalNaiveEngine
+    from timezone_utils import get_current_date_wib
+
+    ds = pd.date_range("2024-12-01", periods=28)
+    with open(tmp_path / "Tea_model.pkl", "wb") as f:
+        pickle.dump(SeasonalNaiveEngine().fit(ds, np.arange(28, dtype=float)), f)
+    with open(tmp_path / "Tea_metadata.json", "w") as f:
+        json.dump({"category": "Tea", "engine": "seasonal_naive",
+                   "trained_at": get_current_date_wib().isoformat()}, f)
+
+    # Backfill of a registry created after the upgrade does not list the pickle
+    upgraded = CategoryTrainer(cat_trainer.engine, model_dir=str(tmp_path))
+    assert upgraded.registry.get("category", "Tea") is None
+
+    # A recent pickle does not make the next run skip the category
+    y = np.where(np.arange(366) >= 346, 40.0 + 10 * (pd.date_range("2024-01-01", periods=366).dayofweek >= 5), 0.0)
+    result = upgraded.train_category_model("Tea", df=pd.DataFrame({"ds": pd.date_range("2024-01-01", periods=366), "y": y}))
+    assert result["status"] == "success"
+    assert not (tmp_path / "Tea_model.pkl").exists()
+    assert upgraded.registry.get("category", "Tea") is not None
+    assert len(upgraded.predict_category("Tea", periods=7)) == 7
+
+def test_train_all_categories_in_pool_isolates_failures_and_timeouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sales.db'}")
+    end = date(2025, 1, 31)
+    days = pd.date_range(end=end, periods=366)
+    rng = np.random.default_rng(0)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE products (category TEXT)"))
+        conn.execute(text("INSERT INTO products VALUES ('Coffee'), ('Snacks'), ('Tea')"))
+        conn.execute(text("CREATE TABLE category_sales_summary (ds TEXT, category TEXT, revenue REAL)"))
+        rows = [{"ds": d.date().isoformat(), "category": "Tea", "revenue": float(100 + rng.normal(0, 5))} for d in days]
+        # Coffee: three weeks of sales -> NumPy fallback engine, no Stan fit
+        rows += [{"ds": d.date().isoformat(), "category": "Coffee", "revenue": 50.0} for d in days[-20:]]
+        conn.execute(text("INSERT INTO category_sales_summary VALUES (:ds, :category, :revenue)"), rows)
+    trainer = CategoryTrainer(engine, model_dir=str(tmp_path / "categories"))
+
+    # Tea's Prophet fit cannot finish within the budget; Snacks has no data
+    summary = trainer.train_all_categories(end_date=end, force_retrain=True, workers=2, timeout=0.05)
+
+    assert summary["mode"] == "process"
+    assert list(summary["details"]) == list(summary["timings"]) == ["Coffee", "Snacks", "Tea"]
+    assert all(isinstance(seconds, float) for seconds in summary["timings"].values())
+    assert summary["details"]["Coffee"]["status"] == "success"
+    assert summary["details"]["Snacks"] == {"status": "error", "reason": "insufficient_data", "days": 0}
+    assert summary["details"]["Tea"] == {"status": "error", "error": "Timed out after 0.05s"}
+    assert summary["categories_trained"] == 1
+    assert len(trainer.predict_category("Coffee", periods=7)) == 7
@@ -0,0 +1,31 @@
+import pandas as pd
+from data_fingerprint import compute_fingerprint, fingerprint_matches
+
+
+def _frame():
+    return pd.DataFrame({
+        'ds': pd.date_range(start='2025-01-01', periods=5),
+        'y': [10.0, 12.0, 0.0, 8.0, 9.0],
+        'is_weekend': [0, 0, 0, 1, 1],
+    })
+
+def test_identical_frames_match():
+    fingerprint = compute_fingerprint(_frame(), ['y', 'is_weekend', 'lag_7'])
+    assert fingerprint['rows'] == 5
+    assert fingerprint['start_date'] == '2025-01-01'
+    assert fingerprint['end_date'] == '2025-01-05'
+    assert fingerprint_matches({"data_fingerprint": fingerprint},
+                               compute_fingerprint(_frame(), ['y', 'is_weekend', 'lag_7']))
+
+def test_value_regressor_and_settings_changes_are_detected():
+    base = compute_fingerprint(_frame(), ['y', 'is_weekend'])
+
+    changed_y = _frame()
+    changed_y.loc[2, 'y'] = 1.0
+    changed_reg = _frame()
+    changed_reg.loc[0, 'is_weekend'] = 1
+
+    assert compute_fingerprint(changed_y, ['y', 'is_weekend']) != base
+    assert compute_fingerprint(changed_reg, ['y', 'is_weekend']) != base
+    assert compute_fingerprint(_frame(), ['y', 'is_weekend'], settings={"log_transform": False}) != base
+    assert not fingerprint_matches({}, base)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fallback_engines import ENGINES, create_engine, select_engine, series_profile
+
+
+def _weekly_series(days: int, start_zeros: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    ds = pd.date_range("2025-01-01", periods=start_zeros + days)
+    y = 100 + 30 * (ds.dayofweek >= 5) + rng.normal(0, 3, len(ds))
+    y[:start_zeros] = 0
+    return pd.DataFrame({"ds": ds, "y": y})
+
+
+@pytest.mark.parametrize("name", list(ENGINES))
+def test_engines_fit_and_forecast(name):
+    df = _weekly_series(56)
+    engine = create_engine(name).fit(df["ds"], df["y"])
+
+    future = pd.date_range(df["ds"].iloc[-1] + pd.Timedelta(days=1), periods=14)
+    yhat = engine.predict(future)["yhat"]
+    assert yhat.shape == (14,)
+    assert np.all(np.isfinite(yhat))
+    # In-sample dates are served too (used for residual intervals)
+    assert engine.predict(df["ds"])["yhat"].shape == (56,)
+
+@pytest.mark.parametrize("name", ["seasonal_naive", "ets", "ridge"])
+def test_seasonal_engines_keep_weekend_uplift(name):
+    df = _weekly_series(56)
+    engine = create_engine(name).fit(df["ds"], df["y"])
+    future = pd.Series(pd.date_range("2025-03-03", periods=7))  # Monday..Sunday
+    yhat = engine.predict(future)["yhat"]
+    assert yhat[5:].mean() - yhat[:5].mean() > 20
+
+def test_select_engine_by_length_and_sparsity():
+    assert select_engine(_weekly_series(10, start_zeros=300))[0] == "seasonal_naive"
+    assert select_engine(_weekly_series(60, start_zeros=300))[0] in ("ets", "ridge")
+    assert select_engine(_weekly_series(365))[0] == "prophet"
+
+    sparse = _weekly_series(120)
+    sparse.loc[sparse.index % 4 != 0, "y"] = 0
+    assert select_engine(sparse)[0] == "croston_tsb"
+    assert select_engine(sparse, configured="ridge") == ("ridge", "configured")
+
+def test_series_profile_ignores_leading_zeros():
+    profile = series_profile(_weekly_series(30, start_zeros=100)["y"].to_numpy())
+    assert profile == {"history_days": 30, "zero_ratio": 0.0}
@@ -0,0 +1,52 @@
+import pytest
+import pandas as pd
+import numpy as np
+from prophet import Prophet
+from fast_engine import FastForecastEngine, UnsupportedModelError, get_engine
+
+
+def _fit_model(seasonality_mode: str) -> Prophet:
+    rng = np.random.default_rng(42)
+    ds = pd.date_range(start='2024-01-01', periods=120)
+    df = pd.DataFrame({
+        'ds': ds,
+        'y': 100 + np.arange(120) * 0.5 + 10 * (ds.dayofweek >= 5) + rng.normal(0, 2, 120),
+        'promo_intensity': rng.uniform(0, 1, 120),
+        'is_weekend': (ds.dayofweek >= 5).astype(int),
+    })
+    model = Prophet(
+        yearly_seasonality=False,
+        weekly_seasonality=5,
+        daily_seasonality=False,
+        seasonality_mode=seasonality_mode,
+        n_changepoints=10,
+    )
+    model.add_regressor('promo_intensity', mode='additive')
+    model.add_regressor('is_weekend', mode='additive')
+    model.fit(df)
+    return model
+
+
+@pytest.mark.parametrize("seasonality_mode", ["additive", "multiplicative"])
+def test_matches_prophet_predict(seasonality_mode):
+    model = _fit_model(seasonality_mode)
+    future = pd.DataFrame({'ds': pd.date_range(start='2024-04-20', periods=30)})
+    future['promo_intensity'] = np.linspace(0, 1, 30)
+    future['is_weekend'] = (future['ds'].dt.dayofweek >= 5).astype(int)
+
+    model.uncertainty_samples = 0
+    expected = model.predict(future)
+
+    engine = FastForecastEngine.from_prophet(model)
+    result = engine.predict(future['ds'], future[engine.regressors].to_numpy())
+
+    np.testing.assert_allclose(result['trend'], expected['trend'].values, rtol=1e-9)
+    np.testing.assert_allclose(result['yhat'], expected['yhat'].values, rtol=1e-9)
+
+def test_unfitted_model_is_unsupported():
+    with pytest.raises(UnsupportedModelError):
+        FastForecastEngine.from_prophet(Prophet())
+
+def test_get_engine_is_built_once_per_model():
+    model = _fit_model("additive")
+    assert get_engine(model) is get_engine(model)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from config import REGRESSOR_PRIOR_SCALES, SCALED_REGRESSORS
+from feature_pipeline import build_training_features
+from model_trainer import ModelTrainer
+import model_trainer
+
+
+class MockEngine:
+    def connect(self):
+        pass
+
+
+def _summary_frame(rows: int = 120) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    ds = pd.date_range(start='2025-01-01', periods=rows)
+    df = pd.DataFrame({
+        'ds': ds,
+        'y': rng.gamma(5, 200, rows),
+        'transactions_count': rng.poisson(40, rows).astype(float),
+        'items_sold': rng.poisson(90, rows).astype(float),
+        'avg_ticket': rng.normal(25, 3, rows),
+        'is_weekend': (ds.dayofweek >= 5).astype(float),
+        'promo_intensity': rng.uniform(0, 1, rows),
+        'holiday_intensity': 0.0,
+        'event_intensity': rng.uniform(0, 1, rows),
+        'closure_intensity': 0.0,
+    })
+    df.loc[10, 'y'] = 50000.0
+    # Unsorted input, like a frame assembled from several fetches
+    return df.sample(frac=1, random_state=1).reset_index(drop=True)
+
+
+def _reference(trainer: ModelTrainer, df: pd.DataFrame, smoothing: bool):
+    df = df.sort_values("ds").copy()
+    df = trainer.handle_outliers(df)
+    df = trainer.add_calendar_features(df)
+    df = trainer.add_lag_features(df)
+    if smoothing:
+        df = trainer.apply_smoothing(df)
+    y_original = df['y'].values.copy()
+    _, scaler_params = trainer.fit_scaler(df)
+    regressors = [reg for reg in REGRESSOR_PRIOR_SCALES if reg in df.columns]
+    df = trainer.apply_scaler(df, scaler_params)
+    train_df = df[["ds", "y"] + regressors].copy()
+    train_df['y'] = np.log1p(train_df['y'])
+    return train_df.reset_index(drop=True), y_original, regressors, scaler_params
+
+
+@pytest.mark.parametrize("outliers", ["clip", "remove", "none"])
+@pytest.mark.parametrize("smoothing_window", [None, 3, 4])
+def test_matches_pandas_chain(monkeypatch, tmp_path, outliers, smoothing_window):
+    monkeypatch.setattr(model_trainer, "OUTLIER_HANDLING", outliers)
+    monkeypatch.setattr(model_trainer, "APPLY_SMOOTHING", smoothing_window is not None)
+    monkeypatch.setattr(model_trainer, "SMOOTHING_WINDOW", smoothing_window or 3)
+    trainer = ModelTrainer(engine=MockEngine(), model_dir=str(tmp_path))
+    df = _summary_frame()
+
+    expected_df, expected_y, expected_regs, expected_scaler = _reference(trainer, df, smoothing_window is not None)
+    features = build_training_features(
+        df, outlier_handling=outliers, smoothing_window=smoothing_window, log_transform=True
+    )
+
+    assert features.regressors == expected_regs
+    assert features.scaler_params["columns"] == expected_scaler["columns"]
+    for col in expected_scaler["columns"]:
+        assert features.scaler_params["mean_"][col] == pytest.approx(expected_scaler["mean_"][col], rel=1e-12)
+        assert features.scaler_params["scale_"][col] == pytest.approx(expected_scaler["scale_"][col], rel=1e-12)
+    np.testing.assert_allclose(features.y_original, expected_y, rtol=1e-12)
+    pd.testing.assert_frame_equal(features.train_df, expected_df, check_dtype=False, rtol=1e-10)
+
+def test_scaled_regressors_are_standardized():
+    features = build_training_features(_summary_frame())
+    for col in [c for c in SCALED_REGRESSORS if c in features.train_df.columns]:
+        values = features.train_df[col]
+        assert abs(values.mean()) < 1e-9
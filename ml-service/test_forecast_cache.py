@@ -0,0 +1,35 @@
+from datetime import date
+from forecast_cache import ForecastCache, hash_events
+
+
+def test_event_hash_is_order_independent():
+    a = {"date": "2025-01-01", "type": "holiday", "impact": 0.9}
+    b = {"date": "2025-01-02", "type": "promotion", "impact": 0.4}
+    assert hash_events([a, b]) == hash_events([b, a])
+    assert hash_events([a]) != hash_events([b])
+
+def test_hit_miss_and_store_invalidation():
+    cache = ForecastCache(ttl_seconds=60, max_entries=10, enabled=True)
+    key = cache.make_key("1", "v1", date(2025, 1, 1), 30, [])
+    assert cache.get(key) is None
+    cache.put(key, [{"yhat": 1.0}])
+    assert cache.get(key) == [{"yhat": 1.0}]
+
+    cache.invalidate_store("1")
+    assert cache.get(key) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+def test_expired_entries_are_misses():
+    cache = ForecastCache(ttl_seconds=0, max_entries=10, enabled=True)
+    key = cache.make_key("1", "v1", date(2025, 1, 1), 30, None)
+    cache.put(key, [])
+    assert cache.get(key) is None
+
+def test_size_bound_evicts_oldest():
+    cache = ForecastCache(ttl_seconds=60, max_entries=2, enabled=True)
+    keys = [cache.make_key("1", "v1", date(2025, 1, 1), periods, None) for periods in (7, 14, 30)]
+    for key in keys:
+        cache.put(key, key)
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) == keys[2]
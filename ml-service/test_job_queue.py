@@ -0,0 +1,107 @@
+import time
+from contextlib import contextmanager
+from job_queue import JobQueue, PermanentJobError
+
+
+def _wait(queue, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["state"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_active_jobs_are_deduplicated(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    first, created = queue.enqueue("train", "train:1:latest", {"store_id": "1"})
+    second, created_again = queue.enqueue("train", "train:1:latest", {"store_id": "1"})
+    assert created and not created_again
+    assert first["id"] == second["id"]
+
+def test_enqueue_retries_when_the_conflicting_job_finishes(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    first, _ = queue.enqueue("train", "train:1:latest", {"store_id": "1"})
+    connect = queue._connect
+
+    class FinishingConnection:
+        """Lets the active job finish right before the dedupe SELECT"""
+
+        def __init__(self, conn):
+            self.conn = conn
+
+        def execute(self, sql, params=()):
+            if sql.startswith("SELECT id FROM jobs WHERE dedupe_key"):
+                self.conn.execute("UPDATE jobs SET state = 'succeeded' WHERE id = ?", (first["id"],))
+            return self.conn.execute(sql, params)
+
+    @contextmanager
+    def racing_connect():
+        with connect() as conn:
+            yield FinishingConnection(conn)
+
+    monkeypatch.setattr(queue, "_connect", racing_connect)
+    second, created = queue.enqueue("train", "train:1:latest", {"store_id": "1"})
+
+    assert created
+    assert second["id"] != first["id"] and second["state"] == "queued"
+
+def test_success_records_result_and_stages(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), poll_seconds=0.05)
+
+    def handler(payload, ctx):
+        ctx.stage("fetch")
+        ctx.stage("fit")
+        return {"store_id": payload["store_id"]}
+
+    queue.register("train", handler)
+    queue.start()
+    try:
+        job, _ = queue.enqueue("train", "train:1:latest", {"store_id": "1"})
+        job = _wait(queue, job["id"])
+    finally:
+        queue.stop(timeout=5)
+
+    assert job["state"] == "succeeded"
+    assert job["result"] == {"store_id": "1"}
+    assert set(job["stages"]) == {"fetch", "fit"}
+    # A finished job no longer blocks a new one with the same key
+    assert queue.enqueue("train", "train:1:latest", {"store_id": "1"})[1]
+
+def test_failures_retry_then_fail(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=3, retry_backoff_seconds=0, poll_seconds=0.05)
+    calls = []
+
+    def handler(payload, ctx):
+        calls.append(1)
+        raise RuntimeError("database unavailable")
+
+    queue.register("train", handler)
+    queue.start()
+    try:
+        job, _ = queue.enqueue("train", "train:1:latest", {})
+        job = _wait(queue, job["id"])
+    finally:
+        queue.stop(timeout=5)
+
+    assert job["state"] == "failed"
+    assert job["attempts"] == 3
+    assert len(calls) == 3
+    assert "database unavailable" in job["error"]
+
+def test_permanent_errors_are_not_retried(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=3, retry_backoff_seconds=0, poll_seconds=0.05)
+
+    def handler(payload, ctx):
+        raise PermanentJobError("not enough data")
+
+    queue.register("train", handler)
+    queue.start()
+    try:
+        job, _ = queue.enqueue("train", "train:1:latest", {})
+        job = _wait(queue, job["id"])
+    finally:
+        queue.stop(timeout=5)
+
+    assert job["state"] == "failed"
+    assert job["attempts"] == 1
@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from fallback_engines import ENGINES
+from forecast_cache import forecast_cache
+from warmup import Warmup
+
+
+@pytest.fixture
+def client():
+    # No startup event: the job queue and warm-up thread are not started
+    return TestClient(main.app)
+
+def test_ready_without_startup_warmup(client, monkeypatch):
+    monkeypatch.setattr(main, "warmup", Warmup())
+    assert client.get("/ready").status_code == 503
+
+    monkeypatch.setattr(main, "STARTUP_WARMUP_ENABLED", False)
+    main._start_warmup()
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["state"] == "deferred"
+
+def _store_model():
+    ds = pd.date_range(start='2024-01-01', periods=120)
+    model = ENGINES["seasonal_naive"]().fit(pd.Series(ds), 40 - 60 * (ds.dayofweek >= 5))
+    metadata = {"y_mean": 20.0, "y_recent_mean": 30.0, "log_transform": False, "model_version": "v1"}
+    return model, metadata
+
+def test_predict_serves_materialized_rows_for_the_default_interval_mode(client, sqlite_trainer, monkeypatch):
+    from predictor import predictor
+
+    model, metadata = _store_model()
+    sqlite_trainer.materialize_forecasts("1", model, metadata, days=14)
+    monkeypatch.setattr(sqlite_trainer, "load_model", lambda store_id: (model, metadata))
+    monkeypatch.setattr(main, "_trainer", sqlite_trainer)
+    forecast_cache.clear()
+
+    fresh = client.post("/ml/predict", json={"store_id": "1", "periods": 7, "interval_mode": "none"}).json()
+    assert fresh["metadata"]["source"] == "computed"
+
+    default_mode = predictor.effective_interval_mode(model)
+    responses = [
+        client.post("/ml/predict", json={"store_id": "1", "periods": 7}).json(),
+        client.post("/ml/predict", json={"store_id": "1", "periods": 7, "interval_mode": default_mode}).json(),
+    ]
+    # An explicit default mode is the same request as no mode
+    assert [r["metadata"]["source"] for r in responses] == ["materialized", "cache"]
+    assert responses[0]["predictions"] == responses[1]["predictions"]
+    assert [p["yhat"] for p in responses[0]["predictions"]] == pytest.approx([p["yhat"] for p in fresh["predictions"]])
+
+def test_predict_batch_isolates_failures_per_item(client, sqlite_trainer, monkeypatch):
+    from predictor import predictor
+
+    model, metadata = _store_model()
+    monkeypatch.setattr(sqlite_trainer, "load_model", lambda store_id: (model, metadata) if store_id == "1" else (None, None))
+    monkeypatch.setattr(main, "_trainer", sqlite_trainer)
+    forecast_cache.clear()
+
+    predict_horizons = predictor.predict_horizons
+
+    def failing_with_events(model, metadata, horizons, events=None, **kwargs):
+        if events:
+            raise RuntimeError("evaluation failed")
+        return predict_horizons(model, metadata, horizons, events, **kwargs)
+
+    monkeypatch.setattr(predictor, "predict_horizons", failing_with_events)
+
+    event = {"date": "2030-01-01", "type": "promotion", "impact": 0.5}
+    response = client.post("/ml/predict/batch", json={"items": [
+        {"store_id": "1", "periods": 7},
+        {"store_id": "2", "periods": 7},
+        {"store_id": "1", "periods": 7, "events": [event]},
+        {"store_id": "1", "periods": 14, "events": [event]},
+        {"store_id": "1", "periods": 14},
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    results = body["results"]
+    assert [r["store_id"] for r in results] == ["1", "2", "1", "1", "1"]
+    assert [r["status"] for r in results] == ["success", "error", "error", "error", "success"]
+    assert [r.get("status_code") for r in results] == [None, 404, 500, 500, None]
+    assert [len(results[i]["predictions"]) for i in (0, 4)] == [7, 14]
+    assert body["metadata"] == {"items": 5, "stores": 2, "failed": 3}
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+from prophet import Prophet
+from fast_engine import FastForecastEngine
+from fallback_engines import ENGINES
+from model_artifact import ArtifactFormatError, load_model_bundle, save_model_bundle
+from predictor import predictor
+from warm_start import warm_start_init
+
+
+def _frame(offset: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    ds = pd.date_range(start='2024-01-01', periods=160)
+    df = pd.DataFrame({
+        'ds': ds,
+        'y': 50 + np.arange(160) * 0.2 + 6 * (ds.dayofweek >= 5) + rng.normal(0, 1, 160),
+        'promo': rng.uniform(0, 1, 160),
+    })
+    return df.iloc[offset:offset + 120].reset_index(drop=True)
+
+
+def _model() -> Prophet:
+    model = Prophet(yearly_seasonality=False, weekly_seasonality=3, daily_seasonality=False, n_changepoints=8)
+    model.add_regressor('promo')
+    return model
+
+
+def test_round_trip_matches_prophet(tmp_path):
+    model = _model()
+    model.fit(_frame())
+    path = str(tmp_path / "store_1.npz")
+    save_model_bundle(
+        path, FastForecastEngine.from_prophet(model), {"model_version": "v1"}, {"columns": ["promo"]}, compress=True
+    )
+
+    engine, metadata, scaler_params = load_model_bundle(path)
+    assert metadata == {"model_version": "v1"}
+    assert scaler_params == {"columns": ["promo"]}
+
+    future = _frame(40).tail(30)
+    model.uncertainty_samples = 0
+    np.testing.assert_allclose(
+        predictor.predict_point(engine, future), model.predict(future)['yhat'].values, rtol=1e-9
+    )
+    lower, upper = predictor._analytic_offsets(engine, {})
+    assert lower < 0 < upper
+
+def test_compact_artifact_warm_starts_refit(tmp_path):
+    previous = _model()
+    previous.fit(_frame())
+    path = str(tmp_path / "store_1.npz")
+    save_model_bundle(path, FastForecastEngine.from_prophet(previous))
+    engine, _, _ = load_model_bundle(path)
+
+    init, reason = warm_start_init(engine, _model(), _frame(2))
+    assert reason == "compatible"
+    np.testing.assert_allclose(init["beta"], previous.params["beta"][0])
+
+@pytest.mark.parametrize("name", sorted(ENGINES))
+def test_fallback_engine_round_trip(tmp_path, name):
+    df = _frame()
+    engine = ENGINES[name]().fit(df['ds'], df['y'].values)
+    path = str(tmp_path / "Tea_model.npz")
+    save_model_bundle(path, engine)
+
+    loaded, _, _ = load_model_bundle(path)
+    assert type(loaded) is type(engine)
+    future = pd.date_range(start='2024-03-01', periods=60)
+    np.testing.assert_allclose(loaded.predict(future)['yhat'], engine.predict(future)['yhat'])
+
+def test_corrupted_artifact_is_rejected(tmp_path):
+    df = _frame()
+    path = str(tmp_path / "Tea_model.npz")
+    save_model_bundle(path, ENGINES["seasonal_naive"]().fit(df['ds'], df['y'].values))
+
+    with np.load(path) as data:
+        header, values = data["header"], data["values"].copy()
+    values[0] += 1.0
+    np.savez(path, header=header, values=values)
+
+    with pytest.raises(ArtifactFormatError):
+        load_model_bundle(path)
+
+def test_full_prophet_bundle_round_trip(tmp_path):
+    model = _model()
+    model.fit(_frame())
+    path = str(tmp_path / "store_1.npz")
+    save_model_bundle(path, model, {"model_version": "v2"})
+
+    loaded, metadata, _ = load_model_bundle(path)
+    assert isinstance(loaded, Prophet) and metadata["model_version"] == "v2"
+    np.testing.assert_allclose(loaded.params["beta"], model.params["beta"])
+
+def test_failed_write_keeps_previous_bundle(tmp_path, monkeypatch):
+    df = _frame()
+    path = str(tmp_path / "Tea_model.npz")
+    save_model_bundle(path, ENGINES["seasonal_naive"]().fit(df['ds'], df['y'].values), {"model_version": "v1"})
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(np, "savez", crash)
+    with pytest.raises(OSError):
+        save_model_bundle(path, ENGINES["seasonal_naive"]().fit(df['ds'], df['y'].values), {"model_version": "v2"})
+
+    assert load_model_bundle(path)[1] == {"model_version": "v1"}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["Tea_model.npz"]
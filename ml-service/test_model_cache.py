@@ -0,0 +1,59 @@
+import pytest
+from model_cache import ModelCache
+
+
+@pytest.fixture
+def cache():
+    return ModelCache(max_entries=2, max_bytes=1000, enabled=True)
+
+def test_hit_after_put(cache):
+    cache.put("a", "model_a", {"model_version": "v1"}, ("sig", 1), 10)
+    assert cache.get("a", ("sig", 1)) == ("model_a", {"model_version": "v1"})
+    assert cache.stats()["hits"] == 1
+
+def test_signature_change_invalidates(cache):
+    cache.put("a", "model_a", {}, ("sig", 1), 10)
+    assert cache.get("a", ("sig", 2)) is None
+    assert cache.stats()["entries"] == 0
+
+def test_model_version_change_invalidates(cache):
+    cache.put("a", "model_a", {"model_version": "v1"}, ("sig", 1), 10)
+    assert cache.get("a", ("sig", 1), model_version="v2") is None
+
+def test_lru_eviction_by_count(cache):
+    cache.put("a", "model_a", {}, ("sig",), 10)
+    cache.put("b", "model_b", {}, ("sig",), 10)
+    cache.get("a", ("sig",))  # a becomes most recently used
+    cache.put("c", "model_c", {}, ("sig",), 10)
+    assert cache.get("b", ("sig",)) is None
+    assert cache.get("a", ("sig",)) is not None
+
+def test_eviction_by_memory_budget(cache):
+    cache.put("a", "model_a", {}, ("sig",), 600)
+    cache.put("b", "model_b", {}, ("sig",), 600)
+    assert cache.get("a", ("sig",)) is None
+    assert cache.stats()["total_bytes"] == 600
+
+def test_callable_signature_is_only_checked_after_revalidate_interval():
+    calls = []
+
+    def signature():
+        calls.append(1)
+        return ("sig", 2)
+
+    cache = ModelCache(max_entries=2, max_bytes=0, enabled=True, revalidate_seconds=60)
+    cache.put("a", "model_a", {}, ("sig", 1))
+    assert cache.get("a", signature) == ("model_a", {})
+    assert calls == []
+
+    cache.revalidate_seconds = 0
+    assert cache.get("a", signature) is None
+    assert calls == [1]
+
+def test_lookup_does_not_wait_for_writers(cache):
+    cache.put("a", "model_v1", {"model_version": "v1"}, ("sig", 1))
+    with cache._write_lock:  # a writer mid-publish
+        assert cache.get("a", ("sig", 1)) == ("model_v1", {"model_version": "v1"})
+
+    cache.put("a", "model_v2", {"model_version": "v2"}, ("sig", 2))
+    assert cache.get("a", ("sig", 2)) == ("model_v2", {"model_version": "v2"})
@@ -0,0 +1,65 @@
+from model_registry import ModelRegistry
+
+
+def _write(path, content="x"):
+    with open(path, "w") as f:
+        f.write(content)
+    return str(path)
+
+def test_publish_archive_and_prune(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry.db"))
+    assert registry.is_empty("store")
+
+    for i, version in enumerate(["20250101_000000", "20250102_000000", "20250103_000000"]):
+        path = _write(tmp_path / "store_1.npz", f"model {i}")
+        archived = None if i == 0 else (str(tmp_path / f"old_{i}.npz"), str(tmp_path / f"old_{i}_meta.json"))
+        registry.publish("store", "1", version, path, None, {"accuracy": 90.0 + i, "saved_at": "2025-01-03"}, archived)
+
+    current = registry.get("store", "1")
+    assert current["version"] == "20250103_000000"
+    assert current["accuracy"] == 92.0
+    assert current["summary"] == {"accuracy": 92.0, "saved_at": "2025-01-03"}
+    assert current["checksum"].startswith("sha256:")
+    assert current["size_bytes"] == len("model 2")
+    assert [entry["state"] for entry in registry.history("store", "1")] == ["current", "archived", "archived"]
+
+    dropped = registry.prune("store", "1", keep=1)
+    assert [entry["version"] for entry in dropped] == ["20250101_000000"]
+    assert dropped[0]["path"] == str(tmp_path / "old_1.npz")
+    assert len(registry.history("store", "1")) == 2
+
+def test_republish_without_archive_replaces_current(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry.db"))
+    path = _write(tmp_path / "Tea_model.npz")
+    registry.publish("category", "Tea", "v1", path, None, {})
+    registry.publish("category", "Tea", "v2", path, None, {})
+
+    assert [entry["version"] for entry in registry.history("category", "Tea")] == ["v2"]
+    assert [entry["target_id"] for entry in registry.list_current("category")] == ["Tea"]
+    assert registry.get("store", "Tea") is None
+
+    registry.set_targets("category", ["Tea", "Coffee"])
+    assert registry.targets("category") == ["Coffee", "Tea"]
+
+def test_prune_treats_unversioned_entries_as_oldest(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry.db"))
+    path = _write(tmp_path / "store_1.npz")
+    # Backfilled by an earlier release without a model_version
+    registry.add_archived("store", "1", "unversioned", _write(tmp_path / "old.npz"), None, {})
+    for i, version in enumerate(["20250101_000000", "20250102_000000"]):
+        registry.add_archived("store", "1", version, _write(tmp_path / f"old_{i}.npz"), None, {})
+    registry.publish("store", "1", "20250103_000000", path, None, {})
+
+    assert [entry["version"] for entry in registry.history("store", "1")] == [
+        "20250103_000000", "20250102_000000", "20250101_000000", "unversioned"
+    ]
+    dropped = registry.prune("store", "1", keep=2)
+    assert [entry["version"] for entry in dropped] == ["unversioned"]
+
+def test_file_version_sorts_with_generated_versions(tmp_path):
+    import os
+    from model_registry import file_version
+
+    path = _write(tmp_path / "store_1.npz")
+    os.utime(path, (1735689600, 1735689600))  # 2025-01-01T00:00:00Z
+    assert file_version(path) == "20250101_070000"
@@ -10,8 +10,8 @@ class MockEngine:
         pass
 
 @pytest.fixture
-def trainer():
-    return ModelTrainer(engine=MockEngine(), model_dir="./test_models")
+def trainer(tmp_path):
+    return ModelTrainer(engine=MockEngine(), model_dir=str(tmp_path))
 
 def test_validate_data_quality_insufficient_days(trainer):
     # Create DF with only 5 days (threshold is likely 14 or 30)
@@ -49,3 +49,54 @@ def test_get_prophet_params_short(trainer):
     assert isinstance(params, dict)
     # Check for a known param in short mode
     assert 'changepoint_prior_scale' in params
+
+def test_backtest_history_features_match_the_future_frame(trainer):
+    from predictor import predictor
+
+    scaler_params = {
+        "columns": ["lag_7", "rolling_mean_7", "rolling_std_7", "transactions_count"],
+        "mean_": {"lag_7": 100.0, "rolling_mean_7": 100.0, "rolling_std_7": 10.0, "transactions_count": 40.0},
+        "scale_": {"lag_7": 20.0, "rolling_mean_7": 15.0, "rolling_std_7": 5.0, "transactions_count": 8.0},
+    }
+    y_history = np.arange(1, 61, dtype=float)
+    train_part = pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=60), 'y': np.log1p(y_history)})
+
+    values = trainer._backtest_history_features(scaler_params)(train_part, y_history)
+
+    recent = pd.Series(y_history).tail(14)
+    metadata = {"y_recent_mean": recent.mean(), "y_recent_std": recent.std(), "scaler_params": scaler_params}
+    future = predictor.generate_future_dataframe(None, 3, [], metadata, start_date=date(2024, 3, 1))
+    for col, value in values.items():
+        assert future[col].iloc[0] == pytest.approx(value)
+    assert values["lag_7"] == pytest.approx((recent.mean() - 100.0) / 20.0)
+
+def test_materialized_forecast_matches_a_fresh_forecast(sqlite_trainer):
+    from fallback_engines import ENGINES
+    from model_trainer import get_current_date_wib
+    from predictor import predictor
+
+    # Weekends forecast below zero: clipping before the baseline adjustment
+    # would change the horizon mean and every served value
+    ds = pd.date_range(start='2024-01-01', periods=120)
+    model = ENGINES["seasonal_naive"]().fit(pd.Series(ds), 40 - 60 * (ds.dayofweek >= 5))
+    metadata = {"y_mean": 20.0, "y_recent_mean": 30.0, "log_transform": False, "model_version": "v1"}
+
+    assert sqlite_trainer.materialize_forecasts("1", model, metadata, days=14) == 14
+    # Upsert: materializing again replaces the rows
+    assert sqlite_trainer.materialize_forecasts("1", model, metadata, days=14) == 14
+
+    start_date = get_current_date_wib() + timedelta(days=1)
+    stored = sqlite_trainer.load_materialized_forecasts("1", "v1", start_date, 14)
+    assert (stored["yhat"] < 0).any()
+
+    for periods in [7, 14]:
+        materialized = sqlite_trainer.load_materialized_forecasts("1", "v1", start_date, periods)
+        fresh = predictor.predict_with_events(model, metadata, periods, start_date=start_date)
+        served = predictor.predict_from_materialized(materialized, metadata)
+        assert [r["ds"] for r in served] == [r["ds"] for r in fresh]
+        for key in ["yhat", "yhat_lower", "yhat_upper"]:
+            assert [r[key] for r in served] == pytest.approx([r[key] for r in fresh])
+
+    # Other model versions and days past the materialized horizon miss
+    assert sqlite_trainer.load_materialized_forecasts("1", "v2", start_date, 7) is None
+    assert sqlite_trainer.load_materialized_forecasts("1", "v1", start_date, 15) is None
@@ -0,0 +1,57 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from fallback_engines import ENGINES
+from predictor import event_intensities, predictor
+
+
+def _engine():
+    ds = pd.date_range(start='2024-01-01', periods=120)
+    y = 100 + 20 * (ds.dayofweek >= 5) + np.arange(120) * 0.5
+    return ENGINES["seasonal_naive"]().fit(pd.Series(ds), y)
+
+def test_predict_horizons_matches_single_predictions():
+    model = _engine()
+    metadata = {"y_mean": 120.0, "y_recent_mean": 150.0, "log_transform": False}
+    events = [{"date": "2024-05-03", "type": "promotion", "impact": 0.5}]
+    calendars = {}
+
+    batched = predictor.predict_horizons(
+        model, metadata, [7, 30, 7], events, start_date=date(2024, 5, 1), calendars=calendars
+    )
+
+    assert list(calendars) == [(date(2024, 5, 1), 30)]
+    for periods, records in zip([7, 30, 7], batched):
+        single = predictor.predict_with_events(model, metadata, periods, events, start_date=date(2024, 5, 1))
+        assert records == single
+
+def test_event_intensities_map_events_to_rows():
+    ds = pd.Series(pd.date_range(start='2024-05-01', periods=5))
+    events = [
+        {"date": "2024-05-02", "type": "promotion", "impact": 0.3},
+        {"date": "2024-05-02", "type": "promotion", "impact": 0.5},
+        {"date": "2024-05-03", "type": "holiday", "impact": -0.4},
+        {"date": "2024-05-04", "type": "store-closed", "impact": 0.2},
+        {"date": "2024-05-05", "type": "festival", "impact": 0.7},
+        {"date": "2024-06-01", "type": "promotion", "impact": 0.9},
+        {"date": "not-a-date", "type": "promotion", "impact": 0.9},
+    ]
+
+    columns = event_intensities(ds, events)
+    np.testing.assert_allclose(columns["promo_intensity"], [0, 0.5, 0, 0, 0])
+    np.testing.assert_allclose(columns["holiday_intensity"], [0, 0, -0.4, 0, 0])
+    np.testing.assert_allclose(columns["closure_intensity"], [0, 0, 0, 1, 0])
+    np.testing.assert_allclose(columns["event_intensity"], [0, 0, 0, 0, 0.7])
+
+    reversed_columns = event_intensities(ds, events[::-1])
+    for name, values in columns.items():
+        np.testing.assert_array_equal(reversed_columns[name], values)
+
+def test_effective_interval_mode_reports_sampled_fallback():
+    model = _engine()
+    assert predictor.effective_interval_mode(model, "sampled") == "analytic"
+    assert predictor.effective_interval_mode(model, "none") == "none"
+
+    forecast = predictor.forecast_with_intervals(model, pd.DataFrame({'ds': pd.date_range('2024-05-01', periods=3)}), {}, "sampled")
+    assert len(forecast) == 3
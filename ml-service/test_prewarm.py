@@ -0,0 +1,63 @@
+import json
+import os
+from model_cache import ModelCache
+from prewarm import RequestTracker, discover_models, prewarm_order, prewarm_models
+
+
+def _touch(path, mtime, content="{}"):
+    with open(path, "w") as f:
+        f.write(content)
+    os.utime(path, (mtime, mtime))
+
+def test_discover_and_order_by_recent_requests(tmp_path):
+    categories = tmp_path / "categories"
+    categories.mkdir()
+    for name, mtime in (("store_1.json", 100), ("store_2.npz", 300), ("store_2.json", 300), ("store_1_meta.json", 100), ("store_1_tuned.json", 100)):
+        _touch(tmp_path / name, mtime)
+    _touch(categories / "Hot_Drinks_model.npz", 200)
+    # Legacy pickles are never loaded by the service
+    _touch(categories / "Tea_model.pkl", 400)
+    _touch(categories / "Tea_metadata.json", 400, json.dumps({"category": "Tea"}))
+    _touch(categories / "Hot_Drinks_metadata.json", 200, json.dumps({"category": "Hot Drinks"}))
+
+    models = discover_models(str(tmp_path), str(categories))
+    assert sorted((kind, target) for kind, target, _ in models) == [
+        ("category", "Hot Drinks"), ("store", "1"), ("store", "2")
+    ]
+
+    # Requested models first (most recent first), then newest artifacts
+    order = prewarm_order(models, {"store:1": 50.0})
+    assert order == [("store", "1"), ("store", "2"), ("category", "Hot Drinks")]
+
+def test_prewarm_models_skips_failures_and_reports_progress():
+    progress = []
+    warmed = []
+
+    def warm_store(store_id):
+        if store_id == "bad":
+            raise ValueError("corrupt")
+        warmed.append(store_id)
+
+    cache = ModelCache(max_entries=10, max_bytes=0, enabled=True)
+    for key in (("store", "1"), ("store", "2"), ("category", "Tea")):
+        cache.put(key, object(), {}, ())
+
+    stats = prewarm_models(
+        [("store", "1"), ("store", "bad"), ("category", "Tea"), ("store", "2")],
+        warm_store, lambda category: warmed.append(category),
+        max_models=3, on_progress=lambda done, total: progress.append((done, total)), cache=cache
+    )
+
+    assert warmed == ["1", "Tea"]
+    assert stats["warmed"] == 2 and stats["failed"] == 1 and stats["skipped"] == 1
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    # The highest priority model ends up most recently used
+    assert max(cache._entries, key=lambda key: cache._entries[key].last_used) == ("store", "1")
+
+def test_request_tracker_persists_on_flush(tmp_path):
+    path = str(tmp_path / "requests.json")
+    tracker = RequestTracker(path)
+    tracker.record("store", "1")
+    tracker.flush()
+
+    assert set(RequestTracker(path).last_requested()) == {"store:1"}
@@ -0,0 +1,35 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+import serialization
+from predictor import forecast_columns
+from serialization import ForecastJSONResponse, format_forecast
+
+
+@pytest.fixture
+def forecast():
+    return pd.DataFrame({
+        'ds': pd.date_range(start='2026-01-30', periods=3),
+        'yhat': [1.5, 2.0, 3.25],
+        'yhat_lower': [1.0, 1.5, 2.5],
+        'yhat_upper': [2.0, 2.5, 4.0],
+    })
+
+def test_records_and_columnar_shapes(forecast):
+    columns = forecast_columns(forecast)
+    assert format_forecast(columns)[1] == {'ds': '2026-01-31', 'yhat': 2.0, 'yhat_lower': 1.5, 'yhat_upper': 2.5}
+    assert format_forecast(columns, "columnar") is columns
+    assert forecast_columns(forecast, ds_unit='s')['ds'][0] == forecast['ds'][0].isoformat()
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_response_encodes_numpy_columns(forecast, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson not installed")
+
+    body = json.loads(ForecastJSONResponse({"predictions": forecast_columns(forecast)}).body)
+    assert body["predictions"]["yhat"] == [1.5, 2.0, 3.25]
+    assert body["predictions"]["ds"] == ['2026-01-30', '2026-01-31', '2026-02-01']
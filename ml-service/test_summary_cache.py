@@ -0,0 +1,69 @@
+from datetime import date
+import pandas as pd
+from summary_cache import SummaryCache
+
+
+class FakeSummaryTable:
+    def __init__(self):
+        ds = pd.date_range(start='2025-01-01', end='2025-03-31')
+        self.df = pd.DataFrame({'ds': ds, 'y': [float(i) for i in range(len(ds))]})
+        self.calls = []
+
+    def query(self, start: date, end: date) -> pd.DataFrame:
+        self.calls.append((start, end))
+        mask = (self.df['ds'] >= pd.Timestamp(start)) & (self.df['ds'] <= pd.Timestamp(end))
+        return self.df[mask].reset_index(drop=True)
+
+
+def test_delta_fetch_with_late_corrections(tmp_path):
+    table = FakeSummaryTable()
+    cache = SummaryCache(str(tmp_path / "summary.parquet"), refetch_days=3)
+
+    first = cache.fetch(date(2025, 1, 1), date(2025, 2, 28), table.query)
+    assert len(first) == 59
+    assert table.calls[-1] == (date(2025, 1, 1), date(2025, 2, 28))
+
+    # Late correction inside the re-fetch window is picked up
+    table.df.loc[table.df['ds'] == '2025-02-27', 'y'] = -1.0
+    second = cache.fetch(date(2025, 1, 3), date(2025, 3, 2), table.query)
+    assert table.calls[-1] == (date(2025, 2, 26), date(2025, 3, 2))
+    pd.testing.assert_frame_equal(second, table.query(date(2025, 1, 3), date(2025, 3, 2)))
+
+def test_cached_window_needs_no_query(tmp_path):
+    table = FakeSummaryTable()
+    cache = SummaryCache(str(tmp_path / "summary.parquet"), refetch_days=3)
+    cache.fetch(date(2025, 1, 1), date(2025, 3, 31), table.query)
+
+    result = cache.fetch(date(2025, 1, 10), date(2025, 2, 10), table.query)
+    assert len(table.calls) == 1
+    assert len(result) == 32
+
+def test_window_outside_cache_is_full_fetch(tmp_path):
+    table = FakeSummaryTable()
+    cache = SummaryCache(str(tmp_path / "summary.parquet"), refetch_days=3)
+    cache.fetch(date(2025, 2, 1), date(2025, 2, 10), table.query)
+
+    result = cache.fetch(date(2025, 1, 1), date(2025, 1, 31), table.query)
+    assert table.calls[-1] == (date(2025, 1, 1), date(2025, 1, 31))
+    assert len(result) == 31
+
+def test_failed_write_keeps_the_previous_file(tmp_path, monkeypatch):
+    import summary_cache
+
+    table = FakeSummaryTable()
+    cache = SummaryCache(str(tmp_path / "summary.parquet"), refetch_days=3)
+    cache.fetch(date(2025, 1, 1), date(2025, 1, 31), table.query)
+
+    write_table = summary_cache.pq.write_table
+
+    def failing_write(table, where):
+        write_table(table, where)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(summary_cache.pq, "write_table", failing_write)
+    cache.fetch(date(2025, 1, 1), date(2025, 2, 28), table.query)
+    monkeypatch.undo()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["summary.parquet"]
+    result = cache.fetch(date(2025, 1, 10), date(2025, 1, 20), table.query)
+    assert len(result) == 11
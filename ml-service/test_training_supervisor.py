@@ -0,0 +1,58 @@
+import os
+import time
+import pytest
+from job_queue import PermanentJobError
+from training_supervisor import TrainingSupervisor, TrainingTimeoutError
+
+
+class _RecordingContext:
+    def __init__(self):
+        self.events = []
+
+    def stage(self, name, progress=None):
+        self.events.append(("stage", name))
+
+    def progress(self, fraction):
+        self.events.append(("progress", fraction))
+
+
+# Handlers run in spawned children, so they must be module-level
+def _succeeding_handler(payload, ctx):
+    ctx.stage("fit")
+    ctx.progress(0.5)
+    return {"pid": os.getpid(), "nice": os.nice(0), "store_id": payload["store_id"]}
+
+def _permanent_failure_handler(payload, ctx):
+    raise PermanentJobError("bad data")
+
+def _slow_handler(payload, ctx):
+    time.sleep(60)
+
+def _crashing_handler(payload, ctx):
+    os._exit(3)
+
+
+def test_runs_handler_in_limited_child_and_relays_progress():
+    supervisor = TrainingSupervisor(isolated=True, timeout_seconds=60, nice=5)
+    ctx = _RecordingContext()
+    result = supervisor.run(_succeeding_handler, {"store_id": "1"}, ctx)
+
+    assert result["store_id"] == "1"
+    assert result["pid"] != os.getpid()
+    assert result["nice"] == min(os.nice(0) + 5, 19)
+    assert ctx.events == [("stage", "fit"), ("progress", 0.5)]
+
+def test_child_errors_keep_their_retry_semantics():
+    supervisor = TrainingSupervisor(isolated=True, timeout_seconds=60)
+    with pytest.raises(PermanentJobError, match="bad data"):
+        supervisor.run(_permanent_failure_handler, {}, _RecordingContext())
+    with pytest.raises(RuntimeError, match="exited with code 3"):
+        supervisor.run(_crashing_handler, {}, _RecordingContext())
+
+def test_timeout_kills_child():
+    supervisor = TrainingSupervisor(isolated=True, timeout_seconds=1)
+    start = time.monotonic()
+    with pytest.raises(TrainingTimeoutError):
+        supervisor.run(_slow_handler, {}, _RecordingContext())
+    assert time.monotonic() - start < 20
+    assert supervisor.stats()["running"] == 0
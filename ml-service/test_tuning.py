@@ -0,0 +1,66 @@
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from backtest import run_backtest
+from tuning import candidate_profiles, tune_profile, save_profile, load_profile
+
+
+BASE = {
+    "yearly_seasonality": False, "weekly_seasonality": 3, "daily_seasonality": False,
+    "seasonality_mode": "additive", "seasonality_prior_scale": 5.0,
+    "changepoint_prior_scale": 0.01, "changepoint_range": 0.85, "n_changepoints": 10
+}
+
+
+def test_candidates_start_with_base_and_are_distinct():
+    candidates = candidate_profiles(BASE, max_trials=10)
+    assert candidates[0] == BASE
+    assert len(candidates) == 10
+
+    signatures = {json.dumps(c, sort_keys=True) for c in candidates}
+    assert len(signatures) == 10
+    # Yearly seasonality stays disabled when the base profile disables it
+    assert all(c["yearly_seasonality"] is False for c in candidates)
+
+def test_tune_profile_scores_baseline_and_persists(tmp_path):
+    ds = pd.date_range("2025-01-01", periods=90, freq="D")
+    y = [100.0 + 20.0 * (d.dayofweek >= 5) + i * 0.5 for i, d in enumerate(ds)]
+    train_df = pd.DataFrame({"ds": ds, "y": y})
+
+    profile = tune_profile(BASE, [], train_df, np.array(y), False,
+                           max_trials=3, budget_seconds=120, patience=5, workers=1)
+
+    assert profile["trials"] == 3
+    assert profile["baseline_score"] is not None
+    assert profile["score"] <= profile["baseline_score"]
+    assert set(profile["prophet_params"]) <= set(BASE)
+
+    path = str(tmp_path / "store_1_tuned.json")
+    save_profile(path, profile)
+    assert load_profile(path) == profile
+    assert load_profile(str(tmp_path / "missing.json")) is None
+
+def test_tune_profile_needs_enough_data():
+    train_df = pd.DataFrame({"ds": pd.date_range("2025-01-01", periods=20), "y": 1.0})
+    assert tune_profile(BASE, [], train_df, np.ones(20), False, workers=1) is None
+
+def test_tune_profile_scores_on_backtest_fold_frames():
+    rng = np.random.default_rng(3)
+    ds = pd.date_range("2025-01-01", periods=90, freq="D")
+    y = 100 + 20 * np.sin(np.arange(90) / 5) + rng.normal(0, 2, 90)
+    train_df = pd.DataFrame({"ds": ds, "y": y, "same_day": y})
+    regressors = [["same_day", None]]
+
+    def history_features(train_part, y_history):
+        return {"same_day": float(train_part["y"].tail(14).mean())}
+
+    profile = tune_profile(BASE, regressors, train_df, y, False, max_trials=2, budget_seconds=120,
+                           patience=5, workers=1, history_features=history_features)
+    backtest = run_backtest({"prophet_params": BASE, "regressors": regressors}, train_df, y, False,
+                            workers=1, history_features=history_features)
+
+    # The baseline is the (leak-free) backtest MAPE of the base profile
+    assert profile["baseline_score"] == pytest.approx(backtest["mape"], abs=0.01)
+    assert profile["baseline_score"] > 1
+    assert profile["score"] <= profile["baseline_score"]
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+import pandas as pd
+from prophet import Prophet
+from warm_start import fit_prophet, warm_start_init
+
+
+def _frame(offset: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    ds = pd.date_range(start='2024-01-01', periods=200)
+    df = pd.DataFrame({
+        'ds': ds,
+        'y': 100 + np.arange(200) * 0.3 + 8 * (ds.dayofweek >= 5) + rng.normal(0, 2, 200),
+        'promo': rng.uniform(0, 1, 200),
+    })
+    return df.iloc[offset:offset + 150].reset_index(drop=True)
+
+
+def _model(regressors=('promo',)) -> Prophet:
+    model = Prophet(yearly_seasonality=False, weekly_seasonality=3, daily_seasonality=False, n_changepoints=10)
+    for reg in regressors:
+        model.add_regressor(reg)
+    return model
+
+
+def test_refit_warm_starts_from_previous_params():
+    previous = _model()
+    cold = fit_prophet(previous, _frame(0))
+    assert cold["mode"] == "cold"
+    assert cold["reason"] == "no_previous_model"
+    assert cold["baseline"]["fit_seconds"] == cold["fit_seconds"]
+
+    model = _model()
+    warm = fit_prophet(model, _frame(2), previous, cold)
+    assert warm["mode"] == "warm"
+    assert warm["baseline"] == cold["baseline"]
+    assert "fit_seconds_saved" in warm
+
+    # Warm and cold refits converge to the same optimum
+    reference = _model()
+    reference.fit(_frame(2))
+    future = _frame(2).tail(10)
+    np.testing.assert_allclose(
+        model.predict(future)['yhat'], reference.predict(future)['yhat'], rtol=1e-2
+    )
+
+def test_incompatible_layout_falls_back_to_cold():
+    previous = _model()
+    previous.fit(_frame(0))
+
+    init, reason = warm_start_init(previous, _model(regressors=()), _frame(2).drop(columns='promo'))
+    assert init is None
+    assert reason == "regressors_changed"
+
+    stats = fit_prophet(_model(), _frame(2), previous, enabled=False)
+    assert stats["mode"] == "cold"
+    assert stats["reason"] == "disabled"
+
+def test_fit_deadline_stops_fits_once_the_budget_is_spent():
+    import time
+    from warm_start import fit_deadline
+
+    df = pd.DataFrame({"ds": pd.date_range("2024-01-01", periods=60), "y": np.arange(60, dtype=float)})
+    model = Prophet(yearly_seasonality=False, daily_seasonality=False)
+    with fit_deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(TimeoutError):
+            fit_prophet(model, df, enabled=False)
+    assert not model.params
+
+    # Outside the block fits are unlimited again
+    model = Prophet(yearly_seasonality=False, daily_seasonality=False)
+    fit_prophet(model, df, enabled=False)
+    assert model.params
@@ -0,0 +1,39 @@
+from warmup import Warmup
+
+
+def test_steps_run_in_order_and_report_timings():
+    calls = []
+    warmup = Warmup()
+    warmup.add_step("trainer", lambda: calls.append("trainer"))
+    warmup.add_step("stan_backend", lambda: calls.append("stan_backend"))
+    assert not warmup.ready
+
+    warmup.run()
+
+    assert calls == ["trainer", "stan_backend"]
+    status = warmup.status()
+    assert status["ready"] and status["state"] == "ready"
+    assert list(status["stages"]) == ["trainer", "stan_backend"]
+
+def test_failed_step_keeps_service_not_ready():
+    def broken():
+        raise RuntimeError("no cmdstan")
+
+    warmup = Warmup()
+    warmup.add_step("stan_backend", broken)
+    warmup.add_step("trainer", lambda: None)
+    warmup.run()
+
+    assert not warmup.ready
+    assert warmup.status()["errors"] == {"stan_backend": "no cmdstan"}
+    assert "trainer" in warmup.status()["stages"]
+
+def test_deferred_warmup_is_ready_without_running_steps():
+    calls = []
+    warmup = Warmup()
+    warmup.add_step("trainer", lambda: calls.append("trainer"))
+    warmup.defer()
+
+    assert warmup.ready
+    assert warmup.status()["state"] == "deferred"
+    assert calls == []
@@ -0,0 +1,208 @@
+"""
+Supervised Training Subprocesses
+
+Runs job handlers (Stan fits) in spawned child processes instead of the
+uvicorn process, so a long fit cannot starve the /ml/predict threadpool
+(GIL, pandas/NumPy work) or grow the API process's RSS.
+
+Each child:
+- starts its own process group (a timeout kill also reaches its pool workers)
+- lowers its CPU priority with nice()
+- caps its address space with RLIMIT_AS (inherited by pool workers and
+  CmdStan, each of which gets its own cap)
+
+The parent relays stage/progress messages to the JobContext, enforces the
+wall-clock timeout, and limits the number of concurrently running fits
+with a semaphore.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from config import (
+    TRAIN_ISOLATED, TRAIN_JOB_TIMEOUT_SECONDS, TRAIN_MEMORY_LIMIT_MB,
+    TRAIN_NICE, TRAIN_MAX_CONCURRENT_FITS
+)
+from job_queue import JobContext, JobHandler, PermanentJobError
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingTimeoutError(PermanentJobError):
+    """Raised when a training child exceeds its wall-clock timeout"""
+    pass
+
+
+class _ChildContext:
+    """JobContext stand-in inside the child: forwards stage/progress to the parent"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def stage(self, name: str, progress: Optional[float] = None):
+        self._conn.send(("stage", name, progress))
+
+    def progress(self, fraction: float):
+        self._conn.send(("progress", fraction))
+
+
+def _apply_limits(memory_limit_mb: int, nice: int):
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    if nice > 0 and hasattr(os, "nice"):
+        os.nice(nice)
+    if memory_limit_mb > 0 and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _child_main(conn, handler: JobHandler, payload: Dict[str, Any], memory_limit_mb: int, nice: int):
+    """Entry point of the training child process"""
+    try:
+        _apply_limits(memory_limit_mb, nice)
+        result = handler(payload, _ChildContext(conn))
+        conn.send(("result", result))
+    except BaseException as e:
+        # Running out of the memory cap would fail again on retry
+        permanent = isinstance(e, (PermanentJobError, MemoryError))
+        try:
+            conn.send(("error", type(e).__name__, str(e), permanent, traceback.format_exc()))
+        except Exception:
+            pass
+    finally:
+        conn.close()
+
+
+class TrainingSupervisor:
+    """
+    Runs job handlers in resource-limited child processes.
+    """
+
+    def __init__(
+        self,
+        isolated: bool = TRAIN_ISOLATED,
+        timeout_seconds: int = TRAIN_JOB_TIMEOUT_SECONDS,
+        memory_limit_mb: int = TRAIN_MEMORY_LIMIT_MB,
+        nice: int = TRAIN_NICE,
+        max_concurrent: int = TRAIN_MAX_CONCURRENT_FITS
+    ):
+        self.isolated = isolated
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self.nice = nice
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, handler: JobHandler) -> JobHandler:
+        """Job handler that runs `handler` under this supervisor"""
+        def supervised(payload: Dict[str, Any], ctx: JobContext) -> Optional[Dict[str, Any]]:
+            return self.run(handler, payload, ctx)
+        supervised.__name__ = getattr(handler, "__name__", "supervised")
+        return supervised
+
+    def run(self, handler: JobHandler, payload: Dict[str, Any], ctx: JobContext) -> Optional[Dict[str, Any]]:
+        """
+        Run a module-level handler (picklable by reference) in a child process.
+
+        Blocks until a fit slot is free; with isolation disabled the handler
+        runs in this process (still limited by the semaphore).
+        """
+        with self._slots:
+            with self._lock:
+                self._running += 1
+            try:
+                if not self.isolated:
+                    return handler(payload, ctx)
+                return self._run_isolated(handler, payload, ctx)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+    def _run_isolated(self, handler: JobHandler, payload: Dict[str, Any], ctx: JobContext) -> Optional[Dict[str, Any]]:
+        mp_context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = mp_context.Pipe(duplex=False)
+        process = mp_context.Process(
+            target=_child_main,
+            args=(child_conn, handler, payload, self.memory_limit_mb, self.nice),
+            name=f"train-{getattr(handler, '__name__', 'job')}"
+        )
+        start = time.monotonic()
+        deadline = start + self.timeout_seconds if self.timeout_seconds > 0 else None
+        process.start()
+        child_conn.close()
+        logger.info(
+            f"Started training process {process.pid} ({process.name}, timeout={self.timeout_seconds}s, "
+            f"memory cap={self.memory_limit_mb or 'none'}MB, nice={self.nice})"
+        )
+
+        try:
+            while True:
+                wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+                if wait <= 0:
+                    raise TrainingTimeoutError(f"Training timed out after {self.timeout_seconds}s")
+                if not parent_conn.poll(wait):
+                    continue
+
+                try:
+                    message = parent_conn.recv()
+                except EOFError:
+                    break  # child exited without reporting a result
+
+                kind = message[0]
+                if kind == "stage":
+                    ctx.stage(message[1], message[2])
+                elif kind == "progress":
+                    ctx.progress(message[1])
+                elif kind == "result":
+                    logger.info(f"Training process {process.pid} finished in {time.monotonic() - start:.1f}s")
+                    return message[1]
+                elif kind == "error":
+                    _, name, text, permanent, child_traceback = message
+                    logger.error(f"Training process {process.pid} failed:\n{child_traceback}")
+                    error_class = PermanentJobError if permanent else RuntimeError
+                    raise error_class(f"{name}: {text}")
+
+            process.join(5)
+            raise RuntimeError(
+                f"Training process exited with code {process.exitcode} without a result "
+                f"(killed by the OOM killer or the memory cap?)"
+            )
+        finally:
+            parent_conn.close()
+            self._stop(process)
+
+    @staticmethod
+    def _stop(process):
+        process.join(5)
+        if process.is_alive():
+            logger.warning(f"Killing training process group {process.pid}")
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except (AttributeError, ProcessLookupError, PermissionError):
+                process.kill()
+            process.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = self._running
+        return {
+            "isolated": self.isolated,
+            "running": running,
+            "max_concurrent": self.max_concurrent,
+            "timeout_seconds": self.timeout_seconds,
+            "memory_limit_mb": self.memory_limit_mb,
+            "nice": self.nice,
+        }
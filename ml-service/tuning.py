@@ -0,0 +1,246 @@
+"""
+Prophet Hyperparameter Tuning
+
+Offline search over changepoint_prior_scale, seasonality_prior_scale,
+seasonality_mode and the weekly/yearly Fourier orders, starting from the
+PROPHET_PARAMS_* profile the trainer would pick. Every candidate is scored
+by the mean MAPE of a rolling-origin backtest (see backtest.py) on the
+same fold frames - test windows filled like a forecast from the cutoff -
+so the baseline and every candidate are scored alike.
+
+- Trials run in the shared process pool under a wall-clock budget
+- The search stops after TUNING_PATIENCE trials without improvement
+- A trial is pruned after any fold whose running MAPE exceeds
+  TUNING_PRUNE_RATIO x the best score known when it was submitted
+
+The winning profile is saved next to the model (*_tuned.json) and reused
+by later retrains instead of searching again.
+"""
+
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest import HistoryFeatures, fold_cutoffs, fold_frames, get_pool, run_fold
+from config import (
+    BACKTEST_HORIZON, BACKTEST_STEP, BACKTEST_FOLDS, INTERVAL_WIDTH,
+    TUNING_MAX_TRIALS, TUNING_BUDGET_SECONDS, TUNING_PATIENCE,
+    TUNING_PRUNE_RATIO, TUNING_WORKERS, TUNING_SEARCH_SPACE
+)
+from timezone_utils import wib_isoformat
+
+logger = logging.getLogger(__name__)
+
+TUNED_KEYS = tuple(TUNING_SEARCH_SPACE)
+
+
+def candidate_profiles(base_params: Dict[str, Any], max_trials: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Base profile first, then distinct random draws from the search space.
+    
+    Yearly seasonality is only searched if the base profile enables it.
+    """
+    space = dict(TUNING_SEARCH_SPACE)
+    if not base_params.get("yearly_seasonality"):
+        space.pop("yearly_seasonality", None)
+    if not base_params.get("weekly_seasonality"):
+        space.pop("weekly_seasonality", None)
+    
+    total = int(np.prod([len(values) for values in space.values()]))
+    rng = random.Random(seed)
+    candidates = [dict(base_params)]
+    seen = {json.dumps({k: base_params.get(k) for k in space}, sort_keys=True)}
+    
+    while len(candidates) < min(max_trials, total + 1):
+        overrides = {key: rng.choice(values) for key, values in space.items()}
+        signature = json.dumps(overrides, sort_keys=True)
+        if signature in seen:
+            continue
+        seen.add(signature)
+        candidates.append({**base_params, **overrides})
+    
+    return candidates
+
+
+def _run_trial(
+    params: Dict[str, Any],
+    regressors: List[List[Any]],
+    folds: List[Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]],
+    log_transform: bool,
+    prune_above: Optional[float]
+) -> Dict[str, Any]:
+    """Backtest one profile fold by fold (latest fold first), pruning early"""
+    start = time.perf_counter()
+    spec = {"prophet_params": params, "regressors": regressors}
+    errors = []
+    folds_run = 0
+    pruned = False
+    
+    for train_part, test_part, actual in reversed(folds):
+        folds_run += 1
+        yhat, _, _ = run_fold(spec, train_part, test_part, None, INTERVAL_WIDTH)
+        predicted = np.maximum(np.expm1(np.clip(yhat, -10, 20)) if log_transform else yhat, 0)
+        mask = actual > 0
+        errors.extend(np.abs(actual[mask] - predicted[mask]) / actual[mask])
+        
+        if prune_above is not None and errors and np.mean(errors) * 100 > prune_above:
+            pruned = True
+            break
+    
+    return {
+        "params": params,
+        "score": round(float(np.mean(errors) * 100), 3) if errors else None,
+        "folds_run": folds_run,
+        "pruned": pruned,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def tune_profile(
+    base_params: Dict[str, Any],
+    regressors: List[List[Any]],
+    train_df: pd.DataFrame,
+    y_original: np.ndarray,
+    log_transform: bool,
+    max_trials: int = TUNING_MAX_TRIALS,
+    budget_seconds: float = TUNING_BUDGET_SECONDS,
+    patience: int = TUNING_PATIENCE,
+    prune_ratio: float = TUNING_PRUNE_RATIO,
+    workers: int = TUNING_WORKERS,
+    min_train: int = 30,
+    history_features: Optional[HistoryFeatures] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Search for the Prophet profile with the lowest backtest MAPE.
+    
+    Args:
+        base_params: Profile the trainer would use without tuning (trial 0)
+        regressors: [[name, prior_scale or None], ...] as for backtest.build_model
+        train_df: Prophet training frame (model space)
+        y_original: Target on the original scale
+        history_features: Test-window values of history-derived regressors
+            (see backtest.fold_frames)
+    
+    Returns:
+        Tuned profile record (prophet_params, score, baseline_score, trials...)
+        or None if there is not enough data to backtest
+    """
+    cutoffs = fold_cutoffs(len(train_df), BACKTEST_HORIZON, BACKTEST_STEP, BACKTEST_FOLDS, min_train)
+    if not cutoffs:
+        logger.warning(f"Not enough data to tune ({len(train_df)} rows)")
+        return None
+    
+    folds = [
+        (train_part, test_part, y_original[cutoff:cutoff + BACKTEST_HORIZON])
+        for cutoff, (train_part, test_part) in zip(
+            cutoffs, fold_frames(train_df, y_original, cutoffs, BACKTEST_HORIZON, history_features)
+        )
+    ]
+    candidates = candidate_profiles(base_params, max_trials)
+    deadline = time.monotonic() + budget_seconds
+    start = time.perf_counter()
+    
+    trials: List[Dict[str, Any]] = []
+    best: Optional[Dict[str, Any]] = None
+    since_improvement = 0
+    stop_reason = "exhausted"
+    
+    def prune_above() -> Optional[float]:
+        return best["score"] * prune_ratio if best else None
+    
+    def record(trial: Dict[str, Any]):
+        nonlocal best, since_improvement
+        trials.append(trial)
+        if trial["score"] is not None and not trial["pruned"] and (best is None or trial["score"] < best["score"]):
+            best = trial
+            since_improvement = 0
+        else:
+            since_improvement += 1
+    
+    def trial_args(params):
+        return (params, regressors, folds, log_transform, prune_above())
+    
+    if workers <= 1:
+        for params in candidates:
+            if time.monotonic() >= deadline:
+                stop_reason = "budget"
+                break
+            if since_improvement >= patience:
+                stop_reason = "early_stopping"
+                break
+            record(_run_trial(*trial_args(params)))
+    else:
+        pool = get_pool(workers)
+        queue = list(candidates)
+        running = set()
+        while queue or running:
+            while queue and len(running) < workers and since_improvement < patience:
+                running.add(pool.submit(_run_trial, *trial_args(queue.pop(0))))
+            if not running:
+                stop_reason = "early_stopping"
+                break
+            
+            done, running = wait(running, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    record(future.result())
+                except Exception as e:
+                    logger.warning(f"Tuning trial failed: {e}")
+                    since_improvement += 1
+            
+            if time.monotonic() >= deadline:
+                stop_reason = "budget"
+                for future in running:
+                    future.cancel()
+                break
+    
+    if best is None:
+        logger.warning("Tuning finished without a successful trial")
+        return None
+    
+    baseline = next(
+        (trial["score"] for trial in trials if trial["params"] == base_params and not trial["pruned"]), None
+    )
+    seconds = time.perf_counter() - start
+    logger.info(
+        f"Tuning: best MAPE={best['score']}% (baseline {baseline}%) after {len(trials)} trials "
+        f"in {seconds:.1f}s, stopped: {stop_reason}"
+    )
+    
+    return {
+        "prophet_params": {key: best["params"][key] for key in TUNED_KEYS if key in best["params"]},
+        "score": best["score"],
+        "baseline_score": baseline,
+        "metric": "backtest_mape",
+        "trials": len(trials),
+        "pruned_trials": sum(1 for trial in trials if trial["pruned"]),
+        "stop_reason": stop_reason,
+        "search_seconds": round(seconds, 1),
+        "data_points": int(len(train_df)),
+        "tuned_at": wib_isoformat(),
+    }
+
+
+def save_profile(path: str, profile: Dict[str, Any]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(profile, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def load_profile(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable tuned profile {path}: {e}")
+        return None
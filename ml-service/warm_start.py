@@ -0,0 +1,203 @@
+"""
+Warm-Start Prophet Refits
+
+Daily retrains mostly add a day or two to the same 365-day window, so the
+previous model's MAP estimate (k, m, delta, beta, sigma_obs) is a much
+better optimizer starting point than Prophet's default init.
+
+The previous params are only reused when the new model has the same
+growth, regressor set, seasonality layout and number of changepoints;
+otherwise the fit falls back to a cold start. Every fit reports its
+iteration count and fit time against the last cold fit (the baseline).
+
+The previous model can be a full Prophet model or the FastForecastEngine
+loaded from a compact artifact (model_artifact.py); both carry the MAP
+parameters and the layout needed for the compatibility checks.
+
+Fits inside a fit_deadline() block share a wall-clock budget: each one
+hands the remaining time to cmdstanpy, which terminates the CmdStan
+process when it runs out (an exception raised around the blocking fit,
+e.g. by SIGALRM, would leave CmdStan running).
+"""
+
+import copy
+import logging
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+
+from config import WARM_START_ENABLED
+from fast_engine import FastForecastEngine
+
+logger = logging.getLogger(__name__)
+
+_ITERATION_LINE = re.compile(r"^\s*(\d+)\s+-?\d")
+
+# time.monotonic() deadline of the current fit_deadline() block (per process)
+_fit_deadline: Optional[float] = None
+
+
+@contextmanager
+def fit_deadline(seconds: Optional[float]):
+    """
+    Wall-clock budget for the fit_prophet calls in the block (None or <= 0:
+    unlimited). A fit that runs out raises TimeoutError after its CmdStan
+    process was terminated; fits started after the budget is spent raise
+    TimeoutError right away.
+    """
+    global _fit_deadline
+    previous = _fit_deadline
+    _fit_deadline = time.monotonic() + seconds if seconds and seconds > 0 else None
+    try:
+        yield
+    finally:
+        _fit_deadline = previous
+
+
+def _seasonality_layout(model: Prophet) -> Dict[str, Tuple]:
+    return {
+        name: (props["period"], props["fourier_order"], props["mode"], props["condition_name"])
+        for name, props in model.seasonalities.items()
+    }
+
+
+def _previous_state(previous: Union[Prophet, FastForecastEngine]) -> Tuple[Optional[Dict], List[str], Dict[str, Tuple]]:
+    """(params, regressor names, seasonality layout) of a previous model"""
+    if isinstance(previous, FastForecastEngine):
+        params = {
+            "k": np.array([[previous.k]]),
+            "m": np.array([[previous.m]]),
+            "delta": previous.deltas[None, :],
+            "beta": previous.beta[None, :],
+            "sigma_obs": np.array([[previous.sigma_obs]]),
+        }
+        layout = {
+            season["name"]: (season["period"], season["fourier_order"], season["mode"], None)
+            for season in previous.seasonalities
+        }
+        return params, list(previous.regressors), layout
+    if not isinstance(previous, Prophet):
+        return None, [], {}  # fallback engine (fallback_engines.py): nothing to reuse
+    
+    return getattr(previous, "params", None), list(previous.extra_regressors), _seasonality_layout(previous)
+
+
+def warm_start_init(
+    previous: Optional[Union[Prophet, FastForecastEngine]],
+    model: Prophet,
+    train_df: pd.DataFrame
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Build an optimizer init from a previously fitted model.
+    
+    Args:
+        previous: Previously fitted model (None = cold start)
+        model: New, unfitted model (regressors already added)
+        train_df: Training frame the new model will be fitted on
+    
+    Returns:
+        (init, reason) - init is None when the layouts are incompatible
+    """
+    if previous is None:
+        return None, "no_previous_model"
+    
+    params, previous_regressors, previous_layout = _previous_state(previous)
+    if not params or any(name not in params for name in ("k", "m", "delta", "beta", "sigma_obs")):
+        return None, "previous_not_fitted"
+    if params["k"].shape[0] != 1 or model.mcmc_samples > 0:
+        return None, "not_map_estimate"
+    if previous.growth != model.growth:
+        return None, "growth_changed"
+    if previous_regressors != list(model.extra_regressors):
+        return None, "regressors_changed"
+    
+    # Run Prophet's own preprocessing on a throwaway copy to get the
+    # seasonality features (K) and changepoints (S) the fit will use
+    probe = copy.deepcopy(model)
+    layout = probe.preprocess(train_df)
+    if _seasonality_layout(probe) != previous_layout:
+        return None, "seasonality_changed"
+    if layout.S != params["delta"].shape[1]:
+        return None, "changepoints_changed"
+    if layout.K != params["beta"].shape[1]:
+        return None, "features_changed"
+    
+    init = {
+        "k": float(params["k"][0, 0]),
+        "m": float(params["m"][0, 0]),
+        "delta": params["delta"][0].copy(),
+        "beta": params["beta"][0].copy(),
+        "sigma_obs": float(params["sigma_obs"][0, 0]),
+    }
+    return init, "compatible"
+
+
+def optimizer_iterations(model: Prophet) -> Optional[int]:
+    """Iteration count of the last optimize() run, parsed from CmdStan's console output"""
+    try:
+        with open(model.stan_fit.runset.stdout_files[0]) as f:
+            iterations = [int(m.group(1)) for m in map(_ITERATION_LINE.match, f) if m]
+        return iterations[-1] if iterations else None
+    except Exception:
+        return None
+
+
+def fit_prophet(
+    model: Prophet,
+    train_df: pd.DataFrame,
+    previous: Optional[Union[Prophet, FastForecastEngine]] = None,
+    previous_fit: Optional[Dict[str, Any]] = None,
+    enabled: bool = WARM_START_ENABLED
+) -> Dict[str, Any]:
+    """
+    Fit a Prophet model, warm-starting from the previous model if possible.
+    
+    Args:
+        previous: Previous model for the same series
+        previous_fit: fit_stats recorded in the previous model's metadata
+            (carries the cold-start baseline forward)
+        enabled: Set False to always cold start
+    
+    Returns:
+        fit_stats dict for metadata
+    """
+    init, reason = warm_start_init(previous, model, train_df) if enabled else (None, "disabled")
+    
+    fit_kwargs = {} if init is None else {"init": init}
+    if _fit_deadline is not None:
+        remaining = _fit_deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Fit time budget exhausted")
+        fit_kwargs["timeout"] = remaining
+    
+    start = time.perf_counter()
+    model.fit(train_df, **fit_kwargs)
+    fit_seconds = time.perf_counter() - start
+    iterations = optimizer_iterations(model)
+    
+    stats = {
+        "mode": "warm" if init is not None else "cold",
+        "reason": reason,
+        "iterations": iterations,
+        "fit_seconds": round(fit_seconds, 3),
+    }
+    
+    if init is None:
+        stats["baseline"] = {"iterations": iterations, "fit_seconds": stats["fit_seconds"]}
+    else:
+        baseline = (previous_fit or {}).get("baseline")
+        stats["baseline"] = baseline
+        if baseline:
+            if baseline.get("iterations") is not None and iterations is not None:
+                stats["iterations_saved"] = baseline["iterations"] - iterations
+            stats["fit_seconds_saved"] = round(baseline["fit_seconds"] - fit_seconds, 3)
+    
+    logger.info(
+        f"Prophet fit ({stats['mode']}, {reason}): {iterations} iterations in {fit_seconds:.2f}s"
+    )
+    return stats
@@ -0,0 +1,100 @@
+"""
+Startup Warm-Up and Readiness
+
+main.py keeps its import light (no pandas/Prophet/Stan) so /health
+answers right after the process starts. The heavy modules are loaded by
+a background warm-up thread, one named step at a time; /ready reports
+the step timings and progress (e.g. models prewarmed so far, see
+prewarm.py) and turns 200 once every step has finished.
+
+Requests that arrive before the warm-up is done still work: they load
+what they need on first use (behind the same locks), they are just slower.
+With STARTUP_WARMUP_ENABLED=false nothing is warmed up and every request
+loads on first use, so /ready reports "deferred" (ready) right away.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from timezone_utils import wib_isoformat
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Ordered warm-up steps run once in a daemon thread.
+    """
+
+    def __init__(self):
+        self._steps: List[Tuple[str, Callable[[], None]]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.state = "pending"       # pending -> running -> ready | failed, or deferred
+        self.current: Optional[str] = None
+        self.stages: Dict[str, float] = {}
+        self.progress_by_step: Dict[str, Dict[str, int]] = {}
+        self.errors: Dict[str, str] = {}
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+
+    def add_step(self, name: str, fn: Callable[[], None]):
+        self._steps.append((name, fn))
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = "running"
+            self.started_at = wib_isoformat()
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def defer(self):
+        """Skip the warm-up: modules and models load on first request, the service is ready now"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = "deferred"
+            self.started_at = self.finished_at = wib_isoformat()
+
+    def run(self):
+        start = time.perf_counter()
+        for name, fn in self._steps:
+            self.current = name
+            step_start = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                logger.error(f"Warm-up step '{name}' failed: {e}", exc_info=True)
+                self.errors[name] = str(e)
+            self.stages[name] = round(time.perf_counter() - step_start, 3)
+            logger.info(f"Warm-up step '{name}' done in {self.stages[name]:.2f}s")
+
+        self.current = None
+        self.state = "failed" if self.errors else "ready"
+        self.finished_at = wib_isoformat()
+        logger.info(f"Warm-up {self.state} in {time.perf_counter() - start:.2f}s")
+
+    def progress(self, done: int, total: int):
+        """Report progress of the running step (shown by /ready)"""
+        if self.current is not None:
+            self.progress_by_step[self.current] = {"done": done, "total": total}
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("ready", "deferred")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "current": self.current,
+            "stages": dict(self.stages),
+            "progress": dict(self.progress_by_step),
+            "errors": dict(self.errors),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
@@ -123,9 +123,13 @@ CREATE TABLE IF NOT EXISTS ml_model_metrics (
     training_time_seconds DOUBLE PRECISION,
     quality_report JSONB,
     parameters JSONB,
+    backtest JSONB,
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Rolling-origin backtest results (added after the initial schema)
+ALTER TABLE ml_model_metrics ADD COLUMN IF NOT EXISTS backtest JSONB;
+
 CREATE TABLE IF NOT EXISTS ml_drift_metrics (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     model_id TEXT NOT NULL,